@@ -0,0 +1,45 @@
+"""
+Compare JSON backends decoding representative VersaTrak payloads.
+
+    python benchmarks/bench_json.py
+"""
+
+import json
+import time
+
+from payloads import currentstatus_payload, encode, history_payload
+from vt import jsonlib
+
+
+def best_of(func, arg, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    payloads = {
+        "currentstatus (2000 objects)": encode(currentstatus_payload()),
+        "gethistorydata (100k points)": encode(history_payload()),
+    }
+    backends = []
+    for name in jsonlib.BACKENDS:
+        try:
+            backends.append(jsonlib.get_loads(name))
+        except ImportError:
+            print(f"{name}: not installed")
+
+    for label, body in payloads.items():
+        print(f"\n{label}, {len(body) / 1e6:.1f} MB")
+        baseline = best_of(lambda b: json.loads(b.decode()), body)
+        print(f"  {'json (via str)':<16}{baseline * 1000:8.1f} ms")
+        for name, loads in backends:
+            elapsed = best_of(loads, body)
+            print(f"  {name:<16}{elapsed * 1000:8.1f} ms  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
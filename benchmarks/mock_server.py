@@ -0,0 +1,146 @@
+"""
+Local stand-in for the VersaTrak endpoints the benchmarks exercise.
+
+Payload sizes and per-request latency are configurable. Run it standalone
+to point a client or the download script at it:
+
+    python benchmarks/mock_server.py --port 8080 --objects 2000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import gzip
+import time
+
+from aiohttp import web
+
+from payloads import currentstatus_payload, encode, history_payload, uom_payload
+
+
+class MockVersaTrak:
+    """
+    Serves pre-encoded payloads; `latency` seconds are added to every
+    request. With `compress`, bodies are gzipped for clients accepting it.
+    """
+
+    def __init__(
+        self,
+        objects=2000,
+        mps_per_object=3,
+        history_points=10_000,
+        latency=0.0,
+        compress=False,
+    ):
+        self.latency = latency
+        self.compress = compress
+        self._gzipped = {}
+        self.requests = 0
+        status = currentstatus_payload(objects, mps_per_object)
+        self.moids = list(status)
+        self.status = encode(status)
+        self.objects = encode(
+            {
+                moid: {
+                    "name": obj["name"],
+                    "mps": [{"mpid": mp["mpid"]} for mp in obj["mps"]],
+                }
+                for moid, obj in status.items()
+            }
+        )
+        self.uom = encode(uom_payload())
+        self.history_points = history_points
+        self._history = {}
+
+    def app(self):
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/usersession/action/instanceList", self._instances)
+        app.router.add_post("/usersession/action/logon", self._logon)
+        app.router.add_post("/usersession/action/logoff", self._empty)
+        app.router.add_get("/currentstatus", self._body(lambda: self.status))
+        app.router.add_get(
+            "/monitoredobject/action/getall", self._body(lambda: self.objects)
+        )
+        app.router.add_get("/uom", self._body(lambda: self.uom))
+        app.router.add_post(
+            "/monitoredObject/action/gethistorydata/{moid}", self._gethistory
+        )
+        return app
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    def _body(self, payload):
+        async def handler(request):
+            return self._response(request, payload())
+
+        return handler
+
+    def _response(self, request, body):
+        if self.compress and "gzip" in request.headers.get("Accept-Encoding", ""):
+            gzipped = self._gzipped.get(id(body))
+            if gzipped is None:
+                gzipped = self._gzipped[id(body)] = gzip.compress(body, 6)
+            return web.Response(
+                body=gzipped,
+                headers={"Content-Encoding": "gzip"},
+                content_type="application/json",
+            )
+        return web.Response(body=body, content_type="application/json")
+
+    async def _instances(self, request):
+        return web.json_response({"instances": [{"id": "bench", "name": "Benchmark"}]})
+
+    async def _logon(self, request):
+        return web.json_response(
+            {"jwt": f"bench-{time.time()}", "refreshToken": "bench"}
+        )
+
+    async def _empty(self, request):
+        return web.json_response({})
+
+    async def _gethistory(self, request):
+        moid = request.match_info["moid"]
+        body = self._history.get(moid)
+        if body is None:
+            body = self._history[moid] = encode(
+                history_payload(moid, self.history_points)
+            )
+        return self._response(request, body)
+
+
+async def start(server, host="127.0.0.1", port=0):
+    """Start serving; returns (runner, base_url)."""
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--objects", type=int, default=2000)
+    parser.add_argument("--history-points", type=int, default=10_000)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to each request"
+    )
+    parser.add_argument("--compress", action="store_true", help="Serve gzipped bodies")
+    args = parser.parse_args()
+    server = MockVersaTrak(
+        args.objects,
+        history_points=args.history_points,
+        latency=args.latency,
+        compress=args.compress,
+    )
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
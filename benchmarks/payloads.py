@@ -0,0 +1,68 @@
+"""Synthetic VersaTrak payloads shaped like real responses, for benchmarks."""
+
+import json
+import random
+import uuid
+
+UOM_IDS = [str(uuid.UUID(int=i + 1)) for i in range(20)]
+
+
+def uom_payload():
+    return {
+        uom_id: {
+            "dispUom": f"unit{i}",
+            "nDec": i % 3,
+            "dispS1": 0.1 * (i + 1),
+            "dispO1": float(i),
+            "dispS2": 1.0,
+            "dispO2": -float(i),
+        }
+        for i, uom_id in enumerate(UOM_IDS)
+    }
+
+
+def currentstatus_payload(objects=2000, mps_per_object=3, seed=0):
+    rng = random.Random(seed)
+    status = {}
+    for i in range(objects):
+        moid = str(uuid.UUID(int=rng.getrandbits(128)))
+        status[moid] = {
+            "name": f"Freezer {i}",
+            "alarmState": rng.randrange(3),
+            "mps": [
+                {
+                    "mpid": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "lastReading": rng.uniform(-90, 10),
+                    "lastReadingTime": 1_700_000_000_000 + rng.randrange(10**6),
+                    "effUomId": rng.choice(UOM_IDS),
+                    "mpt": {"name": f"Probe {j}", "type": "temperature"},
+                }
+                for j in range(mps_per_object)
+            ],
+        }
+    return status
+
+
+def history_payload(moid="mo-1", points=100_000, mps=2, interval_ms=60_000, seed=0):
+    rng = random.Random(seed)
+    per_mp = points // mps
+    start = 1_700_000_000_000
+    return {
+        "moid": moid,
+        "name": "Freezer",
+        "mps": [
+            {
+                "mpid": f"mp-{j}",
+                "name": f"Probe {j}",
+                "data": [
+                    {"d": start + k * interval_ms, "v": round(rng.uniform(-90, 10), 3)}
+                    for k in range(per_mp)
+                ],
+            }
+            for j in range(mps)
+        ],
+    }
+
+
+def encode(payload):
+    return json.dumps(payload, separators=(",", ":")).encode()
@@ -0,0 +1,362 @@
+"""
+Benchmark the client against a local mock VersaTrak server.
+
+    python benchmarks/run.py                         # run everything
+    python benchmarks/run.py --only bulk_history --latency 0.02
+    python benchmarks/run.py --save baseline.json
+    python benchmarks/run.py --compare baseline.json # exit 1 on regressions
+
+Each benchmark reports its best-of-`--repeat` wall time in seconds, plus
+derived throughput. --compare flags timings more than --threshold slower
+than a previous run saved with --save, and the run also fails when
+`import vt.api` takes longer than --import-budget.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from mock_server import MockVersaTrak, start
+from payloads import (
+    UOM_IDS,
+    currentstatus_payload,
+    encode,
+    history_payload,
+    uom_payload,
+)
+
+from vt import jsonlib
+from vt.api import VersaTrak
+from vt.runner import BackgroundLoop
+from vt.utils import UomConverter
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__.removeprefix("bench_")] = func
+    return func
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def client(ctx):
+    return VersaTrak(base_url=ctx.url, token="bench-token")
+
+
+@benchmark
+def bench_logon(ctx):
+    calls = 20
+
+    async def run():
+        async with VersaTrak(
+            base_url=ctx.url, username="bench", password="bench", instance="bench"
+        ) as vt:
+            for _ in range(calls):
+                await vt.alogin()
+
+    seconds = best_of(lambda: asyncio.run(run()), ctx.repeat)
+    return {"seconds": seconds, "ms_per_logon": seconds / calls * 1000}
+
+
+@benchmark
+def bench_import(ctx):
+    # Cold-start cost of the client in a fresh interpreter, above the
+    # interpreter's own start-up
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+
+    def start(code):
+        return best_of(
+            lambda: subprocess.run([sys.executable, "-c", code], env=env, check=True),
+            ctx.repeat,
+        )
+
+    bare = start("pass")
+    seconds = start("import vt.api") - bare
+    if seconds > ctx.args.import_budget:
+        print(
+            f"OVER BUDGET import: {seconds:.3f}s > {ctx.args.import_budget:.3f}s",
+            file=sys.stderr,
+        )
+        ctx.failed = True
+    return {"seconds": seconds, "interpreter_seconds": bare}
+
+
+@benchmark
+def bench_sync_vs_async(ctx):
+    calls = 20
+    vt = client(ctx)
+
+    def sync():
+        for _ in range(calls):
+            vt.currentstatus()
+
+    async def sequential():
+        async with client(ctx) as vt:
+            for _ in range(calls):
+                await vt.acurrentstatus()
+
+    async def concurrent():
+        async with client(ctx) as vt:
+            await asyncio.gather(*(vt.acurrentstatus() for _ in range(calls)))
+
+    results = {
+        "sync_seconds": best_of(sync, ctx.repeat),
+        "async_sequential_seconds": best_of(
+            lambda: asyncio.run(sequential()), ctx.repeat
+        ),
+        "async_concurrent_seconds": best_of(
+            lambda: asyncio.run(concurrent()), ctx.repeat
+        ),
+    }
+    vt.close()
+    return results
+
+
+@benchmark
+def bench_currentstatus_models(ctx):
+    async def run():
+        async with client(ctx) as vt:
+            index = await vt.aget_current_status()
+            index.point(next(iter(index)).measuring_points[0].mpid)
+
+    return {
+        "seconds": best_of(lambda: asyncio.run(run()), ctx.repeat),
+        "objects": ctx.args.objects,
+    }
+
+
+@benchmark
+def bench_bulk_history(ctx):
+    moids = ctx.server.moids[: ctx.args.history_objects]
+
+    async def run():
+        size = 0
+        async with client(ctx) as vt:
+            async for result in vt.aget_history_many(
+                moids, concurrency=ctx.args.concurrency
+            ):
+                size += len(result.data)
+        return size
+
+    sizes = []
+    seconds = best_of(lambda: sizes.append(asyncio.run(run())), ctx.repeat)
+    points = len(moids) * ctx.args.history_points
+    return {
+        "seconds": seconds,
+        "objects_per_second": len(moids) / seconds,
+        "points_per_second": points / seconds,
+        "mb_per_second": sizes[-1] / seconds / 1e6,
+    }
+
+
+@benchmark
+def bench_history_frame(ctx):
+    moid = ctx.server.moids[0]
+
+    async def run():
+        async with client(ctx) as vt:
+            await vt.agethistory_frame(moid)
+
+    seconds = best_of(lambda: asyncio.run(run()), ctx.repeat)
+    return {"seconds": seconds, "points_per_second": ctx.args.history_points / seconds}
+
+
+@benchmark
+def bench_json_decode(ctx):
+    payloads = {
+        "currentstatus": encode(currentstatus_payload(ctx.args.objects)),
+        "history": encode(history_payload(points=ctx.args.history_points * 10)),
+    }
+    results = {}
+    for label, body in payloads.items():
+        results[f"{label}_stdlib_seconds"] = best_of(
+            lambda: json.loads(body), ctx.repeat
+        )
+        results[f"{label}_{jsonlib.backend}_seconds"] = best_of(
+            lambda: jsonlib.loads(body), ctx.repeat
+        )
+    return results
+
+
+@benchmark
+def bench_uom_convert(ctx):
+    import numpy as np
+
+    converter = UomConverter(uom_payload())
+    count = 1_000_000
+    rng = np.random.default_rng(0)
+    values = rng.uniform(-90, 10, count)
+    # Object dtype, like a DataFrame column of ids
+    uom_ids = np.array(UOM_IDS, dtype=object)[rng.integers(0, len(UOM_IDS), count)]
+    listed = list(zip(values.tolist()[:100_000], uom_ids.tolist()[:100_000]))
+
+    def scalar():
+        convert = converter.convert
+        for value, uom_id in listed:
+            convert(value, uom_id)
+
+    scalar_seconds = best_of(scalar, ctx.repeat)
+    array_seconds = best_of(
+        lambda: converter.convert_array(values, uom_ids), ctx.repeat
+    )
+    results = {
+        "scalar_values_per_second": len(listed) / scalar_seconds,
+        "scalar_seconds": scalar_seconds,
+        "array_values_per_second": count / array_seconds,
+        "array_seconds": array_seconds,
+    }
+    try:
+        import pandas as pd
+    except ImportError:
+        return results
+    # DataFrame columns of ids, as strings and as a categorical
+    column = pd.Series(uom_ids)
+    columns = {"series": column, "categorical": column.astype("category")}
+    for label, ids in columns.items():
+        seconds = best_of(lambda: converter.convert_array(values, ids), ctx.repeat)
+        results[f"{label}_values_per_second"] = count / seconds
+        results[f"{label}_seconds"] = seconds
+    return results
+
+
+class Context:
+    def __init__(self, args, server, url):
+        self.args = args
+        self.server = server
+        self.url = url
+        self.repeat = args.repeat
+        self.failed = False
+
+
+def compare(results, baseline, threshold):
+    """Print timings that regressed against `baseline`; return their count."""
+    regressions = 0
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get(name, {}).get(metric)
+            if not metric.endswith("seconds") or not before:
+                continue
+            change = value / before - 1
+            if change > threshold:
+                regressions += 1
+                print(
+                    f"REGRESSION {name}.{metric}: {before:.4f}s -> {value:.4f}s (+{change:.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the VersaTrak client against a mock server."
+    )
+    parser.add_argument(
+        "--only", nargs="*", choices=sorted(BENCHMARKS), help="Benchmarks to run"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per benchmark; the best is kept"
+    )
+    parser.add_argument(
+        "--objects",
+        type=int,
+        default=2000,
+        help="Monitored objects in currentstatus/getall",
+    )
+    parser.add_argument(
+        "--history-points", type=int, default=10_000, help="Points per history response"
+    )
+    parser.add_argument(
+        "--history-objects",
+        type=int,
+        default=200,
+        help="Objects fetched by bulk_history",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Concurrency of bulk_history"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds the mock server adds per request",
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=1.0,
+        help="Seconds `import vt.api` may take before the run fails",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Have the mock server gzip its responses",
+    )
+    parser.add_argument("--save", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against results saved with --save")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown before a regression is reported",
+    )
+    args = parser.parse_args()
+
+    server = MockVersaTrak(
+        args.objects,
+        history_points=args.history_points,
+        latency=args.latency,
+        compress=args.compress,
+    )
+    loop = BackgroundLoop("mock-server")
+    runner, url = loop.run(start(server))
+    ctx = Context(args, server, url)
+
+    results = {}
+    try:
+        for name in args.only or BENCHMARKS:
+            results[name] = BENCHMARKS[name](ctx)
+            print(f"{name}:")
+            for metric, value in results[name].items():
+                print(f"  {metric:<32}{value:14.4f}")
+    finally:
+        loop.run(runner.cleanup())
+        loop.stop()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "python": platform.python_version(),
+                        "json_backend": jsonlib.backend,
+                        "args": vars(args),
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            ctx.failed = True
+    if ctx.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
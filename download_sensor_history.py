@@ -1,93 +1,307 @@
 import asyncio
-import json
 import argparse
+import json
 import os
-import pandas as pd
-from datetime import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
 from vt.api import VersaTrak
+from vt.export import HistoryDatasetWriter, remove_incomplete
+from vt.history import HistoryFrame
 
-async def download_history(sensor_id, period="7d", output_file=None):
-    load_dotenv(override=True)
-    
-    # Initialize client
-    vt = VersaTrak()
-    if not vt.is_logged_on:
-        print(f"Logging in as {vt.username}...")
-        await vt.alogin()
-    
-    if not vt.is_logged_on:
-        print("Failed to log in. Check credentials in .env")
+
+def read_sensor_list(path):
+    """Read sensor ids from a file, one per line, skipping blanks and # comments."""
+    with open(path) as f:
+        return [
+            line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()
+        ]
+
+
+async def resolve_sensors(vt, args):
+    sensor_ids = list(args.sensor_ids)
+    if args.file:
+        sensor_ids += read_sensor_list(args.file)
+    if args.department or args.location:
+        sensor_ids += sorted(await vt.aresolve_scope(args.department, args.location))
+    elif args.all:
+        sensor_ids += [obj.moid for obj in await vt.aget_monitored_objects()]
+    # De-duplicate, keeping the order given
+    return list(dict.fromkeys(sensor_ids))
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def replace_file(path, text):
+    # Readers see either the old or the new content, even after a crash
+    with open(path + ".tmp", "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def save_checkpoint(path, completed):
+    replace_file(path, "".join(sensor_id + "\n" for sensor_id in sorted(completed)))
+
+
+def discard_uncommitted(batch_path, completed):
+    """
+    Delete the files of a batch an earlier run published but did not
+    checkpoint, since its sensors are downloaded again.
+    """
+    if not os.path.exists(batch_path):
         return
+    with open(batch_path) as f:
+        batch = json.load(f)
+    if not set(batch["sensors"]) <= completed:
+        print(f"Discarding {len(batch['files'])} files of an unfinished checkpoint")
+        for path in batch["files"]:
+            if os.path.exists(path):
+                os.remove(path)
+    os.remove(batch_path)
+
+
+def parse_history(sensor_id, body):
+    """
+    Parse one sensor's history body (bytes) with the fast JSON decoder; runs
+    in worker processes or threads. Returns the frame and the body's size.
+    """
+    return HistoryFrame.from_json(sensor_id, body), len(body)
+
 
-    print(f"Fetching history for sensor {sensor_id} (period: {period})...")
-    try:
-        # Fetch raw history data
-        history_raw = await vt.agethistorydata(sensor_id, period=period)
-        history_json = json.loads(history_raw)
-        
-        # Parse history data
-        # Structure: {"moid": "...", "name": "...", "mps": [{"mpid": "...", "name": "...", "data": [[ts, val], ...], ...}]}
-        
-        all_data = []
-        sensor_name = history_json.get("name", "Unknown")
-        
-        for mp_entry in history_json.get("mps", []):
-            mp_id = mp_entry.get("mpid")
-            mp_name = mp_entry.get("name")
-            data_points = mp_entry.get("data", [])
-            
-            print(f"  Found {len(data_points)} data points for Measuring Point: {mp_name} ({mp_id})")
-            
-            for point in data_points:
-                ts = point.get('d')
-                val = point.get('v')
-                if ts is not None and val is not None:
-                    all_data.append({
-                        "sensor_id": sensor_id,
-                        "sensor_name": sensor_name,
-                        "mp_id": mp_id,
-                        "mp_name": mp_name,
-                        "timestamp": pd.to_datetime(ts, unit='ms'),
-                        "value": val
-                    })
-        
-        if not all_data:
-            print("No data points found for this sensor in the specified period.")
+class Progress:
+    def __init__(self, total, interval=5.0):
+        self.total = total
+        self.interval = interval
+        self.done = self.failed = self.rows = self.bytes = 0
+        self.started = self.reported = time.monotonic()
+
+    def update(self, rows=0, size=0, failed=False):
+        self.done += 1
+        self.failed += failed
+        self.rows += rows
+        self.bytes += size
+        now = time.monotonic()
+        if now - self.reported >= self.interval or self.done == self.total:
+            self.reported = now
+            print(self.summary())
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f"[{self.done}/{self.total}] {self.failed} failed, {self.rows} rows, "
+            f"{self.done / elapsed:.1f} sensors/s, {self.rows / elapsed:.0f} rows/s, "
+            f"{self.bytes / elapsed / 1e6:.2f} MB/s"
+        )
+
+
+async def download_history(args):
+    async with VersaTrak() as vt:
+        if not vt.is_logged_on:
+            print(f"Logging in as {vt.username}...")
+            await vt.alogin()
+        if not vt.is_logged_on:
+            print("Failed to log in. Check credentials in .env")
             return
 
-        # Create DataFrame
-        df = pd.DataFrame(all_data)
-        
-        # Sort by timestamp
-        df = df.sort_values("timestamp")
-        
-        # Determine output filename if not provided
-        if not output_file:
-            timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_name = "".join([c if c.isalnum() else "_" for c in sensor_name])
-            output_file = f"history_{safe_name}_{timestamp_str}.parquet"
-        
-        # Save to Parquet
-        print(f"Saving {len(df)} records to {output_file}...")
-        df.to_parquet(output_file, engine='pyarrow', index=False)
-        print("Download complete.")
-        
-    except Exception as e:
-        print(f"An error occurred: {e}")
-    finally:
-        if vt.is_logged_on:
-            await vt.alogoff()
+        sensor_ids = await resolve_sensors(vt, args)
+        checkpoint = args.checkpoint or os.path.join(args.dataset, "_checkpoint")
+        os.makedirs(os.path.dirname(checkpoint) or ".", exist_ok=True)
+        # The sensors and files of the checkpoint being committed, kept until
+        # the checkpoint records them
+        batch_path = checkpoint + ".batch"
+        if args.restart and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        completed = load_checkpoint(checkpoint)
+        discard_uncommitted(batch_path, completed)
+        pending = [s for s in sensor_ids if s not in completed]
+        if completed:
+            print(
+                f"Resuming: {len(sensor_ids) - len(pending)} of {len(sensor_ids)} "
+                "sensors already downloaded"
+            )
+        if not pending:
+            print("Nothing to download.")
+            return
+        print(
+            f"Fetching {args.period} of history for {len(pending)} sensors "
+            f"into {args.dataset}..."
+        )
+
+        # Files of an earlier run that stopped before its last checkpoint
+        remove_incomplete(args.dataset)
+        loop = asyncio.get_running_loop()
+        # Parsing runs in worker processes, or in threads so it never stalls
+        # the downloads; one writer, fed by a single thread, writes every
+        # sensor into date partitions with sensor_id as a column
+        pool = ProcessPoolExecutor(args.workers) if args.workers > 0 else None
+        writer_thread = ThreadPoolExecutor(1, thread_name_prefix="parquet-writer")
+        writer = HistoryDatasetWriter(args.dataset, partition_by=("date",))
+        progress = Progress(len(pending))
+        parses = set()
+        written = []
+        published = 0
+        uncommitted = 0
+
+        async def parse(result):
+            frame, size = await loop.run_in_executor(
+                pool, parse_history, result.object_id, result.data
+            )
+            return result, frame, size
+
+        async def commit():
+            # Sensors are checkpointed only once their files are complete. The
+            # batch file lists the files being published, so a crash before
+            # the checkpoint is saved lets the next run delete them instead of
+            # writing their rows again
+            nonlocal published, uncommitted
+            await loop.run_in_executor(writer_thread, writer.flush)
+            replace_file(
+                batch_path,
+                json.dumps({"sensors": written, "files": writer.files[published:]}),
+            )
+            await loop.run_in_executor(writer_thread, writer.close)
+            completed.update(written)
+            save_checkpoint(checkpoint, completed)
+            os.remove(batch_path)
+            published = len(writer.files)
+            written.clear()
+            uncommitted = 0
+
+        async def write(task):
+            nonlocal uncommitted
+            try:
+                result, frame, size = task.result()
+            except Exception as e:
+                print(f"  Failed to parse {task.object_id}: {e}")
+                progress.update(failed=True)
+                return
+            # A write error leaves the writer unusable, so it ends the run
+            await loop.run_in_executor(writer_thread, writer.write, frame)
+            written.append(result.object_id)
+            uncommitted += len(frame)
+            progress.update(len(frame), size)
+            if uncommitted >= args.checkpoint_rows:
+                await commit()
+
+        try:
+            # Bodies stay bytes, which the parser decodes directly
+            async for result in vt.aget_history_many(
+                pending,
+                period=args.period,
+                concurrency=args.concurrency,
+                timeout=args.timeout,
+                decode=False,
+            ):
+                if not result.ok:
+                    print(f"  Failed to fetch {result.object_id}: {result.error}")
+                    progress.update(failed=True)
+                    continue
+                task = asyncio.ensure_future(parse(result))
+                task.object_id = result.object_id
+                parses.add(task)
+                # Bound the bodies held in memory while parsing catches up
+                if len(parses) >= max(args.workers, 1) * 2:
+                    done, parses = await asyncio.wait(
+                        parses, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        await write(task)
+            if parses:
+                done, _ = await asyncio.wait(parses)
+                for task in done:
+                    await write(task)
+            await commit()
+        finally:
+            writer_thread.shutdown()
+            if pool is not None:
+                pool.shutdown()
+
+        print(f"Download complete. {progress.summary()}")
+        if progress.failed:
+            print("Re-run the same command to retry the failed sensors.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Download VersaTrak sensor historical data to a partitioned "
+        "Parquet dataset."
+    )
+    parser.add_argument(
+        "sensor_ids", nargs="*", help="UUIDs of sensors (Monitored Objects)"
+    )
+    parser.add_argument("--file", help="File listing sensor UUIDs, one per line")
+    parser.add_argument(
+        "--all", action="store_true", help="Download every monitored object"
+    )
+    parser.add_argument(
+        "--department", help="Only monitored objects in this department (id or name)"
+    )
+    parser.add_argument(
+        "--location", help="Only monitored objects in this location (id or name)"
+    )
+    parser.add_argument(
+        "--period",
+        default="7d",
+        help="Period to fetch (e.g., 24h, 7d, 30d). Default: 7d",
+    )
+    parser.add_argument(
+        "--dataset",
+        default="history",
+        help="Output dataset directory. Default: history",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Concurrent history requests. Default: 8",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes for parsing (0 to parse in threads). Default: 0",
+    )
+    parser.add_argument(
+        "--timeout", type=float, help="Per-sensor request timeout in seconds"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file of completed sensors. Default: <dataset>/_checkpoint",
+    )
+    parser.add_argument(
+        "--checkpoint-rows",
+        type=int,
+        default=5_000_000,
+        help="Rows written between checkpoints; each one completes the open "
+        "Parquet files. Default: 5000000",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint and download every sensor again (rows go to "
+        "new files, so start from an empty --dataset)",
+    )
+
+    args = parser.parse_args(argv)
+    if not (
+        args.sensor_ids or args.file or args.all or args.department or args.location
+    ):
+        parser.error("give sensor ids, --file, --all, --department or --location")
+    return args
+
 
 def main():
-    parser = argparse.ArgumentParser(description="Download VersaTrak sensor historical data to Parquet.")
-    parser.add_argument("sensor_id", help="The UUID of the sensor (Monitored Object)")
-    parser.add_argument("--period", default="7d", help="Period to fetch (e.g., 24h, 7d, 30d). Default: 7d")
-    parser.add_argument("--output", help="Output Parquet file path")
-    
-    args = parser.parse_args()
-    
-    asyncio.run(download_history(args.sensor_id, args.period, args.output))
+    args = parse_args()
+    load_dotenv(override=True)
+    asyncio.run(download_history(args))
+
 
 if __name__ == "__main__":
     main()
@@ -45,28 +45,24 @@ def main():
         # 5. Demonstrate reading conversion
         # Let's get the current status of this object to see its latest reading
         print("\nFetching current status...")
-        status_data = vt.currentstatus()
-        status_dict = json.loads(status_data)
+        status = vt.get_current_status()
 
-        # Current status is a dictionary keyed by MOID
-        obj_status = status_dict.get(moid)
+        # Current status is indexed by MOID; models expose the common fields
+        obj_status = status.get(moid)
 
-        if obj_status and "mps" in obj_status and obj_status["mps"]:
+        if obj_status and obj_status.measuring_points:
             # A monitored object can have multiple measuring points (mps)
-            # In currentstatus, mps is a list of dictionaries
-            for mp_info in obj_status["mps"]:
-                # The raw value is often in 'lastReading' for current status
-                raw_val = mp_info.get("lastReading")
-                uom_id = mp_info.get("effUomId") or mp_info.get("uomId")
-                mp_name = mp_info.get("mpt", {}).get("name", "Unknown")
-
-                if raw_val is not None:
+            for mp in obj_status.measuring_points:
+                # The latest raw value and its unit ('lastReading', 'effUomId')
+                reading = mp.reading
+
+                if reading is not None:
                     # Convert the raw value to human-readable format
-                    human_val = converter.format(raw_val, uom_id)
-                    float_val = converter.convert(raw_val, uom_id)
+                    human_val = reading.format(converter)
+                    float_val = reading.convert(converter)
 
-                    print(f"Measuring Point: {mp_name}")
-                    print(f"  Raw Value: {raw_val}")
+                    print(f"Measuring Point: {mp.name or 'Unknown'}")
+                    print(f"  Raw Value: {reading.value}")
                     print(f"  Human Value: {human_val}")
                     print(f"  Float Value: {float_val:.4f}")
         else:
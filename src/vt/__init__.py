@@ -0,0 +1,32 @@
+"""
+VersaTrak API client.
+
+Submodules are imported on first attribute access, so `import vt` stays
+cheap and code that only needs e.g. `vt.models` or `vt.store` does not
+pay for aiohttp and uplink.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "VersaTrak": "api",
+    "HistoryResult": "history",
+    "HistoryFrame": "history",
+    "ObjectIndex": "models",
+    "UomConverter": "utils",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_EXPORTS])
@@ -1,7 +1,31 @@
 import asyncio
+import codecs
+import contextlib
 import logging
+import aiohttp
 import os
-import json
+import time
+from .auth import AuthManager
+from .compression import Decoder
+from .history import (
+    BucketAggregator,
+    HistoryFrame,
+    HistoryResult,
+    HistoryStreamParser,
+    merge_history,
+    parse_period,
+    split_time_range,
+)
+from . import jsonlib
+from .metrics import Recorder, endpoint_name
+from .models import ObjectIndex, Uom
+from .polling import PollState, diff_snapshots, status_snapshot
+from .retry import RetryPolicy
+from .runner import default_loop
+from .scope import DEPARTMENT_KEYS, LOCATION_KEYS, known_ids, scope_members
+from .session import SessionClient, compressed_bodies
+from .singleflight import SingleFlight
+from .snapshot import Snapshot, snapshot_table
 from .utils import UomConverter
 from uplink import (
     Consumer,
@@ -9,16 +33,17 @@ from uplink import (
     post,
     Path,
     Body,
-    returns,
+    HeaderMap,
     response_handler,
-    AiohttpClient,
 )
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
-def raise_for_status(response):
+async def raise_for_status(response):
+    # A coroutine keeps uplink from buffering the whole body before handing
+    # the response over, which the streaming readers rely on
     response.raise_for_status()
     return response
 
@@ -33,13 +58,40 @@ class VersaTrak(Consumer):
         password=None,
         token=None,
         refresh_token=None,
+        history_chunk_size=None,
+        cache=None,
+        session=None,
+        session_config=None,
+        runner=None,
+        refresh_margin=60,
+        retry_policy=None,
+        rate_limiter=None,
+        bucket_cache=None,
+        json_loads=None,
+        instrumentation=None,
+        coalesce_window=0.0,
+        scope_ttl=3600,
+        snapshot_cache=None,
     ):
         base_url = (
             base_url
             or os.getenv("VT_API_URL")
             or "http://versatrak.example.com/vtwebapi2/api/"
         )
-        super(VersaTrak, self).__init__(base_url=base_url, client=AiohttpClient())
+        # Optional instrumentation hooks; requests are not traced without them
+        self.instrumentation = instrumentation
+        self._recorder = Recorder(instrumentation) if instrumentation else None
+        # `session` shares an existing aiohttp.ClientSession between clients;
+        # otherwise one is created from `session_config` on first use
+        self._http = SessionClient(
+            session=session,
+            config=session_config,
+            trace_configs=[self._recorder.trace_config()] if self._recorder else None,
+        )
+        super(VersaTrak, self).__init__(base_url=base_url, client=self._http)
+        # Loop thread running the synchronous wrappers; shared process-wide
+        # by default
+        self._runner = runner or default_loop()
 
         self.instance = instance or os.getenv("VT_INSTANCE_ID", "")
         self.username = username or os.getenv("VT_USERNAME", "")
@@ -47,13 +99,48 @@ class VersaTrak(Consumer):
         self.token = token
         self.refresh_token = refresh_token
         self.is_logged_on = False
+        # Proactive token refresh and coalesced re-authentication
+        self.auth_manager = AuthManager(
+            self,
+            refresh_margin=refresh_margin,
+            on_event=instrumentation.on_auth if instrumentation else None,
+        )
+        # Retries transient failures; a TokenBucket (optionally shared
+        # between clients) caps the request rate
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.history_chunk_size = parse_period(
+            history_chunk_size or os.getenv("VT_HISTORY_CHUNK_SIZE", "7d")
+        )
+        # Optional MetadataCache (or compatible) for the reference endpoints
+        self.cache = cache
+        # Decoder for response bodies (bytes or str); the fastest installed
+        # JSON backend by default
+        self.json_loads = json_loads or jsonlib.loads
+        # Optional BucketCache of completed aggregate_history buckets
+        self.bucket_cache = bucket_cache
+        # Identical concurrent reads share one request and parsed result;
+        # with a coalesce_window, results are reused for that many seconds
+        self._flight = SingleFlight(ttl=coalesce_window)
+        # Department/location/watchlist -> MOIDs mappings, kept scope_ttl seconds
+        self._scopes = SingleFlight(ttl=scope_ttl)
+        # Optional SnapshotCache sharing parsed currentstatus/getall
+        # snapshots between the processes of a host
+        self.snapshot_cache = snapshot_cache
+        self._poll_states = {}
 
         if self.token:
             self.session.headers.update({"Authorization": f"Bearer {self.token}"})
             self.is_logged_on = True
 
-        # Automated login if credentials provided
-        if not self.is_logged_on and self.username and self.password:
+        # Automated login if credentials provided; a shared session belongs
+        # to the caller's loop, so its owner awaits alogin() there instead
+        if (
+            not self.is_logged_on
+            and self.username
+            and self.password
+            and self._http.owns_session
+        ):
             # We use _run_sync here for the constructor's auto-login
             if not self.instance:
                 try:
@@ -67,39 +154,56 @@ class VersaTrak(Consumer):
                 except Exception as e:
                     logger.debug(f"Failed to auto-login during init: {e}")
 
-    def _run_sync(self, coro):
-        """Helper to run async methods synchronously."""
+    async def aclose(self, logoff=True):
+        """
+        Log off (unless `logoff` is False) and close the aiohttp session if
+        this client created it.
+        """
         try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            if logoff and self.is_logged_on:
+                await self.alogoff()
+        finally:
+            await self._http.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
 
-        if loop.is_running():
-            import nest_asyncio
+    def close(self, logoff=True):
+        self._http.close_soon()
+        return self._run_sync(self.aclose(logoff))
 
-            nest_asyncio.apply()
+    def __enter__(self):
+        return self
 
-        return loop.run_until_complete(coro)
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run_sync(self, coro):
+        """Helper to run async methods synchronously on the background loop."""
+        try:
+            self._http.check_loop(self._runner.loop)
+        except RuntimeError:
+            coro.close()
+            raise
+        return self._runner.run(coro)
 
     # --- Internal async methods (decorated) ---
 
-    @returns.json
     @get("usersession/action/instanceList")
     async def _aget_instance_list_raw(self):
         pass
 
-    @returns.json
     @post("usersession/action/logon")
     async def _alogon_raw(self, data: Body):
         pass
 
-    @returns.json
     @get("usersession/action/isloggedon")
     async def _aisloggedon_raw(self):
         pass
 
-    @returns.json
     @post("usersession/action/refreshAuthToken")
     async def _arefresh_token_raw(self, **data: Body):
         pass
@@ -112,10 +216,213 @@ class VersaTrak(Consumer):
     async def _aget_history_raw(self, object_id: Path, data: Body):
         pass
 
+    async def _acall(self, raw, *args, **kwargs):
+        # Send `raw` leaving the body compressed; it must be read through
+        # _aread or _aiter_body
+        with compressed_bodies():
+            return await raw(*args, **kwargs)
+
+    async def _aread(self, res):
+        # The decompressed body and its size on the wire
+        wire = await res.read()
+        if not wire or res.status in (204, 304):
+            # Nothing to decode, whatever Content-Encoding says
+            return b"", len(wire)
+        decoder = Decoder.for_response(res)
+        if decoder is None:
+            return wire, len(wire)
+        return decoder.decompress(wire) + decoder.flush(), len(wire)
+
+    async def _aiter_body(self, res, read_size):
+        # Decompressed chunks of the body as they arrive from the wire
+        decoder = Decoder.for_response(res)
+        size = wire = 0
+        error = None
+        complete = False
+        try:
+            async for chunk in res.content.iter_chunked(read_size):
+                wire += len(chunk)
+                if decoder is not None:
+                    chunk = decoder.decompress(chunk)
+                size += len(chunk)
+                yield chunk
+            if decoder is not None and wire:
+                chunk = decoder.flush()
+                size += len(chunk)
+                yield chunk
+            complete = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            res.release()
+            # Also reported when reading failed, or the consumer closed or
+            # was cancelled before the end of the body
+            self._finish(
+                res, size, wire, error=error, aborted=not complete and error is None
+            )
+
+    def _decode_json(self, res, body, wire):
+        # Decode straight from the body bytes, skipping str construction
+        if self._recorder is None:
+            return self.json_loads(body)
+        started = time.perf_counter()
+        data = self.json_loads(body)
+        self._recorder.finish(res, len(body), time.perf_counter() - started, wire)
+        return data
+
+    def _finish(self, res, size, wire_size, error=None, aborted=False):
+        # Report an instrumented response once its body has been read
+        if self._recorder is not None:
+            self._recorder.finish(
+                res, size, wire_size=wire_size, error=error, aborted=aborted
+            )
+
+    async def _asend(self, raw, *args, **kwargs):
+        """
+        Send an authenticated request through the client's pipeline: rate
+        limiting, retries of transient failures with backoff,
+        re-authentication on expiry or a 401, and instrumentation.
+
+        The body is left to the caller, so once the response headers have
+        arrived a failure while streaming it is not retried; buffered reads
+        use _asend_read instead.
+        """
+        res, _, _ = await self._aattempts(raw, False, args, kwargs)
+        return res
+
+    async def _asend_read(self, raw, *args, **kwargs):
+        """
+        Like _asend, but reads the body within each attempt, so a connection
+        reset or truncated body is retried along with the request. Returns
+        the response, its decompressed body and the body's size on the wire.
+        """
+        return await self._aattempts(raw, True, args, kwargs)
+
+    async def _aauth_read(self, raw, *args, **kwargs):
+        """
+        Like _asend_read for the session endpoints, which are instrumented,
+        rate limited and retried like any request but sent as they are: the
+        re-authentication in front of other requests would call them again.
+        """
+        return await self._aattempts(raw, True, args, kwargs, authenticate=False)
+
+    async def _aauth_json(self, raw, *args, **kwargs):
+        return self._decode_json(*await self._aauth_read(raw, *args, **kwargs))
+
+    async def _aattempts(self, raw, read, args, kwargs, authenticate=True):
+        send = self._asend_authenticated if authenticate else self._acall
+        recorder = self._recorder
+        if recorder is not None:
+            endpoint = endpoint_name(raw)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            if recorder is not None:
+                record, token = recorder.begin(endpoint, attempt)
+            res = body = wire = None
+            try:
+                res = await send(raw, *args, **kwargs)
+                if read:
+                    body, wire = await self._aread(res)
+            except Exception as e:
+                if res is not None:
+                    res.release()
+                if recorder is not None:
+                    recorder.end(record, token, error=e)
+                delay = self.retry_policy.next_delay(attempt, e)
+                if delay is None:
+                    raise
+                logger.debug(f"Retrying in {delay:.2f}s after {e!r}")
+                if recorder is not None:
+                    recorder.hooks.on_retry(endpoint, attempt, delay, e)
+            else:
+                if recorder is not None:
+                    recorder.end(record, token, res)
+                return res, body, wire
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _asend_authenticated(self, raw, *args, **kwargs):
+        # Refresh the session ahead of token expiry and, on a 401,
+        # re-authenticate once and retry
+        await self.auth_manager.ensure_fresh()
+        token = self.token
+        try:
+            return await self._acall(raw, *args, **kwargs)
+        except aiohttp.ClientResponseError as e:
+            if e.status != 401 or not await self.auth_manager.reauthenticate(token):
+                raise
+        logger.debug("Retrying request after re-authentication")
+        return await self._acall(raw, *args, **kwargs)
+
+    async def _acoalesced(self, key, func, *args, **kwargs):
+        try:
+            hash(key)
+        except TypeError:
+            # e.g. a request body; not worth canonicalizing
+            return await func(*args, **kwargs)
+        return await self._flight.do(key, func, *args, **kwargs)
+
+    async def _atext(self, raw, *args, **kwargs):
+        return (await self._abody(raw, *args, **kwargs)).decode()
+
+    async def _abody(self, raw, *args, **kwargs):
+        # The UTF-8 body, shared by the text getters and the parsers; only
+        # the public text getters decode it to str
+        res, body, wire = await self._ashared(raw, *args, **kwargs)
+        self._finish(res, len(body), wire)
+        return body
+
+    async def _aparse(self, raw):
+        # Decoded from the body shared with the text getters and every other
+        # parser of the endpoint, so a mixed burst sends one request
+        res, body, wire = await self._ashared(raw)
+        return self._decode_json(res, body, wire)
+
+    async def _ashared(self, raw, *args, **kwargs):
+        # The response, UTF-8 body and wire size of one request per burst of
+        # identical reads; the first caller to consume the body reports it
+        # to the instrumentation
+        key = (raw.__name__, args, tuple(sorted(kwargs.items())))
+        return await self._acoalesced(key, self._afetch_body, raw, *args, **kwargs)
+
+    async def _afetch_body(self, raw, *args, **kwargs):
+        res, body, wire = await self._asend_read(raw, *args, **kwargs)
+        return res, _utf8(body, res.get_encoding()), wire
+
+    @property
+    def _cache_scope(self):
+        return f"{self.session.base_url}#{self.instance}"
+
+    async def _acached_text(self, endpoint, raw):
+        return (await self._acached_body(endpoint, raw)).decode()
+
+    async def _acached_body(self, endpoint, raw):
+        if self.cache is not None:
+            body = self.cache.get(endpoint, self._cache_scope)
+            if isinstance(body, str):
+                # Cached as text by an earlier version
+                body = body.encode()
+            if body is not None:
+                return body
+        body = await self._abody(raw)
+        if self.cache is not None:
+            self.cache.set(endpoint, self._cache_scope, body)
+        return body
+
+    def invalidate_cache(self, endpoint=None):
+        """Drop cached reference data for one endpoint (e.g. "uom") or all."""
+        self._flight.forget()
+        self._scopes.forget()
+        if self.cache is not None:
+            self.cache.invalidate(endpoint, self._cache_scope)
+
     # --- Public Async API methods ---
 
     async def aget_instances(self):
-        res = await self._aget_instance_list_raw()
+        res = await self._aauth_json(self._aget_instance_list_raw)
         return res.get("instances", [])
 
     async def aget_first_instance_id(self):
@@ -130,7 +437,7 @@ class VersaTrak(Consumer):
             "password": self.password,
             "instance": self.instance,
         }
-        res = await self._alogon_raw(data=logon_data)
+        res = await self._aauth_json(self._alogon_raw, data=logon_data)
         self.token = res.get("jwt")
         self.refresh_token = res.get("refreshToken")
         if self.token:
@@ -139,13 +446,13 @@ class VersaTrak(Consumer):
         return self.is_logged_on
 
     async def aisloggedon(self):
-        res = await self._aisloggedon_raw()
+        res = await self._aauth_json(self._aisloggedon_raw)
         self.is_logged_on = res.get("isLoggedOn", False)
         return self.is_logged_on
 
     async def arefresh_auth_token(self):
         data = {"authToken": self.token, "refreshToken": self.refresh_token}
-        res = await self._arefresh_token_raw(**data)
+        res = await self._aauth_json(self._arefresh_token_raw, **data)
         self.token = res.get("authToken")
         self.refresh_token = res.get("refreshToken")
         if self.token:
@@ -155,8 +462,9 @@ class VersaTrak(Consumer):
 
     async def alogoff(self):
         try:
-            res = await self._alogoff_raw()
-            return await res.text()
+            res, body, wire = await self._aauth_read(self._alogoff_raw)
+            self._finish(res, len(body), wire)
+            return body.decode(res.get_encoding())
         finally:
             self.is_logged_on = False
             self.token = ""
@@ -171,154 +479,679 @@ class VersaTrak(Consumer):
         pass
 
     async def auserrole(self):
-        res = await self.auserrole_raw()
-        return await res.text()
+        return await self._atext(self.auserrole_raw)
 
     @get("userrole/action/functions")
     async def afunctions_raw(self):
         pass
 
     async def afunctions(self):
-        res = await self.afunctions_raw()
-        return await res.text()
+        return await self._atext(self.afunctions_raw)
 
     @get("user/action/watchlist")
     async def awatchlist_raw(self):
         pass
 
     async def awatchlist(self):
-        res = await self.awatchlist_raw()
-        return await res.text()
+        return await self._atext(self.awatchlist_raw)
 
     @get("user/action/getEditUsersList")
     async def aget_users_list_raw(self):
         pass
 
     async def aget_users_list(self):
-        res = await self.aget_users_list_raw()
-        return await res.text()
+        return await self._atext(self.aget_users_list_raw)
 
     @get("user/{user_id}")
     async def aget_user_raw(self, user_id: Path("user_id")):
         pass
 
     async def aget_user(self, user_id):
-        res = await self.aget_user_raw(user_id=user_id)
-        return await res.text()
+        return await self._atext(self.aget_user_raw, user_id=user_id)
 
     @get("user")
     async def aget_users_raw(self):
         pass
 
     async def aget_users(self):
-        res = await self.aget_users_raw()
-        return await res.text()
+        return await self._atext(self.aget_users_raw)
 
     @get("currentstatus")
     async def acurrentstatus_raw(self):
         pass
 
     async def acurrentstatus(self):
-        res = await self.acurrentstatus_raw()
-        return await res.text()
+        return await self._atext(self.acurrentstatus_raw)
 
     @get("monitoredobject/action/getall")
     async def agetallmonitoredobjects_raw(self):
         pass
 
     async def agetallmonitoredobjects(self):
-        res = await self.agetallmonitoredobjects_raw()
-        return await res.text()
+        return await self._atext(self.agetallmonitoredobjects_raw)
+
+    @get("currentstatus")
+    async def _acurrentstatus_conditional_raw(self, headers: HeaderMap):
+        pass
+
+    @get("monitoredobject/action/getall")
+    async def _agetallmonitoredobjects_conditional_raw(self, headers: HeaderMap):
+        pass
+
+    def _poll_state(self, key):
+        state = self._poll_states.get(key)
+        if state is None:
+            state = self._poll_states[key] = PollState()
+        return state
+
+    async def _apoll(self, state, raw):
+        body = await self._apoll_body(state, raw)
+        return None if body is None else body.decode()
+
+    async def _apoll_body(self, state, raw):
+        res, body, wire = await self._asend_read(raw, headers=state.request_headers())
+        if res.status == 304:
+            self._finish(res, 0, 0)
+            return None
+        self._finish(res, len(body), wire)
+        if not state.update(res.headers, body):
+            return None
+        return _utf8(body, res.get_encoding())
+
+    async def apoll_currentstatus(self):
+        """
+        Poll currentstatus, returning None when nothing changed since the
+        last poll.
+
+        Sends If-None-Match/If-Modified-Since when the server provided
+        validators and otherwise compares a digest of the body, so unchanged
+        payloads are never decoded.
+        """
+        return await self._apoll(
+            self._poll_state("currentstatus"), self._acurrentstatus_conditional_raw
+        )
+
+    async def apoll_monitoredobjects(self):
+        """
+        Poll monitoredobject/action/getall, returning None when nothing
+        changed since the last poll.
+        """
+        return await self._apoll(
+            self._poll_state("getallmonitoredobjects"),
+            self._agetallmonitoredobjects_conditional_raw,
+        )
+
+    async def watch_current_status(self, interval=30, emit_initial=True):
+        """
+        Poll currentstatus every `interval` seconds and yield a StatusChange
+        for each measuring point (or monitored object) that was added,
+        changed or removed since the previous poll.
+
+        The first poll reports every measuring point as "added" unless
+        `emit_initial` is False. Unchanged polls are skipped without decoding.
+        """
+        state = PollState()
+        snapshot = None
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            body = await self._apoll_body(state, self._acurrentstatus_conditional_raw)
+            if body is not None:
+                current = status_snapshot(self.json_loads(body))
+                if snapshot is not None or emit_initial:
+                    for change in diff_snapshots(snapshot or {}, current):
+                        yield change
+                snapshot = current
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+    def reset_polls(self):
+        """Forget previous poll results so the next polls return full payloads."""
+        self._poll_states.clear()
 
     @get("department")
     async def adepartment_raw(self):
         pass
 
     async def adepartment(self):
-        res = await self.adepartment_raw()
-        return await res.text()
+        return await self._acached_text("department", self.adepartment_raw)
 
     @get("location")
     async def alocation_raw(self):
         pass
 
     async def alocation(self):
-        res = await self.alocation_raw()
-        return await res.text()
+        return await self._acached_text("location", self.alocation_raw)
 
     @get("uom")
     async def auom_raw(self):
         pass
 
     async def auom(self):
-        res = await self.auom_raw()
-        return await res.text()
+        return await self._acached_text("uom", self.auom_raw)
 
     @get("policy")
     async def apolicy_raw(self):
         pass
 
     async def apolicy(self):
-        res = await self.apolicy_raw()
-        return await res.text()
+        return await self._acached_text("policy", self.apolicy_raw)
 
     @get("monitoredObjectType")
     async def amonitoredobjecttype_raw(self):
         pass
 
     async def amonitoredobjecttype(self):
-        res = await self.amonitoredobjecttype_raw()
-        return await res.text()
+        return await self._acached_text(
+            "monitoredobjecttype", self.amonitoredobjecttype_raw
+        )
 
     @get("monitorPointType")
     async def amonitorpointtype_raw(self):
         pass
 
     async def amonitorpointtype(self):
-        res = await self.amonitorpointtype_raw()
-        return await res.text()
+        return await self._acached_text("monitorpointtype", self.amonitorpointtype_raw)
 
     @get("sensortype/probetypes")
     async def aprobetypes_raw(self):
         pass
 
     async def aprobetypes(self):
-        res = await self.aprobetypes_raw()
-        return await res.text()
+        return await self._acached_text("probetypes", self.aprobetypes_raw)
 
     @get("system/action/sysinfo")
     async def asysinfo_raw(self):
         pass
 
     async def asysinfo(self):
-        res = await self.asysinfo_raw()
-        return await res.text()
+        return await self._atext(self.asysinfo_raw)
 
     async def agethistorydata(
-        self, object_id, start_date=0, end_date=0, period="1d", include_events=False
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        adjust_to_most_recent=True,
     ):
-        params = {
+        body = await self._ahistory_body(
+            object_id,
+            start_date,
+            end_date,
+            period,
+            include_events,
+            adjust_to_most_recent,
+        )
+        return body.decode()
+
+    async def _ahistory_body(
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        adjust_to_most_recent=True,
+    ):
+        params = self._history_params(
+            start_date, end_date, period, include_events, adjust_to_most_recent
+        )
+        return await self._abody(
+            self._aget_history_raw, object_id=object_id, data=params
+        )
+
+    @staticmethod
+    def _history_params(
+        start_date, end_date, period, include_events, adjust_to_most_recent
+    ):
+        return {
             "tsStartDate": start_date,
             "tsEndDate": end_date,
             "period": period,
             "includeEvents": include_events,
             "jsTimestamps": True,
-            "adjustToMostRecent": True,
+            "adjustToMostRecent": adjust_to_most_recent,
         }
-        if not self.is_logged_on:
-            await self.alogin()
-        res = await self._aget_history_raw(object_id=object_id, data=params)
-        return await res.text()
+
+    async def _aiter_history_chunks(self, object_id, params, parser, read_size):
+        # Yields the points parsed from each chunk of the response body
+        res = await self._asend(
+            self._aget_history_raw, object_id=object_id, data=params
+        )
+        # Closed with this generator, so an abandoned body is released and
+        # reported right away rather than when it is garbage collected
+        async with contextlib.aclosing(self._aiter_body(res, read_size)) as body:
+            async for chunk in body:
+                yield parser.feed(chunk)
+        yield parser.close()
+
+    async def astream_history(
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        adjust_to_most_recent=True,
+        batch_size=None,
+        read_size=64 * 1024,
+    ):
+        """
+        Stream history points as (mp_id, ts, value) tuples.
+
+        The response body is parsed incrementally as it arrives, so memory
+        use stays flat regardless of the range length. With `batch_size`,
+        lists of up to that many points are yielded instead of single points.
+        """
+        params = self._history_params(
+            start_date, end_date, period, include_events, adjust_to_most_recent
+        )
+        chunks = self._aiter_history_chunks(
+            object_id, params, HistoryStreamParser(), read_size
+        )
+        async with contextlib.aclosing(chunks):
+            if batch_size is None:
+                async for points in chunks:
+                    for point in points:
+                        yield point
+                return
+            batch = []
+            async for points in chunks:
+                batch.extend(points)
+                while len(batch) >= batch_size:
+                    yield batch[:batch_size]
+                    del batch[:batch_size]
+        if batch:
+            yield batch
+
+    async def agethistory_frame(
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        adjust_to_most_recent=True,
+    ):
+        """
+        Fetch history into a columnar HistoryFrame.
+
+        The buffered body is decoded with the client's JSON decoder and the
+        points copied into int64 timestamp and float64 value buffers per
+        measuring point; use astream_history to bound memory instead.
+        """
+        params = self._history_params(
+            start_date, end_date, period, include_events, adjust_to_most_recent
+        )
+        body = await self._abody(
+            self._aget_history_raw, object_id=object_id, data=params
+        )
+        return HistoryFrame.from_json(object_id, body, self.json_loads)
+
+    async def aaggregate_history(
+        self,
+        object_id,
+        bucket="1h",
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        read_size=64 * 1024,
+        settle="5m",
+    ):
+        """
+        Fetch history as fixed-size bucket statistics per measuring point.
+
+        Points are folded into min/max/mean/count/last per `bucket` (a period
+        string or milliseconds) as the response streams in, so the raw series
+        is never held in memory. Without explicit dates the range ends now and
+        spans `period`; its start is aligned down to a bucket boundary.
+        Returns HistoryBucket tuples ordered by measuring point and start.
+
+        With a bucket_cache, completed buckets are cached and only the range
+        after the last cached bucket is requested. Buckets ending within
+        `settle` of now are not cached, as points recorded late may still
+        arrive for them.
+        """
+        bucket_ms = parse_period(bucket)
+        now = int(time.time() * 1000)
+        end_date = end_date or now
+        start_date = start_date or end_date - parse_period(period)
+        start_date -= start_date % bucket_ms
+
+        results = []
+        fetch_from = start_date
+        if self.bucket_cache is not None:
+            while fetch_from < end_date:
+                cached = self.bucket_cache.get(object_id, bucket_ms, fetch_from)
+                if cached is None:
+                    break
+                results.extend(cached.values())
+                fetch_from += bucket_ms
+
+        if fetch_from < end_date:
+            aggregator = BucketAggregator(bucket_ms, fetch_from, end_date)
+            params = self._history_params(
+                fetch_from, end_date, period, include_events, False
+            )
+            chunks = self._aiter_history_chunks(
+                object_id, params, HistoryStreamParser(), read_size
+            )
+            async with contextlib.aclosing(chunks):
+                async for points in chunks:
+                    aggregator.add(points)
+            fetched = aggregator.buckets()
+            results.extend(fetched)
+            if self.bucket_cache is not None:
+                by_start = {}
+                for b in fetched:
+                    by_start.setdefault(b.start, {})[b.mp_id] = b
+                # Buckets still open or settling when fetched may gain
+                # points later
+                complete = min(end_date, now - parse_period(settle))
+                for start in range(fetch_from, complete - bucket_ms + 1, bucket_ms):
+                    self.bucket_cache.set(
+                        object_id, bucket_ms, start, by_start.get(start, {})
+                    )
+
+        results.sort(key=lambda b: (str(b.mp_id), b.start))
+        return results
+
+    async def aget_history_many(
+        self,
+        object_ids,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        concurrency=8,
+        timeout=None,
+        decode=True,
+    ):
+        """
+        Fetch history for many monitored objects concurrently.
+
+        At most `concurrency` requests are in flight at once and each one is
+        bounded by `timeout` seconds. Yields a HistoryResult per object as
+        soon as its request completes; failures are reported on the result
+        instead of aborting the rest of the batch. With `decode` False the
+        results hold the UTF-8 body bytes instead of text, for parsers that
+        take bytes.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        await self.auth_manager.ensure_fresh()
+        fetch_history = self.agethistorydata if decode else self._ahistory_body
+
+        async def fetch(object_id):
+            try:
+                data = await asyncio.wait_for(
+                    fetch_history(
+                        object_id, start_date, end_date, period, include_events
+                    ),
+                    timeout,
+                )
+            except Exception as e:
+                logger.debug(f"History fetch failed for {object_id}: {e!r}")
+                return HistoryResult(object_id, None, e)
+            return HistoryResult(object_id, data, None)
+
+        pending = set()
+        object_ids = iter(object_ids)
+        try:
+            while True:
+                for object_id in object_ids:
+                    pending.add(asyncio.ensure_future(fetch(object_id)))
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def agethistorydata_chunked(
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        chunk_size=None,
+        concurrency=4,
+    ):
+        """
+        Fetch a long history range as concurrent sub-window requests.
+
+        Without explicit dates the range ends now and spans `period`. The
+        range is split into windows of `chunk_size` (a period string or
+        milliseconds, defaulting to the client's history_chunk_size) and the
+        parsed responses are stitched into one ordered, de-duplicated series.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        chunk_size = parse_period(chunk_size or self.history_chunk_size)
+        end_date = end_date or int(time.time() * 1000)
+        start_date = start_date or end_date - parse_period(period)
+        await self.auth_manager.ensure_fresh()
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(window):
+            params = self._history_params(
+                window[0], window[1], period, include_events, False
+            )
+            async with semaphore:
+                body = await self._abody(
+                    self._aget_history_raw, object_id=object_id, data=params
+                )
+            return self.json_loads(body)
+
+        windows = split_time_range(start_date, end_date, chunk_size)
+        responses = await asyncio.gather(*(fetch(w) for w in windows))
+        return merge_history(responses)
+
+    async def async_history_store(
+        self,
+        store,
+        object_ids,
+        initial_period="7d",
+        concurrency=8,
+        timeout=None,
+        overlap="5m",
+    ):
+        """
+        Bring a HistoryStore up to date for the given monitored objects.
+
+        Each object is fetched from where its last successful sync ended,
+        less `overlap` for points recorded late, to now, or over
+        `initial_period` if nothing is stored for it yet, and its new points
+        are written in one transaction. Returns a HistoryResult per object
+        whose data is the number of new points.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        await self.auth_manager.ensure_fresh()
+        end_date = int(time.time() * 1000)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        loop = asyncio.get_running_loop()
+
+        def resume_from(object_id):
+            synced_until = store.synced_until(object_id)
+            if synced_until is not None:
+                return synced_until - parse_period(overlap)
+            watermark = store.watermark(object_id)
+            if watermark is not None:
+                # Stored before sync ranges were kept
+                return watermark + 1
+            return end_date - parse_period(initial_period)
+
+        async def sync(object_id):
+            # The store's sqlite calls run in a thread, so writing one object
+            # does not stall the fetches of the others
+            start_date = await loop.run_in_executor(None, resume_from, object_id)
+            try:
+                async with semaphore:
+                    frame = await asyncio.wait_for(
+                        self.agethistory_frame(
+                            object_id,
+                            start_date=start_date,
+                            end_date=end_date,
+                            period=initial_period,
+                            adjust_to_most_recent=False,
+                        ),
+                        timeout,
+                    )
+            except Exception as e:
+                logger.debug(f"History sync failed for {object_id}: {e!r}")
+                return HistoryResult(object_id, None, e)
+            added = await loop.run_in_executor(
+                None, store.add, object_id, frame.points(), frame.mp_names, end_date
+            )
+            return HistoryResult(object_id, added, None)
+
+        return await asyncio.gather(*(sync(object_id) for object_id in object_ids))
+
+    async def _acollect(self, agen):
+        return [item async for item in agen]
+
+    # The parsed getters below are coalesced too: concurrent callers share
+    # one result, so they must not modify it
 
     async def aget_uoms(self):
         """Fetch and parse Units of Measure into a dictionary."""
-        uom_json = await self.auom()
-        return json.loads(uom_json)
+        return await self._acoalesced("uoms", self._aparse_uoms)
+
+    async def _aparse_uoms(self):
+        return self.json_loads(await self._acached_body("uom", self.auom_raw))
 
     async def aget_uom_converter(self):
         """Fetch UOMs and return a UomConverter instance."""
-        uom_data = await self.aget_uoms()
-        return UomConverter(uom_data)
+        return await self._acoalesced("uom_converter", self._auom_converter)
+
+    async def _auom_converter(self):
+        return UomConverter(await self.aget_uoms())
+
+    async def aget_uom_index(self):
+        """Fetch UOMs as a dictionary mapping UOM ids to Uom models."""
+        return await self._acoalesced("uom_index", self._auom_index)
+
+    async def _auom_index(self):
+        return Uom.index(await self.aget_uoms())
+
+    async def aget_current_status(self):
+        """Fetch currentstatus as an ObjectIndex of MonitoredObject models."""
+        return await self._acoalesced(
+            "current_status", self._aobject_index, self.acurrentstatus_raw
+        )
+
+    async def aget_monitored_objects(self):
+        """Fetch all monitored objects as an ObjectIndex."""
+        return await self._acoalesced(
+            "monitored_objects", self._aobject_index, self.agetallmonitoredobjects_raw
+        )
+
+    async def _aobject_index(self, raw):
+        return ObjectIndex(await self._aparse(raw))
+
+    async def aget_status_snapshot(self):
+        """
+        currentstatus as a Snapshot (an Arrow table of the objects and their
+        measuring points). With a snapshot_cache, processes share one
+        snapshot per host and only one of them fetches it when it expires.
+        """
+        return await self._acoalesced(
+            "status_snapshot",
+            self._asnapshot,
+            "currentstatus",
+            self.acurrentstatus_raw,
+        )
+
+    async def aget_objects_snapshot(self):
+        """The getall monitored objects payload as a Snapshot."""
+        return await self._acoalesced(
+            "objects_snapshot",
+            self._asnapshot,
+            "monitoredobjects",
+            self.agetallmonitoredobjects_raw,
+        )
+
+    async def _asnapshot(self, name, raw):
+        async def fetch():
+            return await self._aparse(raw)
+
+        if self.snapshot_cache is None:
+            return Snapshot(name, snapshot_table(await fetch()), time.time())
+        return await self.snapshot_cache.aget(name, self._cache_scope, fetch)
+
+    async def aresolve_scope(self, department=None, location=None, watchlist=False):
+        """
+        MOIDs of the monitored objects in `department` and/or `location`
+        (each an id or a name) and, with `watchlist`, on the user's
+        watchlist; given criteria must all hold. Each mapping is resolved
+        from getall and the reference endpoints once, then reused for
+        `scope_ttl` seconds (or until invalidate_cache()).
+        """
+        criteria = []
+        if department is not None:
+            criteria.append(("department", str(department).lower()))
+        if location is not None:
+            criteria.append(("location", str(location).lower()))
+        if watchlist:
+            criteria.append(("watchlist", None))
+        if not criteria:
+            raise ValueError("Give a department, location or watchlist scope")
+        scopes = [
+            await self._scopes.do(criterion, self._aresolve_criterion, *criterion)
+            for criterion in criteria
+        ]
+        return frozenset.intersection(*scopes)
+
+    async def _aresolve_criterion(self, kind, value):
+        # getall and the reference payloads are kept with the mappings, so
+        # further scopes resolve without fetching them again
+        objects = await self._scopes.do("objects", self.aget_monitored_objects)
+        if kind == "watchlist":
+            payload = await self._aparse(self.awatchlist_raw)
+            return frozenset(known_ids(payload, objects.objects))
+        if kind == "department":
+            keys, raw = DEPARTMENT_KEYS, self.adepartment_raw
+        else:
+            keys, raw = LOCATION_KEYS, self.alocation_raw
+        reference = await self._scopes.do(kind, self._aparse_cached, kind, raw)
+        return scope_members(objects, keys, reference, value)
+
+    async def _aparse_cached(self, endpoint, raw):
+        return self.json_loads(await self._acached_body(endpoint, raw))
+
+    async def aget_scoped_status(self, department=None, location=None, watchlist=False):
+        """
+        currentstatus of only the objects in a scope (see aresolve_scope),
+        as an ObjectIndex. The payload is decoded once with the fast JSON
+        backend and only the objects in the scope are turned into models.
+        """
+        moids = await self.aresolve_scope(department, location, watchlist)
+        return await self._ascoped_index(self.acurrentstatus_raw, moids)
+
+    async def aget_scoped_objects(
+        self, department=None, location=None, watchlist=False
+    ):
+        """Like aget_scoped_status, for the getall monitored objects payload."""
+        moids = await self.aresolve_scope(department, location, watchlist)
+        return await self._ascoped_index(self.agetallmonitoredobjects_raw, moids)
+
+    async def _ascoped_index(self, raw, moids):
+        if not moids:
+            return ObjectIndex({})
+        payload = await self._aparse(raw)
+        return ObjectIndex({moid: payload[moid] for moid in moids if moid in payload})
 
     # --- Public Sync API methods (Wrappers) ---
 
@@ -364,6 +1197,12 @@ class VersaTrak(Consumer):
     def getallmonitoredobjects(self):
         return self._run_sync(self.agetallmonitoredobjects())
 
+    def poll_currentstatus(self):
+        return self._run_sync(self.apoll_currentstatus())
+
+    def poll_monitoredobjects(self):
+        return self._run_sync(self.apoll_monitoredobjects())
+
     def department(self):
         return self._run_sync(self.adepartment())
 
@@ -389,11 +1228,130 @@ class VersaTrak(Consumer):
         return self._run_sync(self.asysinfo())
 
     def gethistorydata(
-        self, object_id, start_date=0, end_date=0, period="1d", include_events=False
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        adjust_to_most_recent=True,
     ):
         return self._run_sync(
             self.agethistorydata(
-                object_id, start_date, end_date, period, include_events
+                object_id,
+                start_date,
+                end_date,
+                period,
+                include_events,
+                adjust_to_most_recent,
+            )
+        )
+
+    def gethistorydata_chunked(
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        chunk_size=None,
+        concurrency=4,
+    ):
+        """Fetch a long history range as concurrent sub-window requests."""
+        return self._run_sync(
+            self.agethistorydata_chunked(
+                object_id,
+                start_date,
+                end_date,
+                period,
+                include_events,
+                chunk_size,
+                concurrency,
+            )
+        )
+
+    def gethistory_frame(
+        self,
+        object_id,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        adjust_to_most_recent=True,
+    ):
+        """Fetch history into a columnar HistoryFrame."""
+        return self._run_sync(
+            self.agethistory_frame(
+                object_id,
+                start_date,
+                end_date,
+                period,
+                include_events,
+                adjust_to_most_recent,
+            )
+        )
+
+    def aggregate_history(
+        self,
+        object_id,
+        bucket="1h",
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        settle="5m",
+    ):
+        return self._run_sync(
+            self.aaggregate_history(
+                object_id,
+                bucket,
+                start_date,
+                end_date,
+                period,
+                include_events,
+                settle=settle,
+            )
+        )
+
+    def get_history_many(
+        self,
+        object_ids,
+        start_date=0,
+        end_date=0,
+        period="1d",
+        include_events=False,
+        concurrency=8,
+        timeout=None,
+        decode=True,
+    ):
+        """Fetch history for many monitored objects, returned in completion order."""
+        return self._run_sync(
+            self._acollect(
+                self.aget_history_many(
+                    object_ids,
+                    start_date,
+                    end_date,
+                    period,
+                    include_events,
+                    concurrency,
+                    timeout,
+                    decode,
+                )
+            )
+        )
+
+    def sync_history_store(
+        self,
+        store,
+        object_ids,
+        initial_period="7d",
+        concurrency=8,
+        timeout=None,
+        overlap="5m",
+    ):
+        return self._run_sync(
+            self.async_history_store(
+                store, object_ids, initial_period, concurrency, timeout, overlap
             )
         )
 
@@ -405,6 +1363,45 @@ class VersaTrak(Consumer):
         """Fetch UOMs and return a UomConverter instance."""
         return self._run_sync(self.aget_uom_converter())
 
+    def get_uom_index(self):
+        """Fetch UOMs as a dictionary mapping UOM ids to Uom models."""
+        return self._run_sync(self.aget_uom_index())
+
+    def get_current_status(self):
+        """Fetch currentstatus as an ObjectIndex of MonitoredObject models."""
+        return self._run_sync(self.aget_current_status())
+
+    def get_monitored_objects(self):
+        """Fetch all monitored objects as an ObjectIndex."""
+        return self._run_sync(self.aget_monitored_objects())
+
+    def get_status_snapshot(self):
+        """currentstatus as a Snapshot; see aget_status_snapshot."""
+        return self._run_sync(self.aget_status_snapshot())
+
+    def get_objects_snapshot(self):
+        """The getall monitored objects payload as a Snapshot."""
+        return self._run_sync(self.aget_objects_snapshot())
+
+    def resolve_scope(self, department=None, location=None, watchlist=False):
+        """MOIDs of the objects in a department/location/watchlist scope."""
+        return self._run_sync(self.aresolve_scope(department, location, watchlist))
+
+    def get_scoped_status(self, department=None, location=None, watchlist=False):
+        """currentstatus of the objects in a scope, as an ObjectIndex."""
+        return self._run_sync(self.aget_scoped_status(department, location, watchlist))
+
+    def get_scoped_objects(self, department=None, location=None, watchlist=False):
+        """Monitored objects in a scope, as an ObjectIndex."""
+        return self._run_sync(self.aget_scoped_objects(department, location, watchlist))
+
+
+def _utf8(body, encoding):
+    # JSON decoders and the text getters take UTF-8 bytes
+    if codecs.lookup(encoding).name == "utf-8":
+        return body
+    return body.decode(encoding).encode()
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
@@ -0,0 +1,94 @@
+import base64
+import json
+import logging
+import time
+
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def jwt_expiry(token):
+    """Return the `exp` claim of a JWT as a Unix timestamp, or None."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return None
+
+
+class AuthManager:
+    """
+    Keeps a VersaTrak client's session authenticated under concurrency.
+
+    Tokens are refreshed `refresh_margin` seconds before their JWT `exp`,
+    and concurrent logins/refreshes, e.g. from many tasks hitting a 401 at
+    once, are coalesced into a single call to the logon endpoint.
+    `on_event` is called with "login", "refresh" or "refresh_failed".
+    """
+
+    def __init__(self, client, refresh_margin=60, clock=time.time, on_event=None):
+        self.client = client
+        self.on_event = on_event
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._flight = SingleFlight()
+        self._token = None
+        self._expiry = None
+
+    @property
+    def can_login(self):
+        return bool(self.client.username and self.client.password)
+
+    @property
+    def expiry(self):
+        """Expiry of the current token, or None if unknown."""
+        if self.client.token != self._token:
+            self._token = self.client.token
+            self._expiry = jwt_expiry(self._token)
+        return self._expiry
+
+    async def ensure_fresh(self):
+        """Log in, or refresh a token close to expiry, before a request."""
+        if not self.client.is_logged_on:
+            if self.can_login:
+                await self._flight.do("login", self._alogin)
+            return
+        expiry = self.expiry
+        if expiry is not None and expiry - self.refresh_margin <= self._clock():
+            await self.reauthenticate(self.client.token)
+
+    async def reauthenticate(self, stale_token):
+        """
+        Replace `stale_token`, unless a concurrent caller already did.
+        Returns True if the client holds a different token afterwards.
+        """
+        if self.client.token != stale_token:
+            return True
+        await self._flight.do("reauthenticate", self._areauthenticate)
+        return self.client.token != stale_token
+
+    async def _alogin(self):
+        logger.debug("Logging on")
+        await self.client.alogin()
+        self._notify("login")
+
+    async def _areauthenticate(self):
+        if self.client.refresh_token:
+            try:
+                logger.debug("Refreshing auth token")
+                if await self.client.arefresh_auth_token():
+                    self._notify("refresh")
+                    return
+            except Exception as e:
+                logger.debug(f"Token refresh failed, logging on again: {e!r}")
+            self._notify("refresh_failed")
+        if self.can_login:
+            await self._alogin()
+
+    def _notify(self, event):
+        if self.on_event is not None:
+            self.on_event(event)
@@ -0,0 +1,148 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class MetadataCache:
+    """
+    Cache for reference endpoints (uom, policy, location, ...) that rarely
+    change.
+
+    Entries live in an in-memory LRU of `maxsize` items and, when `path` is
+    given, in a sqlite database so short-lived processes can share them.
+    Entries expire after `ttl` seconds, overridable per endpoint through
+    `ttls` (e.g. {"uom": 7 * 86400}). `scope` separates entries of different
+    servers/instances sharing one database.
+
+    VersaTrak stores the UTF-8 response bodies (bytes), so the parsed
+    getters decode them without building a str. Any object with the same
+    get/set/invalidate methods can be passed to VersaTrak(cache=...) instead.
+    """
+
+    def __init__(self, maxsize=128, ttl=3600, ttls=None, path=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS metadata ("
+                    "endpoint TEXT, scope TEXT, value TEXT, expires REAL, "
+                    "PRIMARY KEY (endpoint, scope))"
+                )
+
+    def get(self, endpoint, scope=""):
+        """Return the cached value, or None if it is missing or expired."""
+        key = (endpoint, scope)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires FROM metadata WHERE endpoint = ? AND scope = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    entry = row
+                    self._remember(key, entry)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= now:
+                self._forget(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, endpoint, scope, value):
+        key = (endpoint, scope)
+        entry = (value, self._clock() + self.ttls.get(endpoint, self.ttl))
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)",
+                        (*key, *entry),
+                    )
+
+    def invalidate(self, endpoint=None, scope=None):
+        """Drop entries matching endpoint and/or scope (all entries by default)."""
+        with self._lock:
+            for key in list(self._entries):
+                if endpoint in (None, key[0]) and scope in (None, key[1]):
+                    del self._entries[key]
+            if self._db is not None:
+                with self._db:
+                    self._db.execute(
+                        "DELETE FROM metadata WHERE (? IS NULL OR endpoint = ?) "
+                        "AND (? IS NULL OR scope = ?)",
+                        (endpoint, endpoint, scope, scope),
+                    )
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            with self._db:
+                self._db.execute(
+                    "DELETE FROM metadata WHERE endpoint = ? AND scope = ?", key
+                )
+
+
+class BucketCache:
+    """
+    In-memory LRU of completed history aggregate buckets, keyed by
+    (moid, bucket size, bucket start) and holding the HistoryBucket of each
+    measuring point. An entry with no measuring points records that the
+    bucket was fetched and empty. Only buckets that ended before they were
+    fetched should be stored, since later data cannot change them.
+    """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, moid, bucket_ms, start):
+        """Return {mp_id: HistoryBucket} for the bucket, or None if not cached."""
+        key = (moid, bucket_ms, start)
+        with self._lock:
+            buckets = self._entries.get(key)
+            if buckets is not None:
+                self._entries.move_to_end(key)
+            return buckets
+
+    def set(self, moid, bucket_ms, start, buckets):
+        key = (moid, bucket_ms, start)
+        with self._lock:
+            self._entries[key] = dict(buckets)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, moid=None):
+        with self._lock:
+            for key in list(self._entries):
+                if moid in (None, key[0]):
+                    del self._entries[key]
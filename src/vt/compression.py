@@ -0,0 +1,128 @@
+import zlib
+
+from aiohttp import ClientPayloadError
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        import brotlicffi as brotli
+
+    def new():
+        decompressor = brotli.Decompressor()
+        return decompressor.process, decompressor.is_finished
+
+    return new
+
+
+def _zstd():
+    try:
+        from compression import zstd  # Python 3.14+
+    except ImportError:
+        import zstandard
+
+        def new():
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            return decompressor.decompress, lambda: decompressor.eof
+
+        return new
+
+    def new():
+        decompressor = zstd.ZstdDecompressor()
+        return decompressor.decompress, lambda: decompressor.eof
+
+    return new
+
+
+def _available():
+    # Optional codecs whose libraries are installed, best ratio first; each
+    # factory returns a new (decompress, finished) pair
+    codecs = {}
+    for name, factory in (("zstd", _zstd), ("br", _brotli)):
+        try:
+            codecs[name] = factory()
+        except ImportError:
+            pass
+    return codecs
+
+
+_OPTIONAL = _available()
+
+# Content codings the client can decode, in order of preference
+ENCODINGS = (*_OPTIONAL, "gzip", "deflate")
+
+
+def accept_encoding(encodings=None):
+    """Accept-Encoding header value for `encodings` (default: all supported)."""
+    return ", ".join(ENCODINGS if encodings is None else encodings)
+
+
+class Decoder:
+    """
+    Incremental decoder of a response body sent with a Content-Encoding.
+
+    decompress() takes the body as it arrives from the wire and returns the
+    decoded bytes available so far; flush() returns the rest once the body
+    is complete. Errors are raised as aiohttp.ClientPayloadError, like
+    aiohttp's own decompression.
+    """
+
+    __slots__ = ("_decompress", "_encoding", "_finished", "_inflated", "_zlib")
+
+    def __init__(self, encoding):
+        self._encoding = encoding
+        self._inflated = False
+        self._zlib = None
+        self._finished = None
+        if encoding in ("gzip", "x-gzip", "deflate"):
+            self._zlib = self._zlib_object()
+            self._decompress = self._inflate
+        elif encoding in _OPTIONAL:
+            self._decompress, self._finished = _OPTIONAL[encoding]()
+        else:
+            raise ClientPayloadError(f"Unsupported Content-Encoding {encoding!r}")
+
+    @classmethod
+    def for_response(cls, res):
+        """A Decoder for the response's Content-Encoding, or None if it has none."""
+        encoding = res.headers.get("Content-Encoding", "").strip().lower()
+        if encoding in ("", "identity"):
+            return None
+        return cls(encoding)
+
+    def _zlib_object(self, raw=False):
+        if self._encoding != "deflate":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return zlib.decompressobj(-zlib.MAX_WBITS if raw else zlib.MAX_WBITS)
+
+    def _inflate(self, data):
+        try:
+            out = self._zlib.decompress(data)
+        except zlib.error:
+            if self._encoding != "deflate" or self._inflated:
+                raise
+            # Some servers send raw deflate without the zlib wrapper
+            self._zlib = self._zlib_object(raw=True)
+            out = self._zlib.decompress(data)
+        self._inflated = True
+        # A gzip body may be several concatenated members
+        while self._encoding != "deflate" and self._zlib.eof and self._zlib.unused_data:
+            rest = self._zlib.unused_data
+            self._zlib = self._zlib_object()
+            out += self._zlib.decompress(rest)
+        return out
+
+    def decompress(self, data):
+        try:
+            return self._decompress(data)
+        except Exception as e:
+            raise ClientPayloadError(
+                f"Cannot decode {self._encoding} response body: {e}"
+            ) from e
+
+    def flush(self):
+        finished = self._finished() if self._zlib is None else self._zlib.eof
+        if not finished:
+            raise ClientPayloadError(f"Truncated {self._encoding} response body")
+        return b"" if self._zlib is None else self._zlib.flush()
@@ -0,0 +1,191 @@
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from .utils import optional_import
+
+_DAY_MS = 86_400_000
+PARTITION_KEYS = ("date", "sensor_id")
+
+
+def dataset_schema():
+    """Arrow schema of the files written by HistoryDatasetWriter."""
+    pa = optional_import("pyarrow")
+
+    name = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("sensor_id", name),
+            ("sensor_name", name),
+            ("mp_id", name),
+            ("mp_name", name),
+            ("timestamp", pa.timestamp("ms")),
+            ("value", pa.float32()),
+        ]
+    )
+
+
+class HistoryDatasetWriter:
+    """
+    Write HistoryFrames to a Hive-partitioned Parquet dataset.
+
+    Rows are split by `partition_by`, any of "date" (UTC day of the
+    timestamp) and "sensor_id" (the moid), into directories such as
+    root/date=2024-05-01/sensor_id=<moid>/, so query engines can prune
+    partitions. Each partition is written through its own streaming
+    ParquetWriter in row groups of `row_group_size` rows; at most
+    `max_open_files` are open at once, the least recently used being
+    closed (and a new part file started on its next write).
+
+    Names are dictionary-encoded, values stored as float32 and timestamps
+    as int64 milliseconds. Partition columns are encoded in the path and
+    not repeated in the files.
+
+    Files are written under hidden names that dataset readers skip and only
+    take their final names in close(), so an interrupted export leaves no
+    half-written files behind (see remove_incomplete). The writer can be
+    used again after close(); further rows go to new part files.
+    """
+
+    def __init__(
+        self,
+        root,
+        partition_by=("date",),
+        row_group_size=128 * 1024,
+        compression="zstd",
+        max_open_files=64,
+        basename=None,
+    ):
+        for key in partition_by:
+            if key not in PARTITION_KEYS:
+                raise ValueError(f"Cannot partition by {key!r}")
+        self.root = root
+        self.partition_by = tuple(partition_by)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.max_open_files = max_open_files
+        self.files = []
+        self._schema = dataset_schema()
+        if "sensor_id" in self.partition_by:
+            self._schema = self._schema.remove(
+                self._schema.get_field_index("sensor_id")
+            )
+        # Files are named part-<basename>-<n>.parquet; a fixed basename makes
+        # rewriting the same export replace its files instead of adding more
+        self._basename = basename or uuid.uuid4().hex
+        self._writers = OrderedDict()
+        self._parts = {}
+        self._buffers = {}
+        # Final paths of the files written since the last close()
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, frame):
+        """Append a HistoryFrame's rows to their partitions."""
+        np = optional_import("numpy")
+
+        if not len(frame):
+            return
+        table = frame.to_arrow()
+        table = table.cast(dataset_schema())
+        if "date" in self.partition_by:
+            days = table.column("timestamp").cast("int64").to_numpy() // _DAY_MS
+            order = np.argsort(days, kind="stable")
+            days = days[order]
+            table = table.take(order)
+            bounds = np.flatnonzero(np.diff(days)) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(days)]))
+            groups = [
+                (int(days[start]), table.slice(start, end - start))
+                for start, end in zip(starts, ends)
+            ]
+        else:
+            groups = [(None, table)]
+        for day, rows in groups:
+            values = {"date": day, "sensor_id": frame.object_id}
+            partition = tuple((key, values[key]) for key in self.partition_by)
+            self._append(partition, rows.select(self._schema.names))
+
+    def flush(self):
+        """
+        Write the buffered rows to their in-progress files, so `files` lists
+        every file the next close() publishes.
+        """
+        for partition in list(self._buffers):
+            self._flush(partition)
+
+    def close(self):
+        """Flush buffered rows, close every open file and publish the files."""
+        self.flush()
+        while self._writers:
+            _, writer = self._writers.popitem(last=False)
+            writer.close()
+        for path in self._pending:
+            os.replace(_in_progress(path), path)
+        self._pending.clear()
+
+    def _append(self, partition, table):
+        buffer = self._buffers.setdefault(partition, [])
+        buffer.append(table)
+        if sum(t.num_rows for t in buffer) >= self.row_group_size:
+            self._flush(partition)
+
+    def _flush(self, partition):
+        pa = optional_import("pyarrow")
+
+        buffer = self._buffers.pop(partition, None)
+        if not buffer:
+            return
+        table = pa.concat_tables(buffer).unify_dictionaries()
+        self._writer(partition).write_table(table, row_group_size=self.row_group_size)
+
+    def _writer(self, partition):
+        pq = optional_import("pyarrow.parquet")
+
+        writer = self._writers.get(partition)
+        if writer is not None:
+            self._writers.move_to_end(partition)
+            return writer
+        while len(self._writers) >= self.max_open_files:
+            _, oldest = self._writers.popitem(last=False)
+            oldest.close()
+        directory = os.path.join(
+            self.root, *(f"{key}={_partition_value(key, v)}" for key, v in partition)
+        )
+        os.makedirs(directory, exist_ok=True)
+        part = self._parts[partition] = self._parts.get(partition, -1) + 1
+        path = os.path.join(directory, f"part-{self._basename}-{part}.parquet")
+        self.files.append(path)
+        self._pending.append(path)
+        writer = self._writers[partition] = pq.ParquetWriter(
+            _in_progress(path), self._schema, compression=self.compression
+        )
+        return writer
+
+
+def _in_progress(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.tmp")
+
+
+def remove_incomplete(root):
+    """Delete the in-progress files an interrupted HistoryDatasetWriter left in root."""
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.startswith(".part-") and name.endswith(".parquet.tmp"):
+                os.remove(os.path.join(directory, name))
+
+
+def _partition_value(key, value):
+    if key == "date":
+        day = datetime.fromtimestamp(value * _DAY_MS / 1000, tz=timezone.utc)
+        return day.strftime("%Y-%m-%d")
+    return quote(str(value), safe="")
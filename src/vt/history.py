@@ -0,0 +1,404 @@
+import logging
+from array import array
+from collections import namedtuple
+
+from . import jsonlib
+from .stream import JsonStreamParser
+from .utils import optional_import
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class HistoryResult(namedtuple("HistoryResult", "object_id data error")):
+    """
+    Outcome of fetching history for a single monitored object.
+
+    Exactly one of `data` (the raw gethistorydata response text, or its
+    bytes) and `error` (the exception raised while fetching it) is set.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+_PERIOD_UNITS_MS = {
+    "s": 1000,
+    "m": 60 * 1000,
+    "h": 60 * 60 * 1000,
+    "d": 24 * 60 * 60 * 1000,
+    "w": 7 * 24 * 60 * 60 * 1000,
+}
+
+
+def parse_period(period):
+    """
+    Convert a VersaTrak period string (e.g. "24h", "7d") to milliseconds.
+    Integers are taken to already be milliseconds.
+    """
+    if isinstance(period, int):
+        return period
+    period = str(period).strip().lower()
+    try:
+        count, unit = int(period[:-1]), _PERIOD_UNITS_MS[period[-1:]]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid period: {period!r}") from None
+    return count * unit
+
+
+def split_time_range(start, end, chunk_size):
+    """
+    Split the millisecond range [start, end] into consecutive windows of at
+    most `chunk_size` milliseconds. Adjacent windows share their boundary
+    timestamp; merge_history drops the resulting duplicate points.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    windows = []
+    while start < end:
+        stop = min(start + chunk_size, end)
+        windows.append((start, stop))
+        start = stop
+    return windows
+
+
+def merge_history(responses):
+    """
+    Stitch parsed gethistorydata responses for one monitored object into a
+    single response. Points of each measuring point are ordered by timestamp
+    and de-duplicated, keeping the value from the latest response; points
+    without a timestamp are dropped.
+    """
+    merged = None
+    mps = {}
+    for response in responses:
+        if merged is None:
+            merged = {k: v for k, v in response.items() if k != "mps"}
+        for mp in response.get("mps", []):
+            entry = mps.get(mp.get("mpid"))
+            if entry is None:
+                entry = mps[mp.get("mpid")] = (
+                    {k: v for k, v in mp.items() if k != "data"},
+                    {},
+                )
+            points = entry[1]
+            for point in mp.get("data", []):
+                ts = point.get("d")
+                if ts is not None:
+                    points[ts] = point
+
+    if merged is None:
+        return {"mps": []}
+    merged["mps"] = []
+    for meta, points in mps.values():
+        meta["data"] = [points[ts] for ts in sorted(points)]
+        merged["mps"].append(meta)
+    return merged
+
+
+def _point_fields(point):
+    if isinstance(point, dict):
+        return point.get("d"), point.get("v")
+    if isinstance(point, list) and len(point) >= 2:
+        return point[0], point[1]
+    return None, None
+
+
+class HistoryStreamParser:
+    """
+    Incrementally extract (mp_id, ts, value) points from a gethistorydata
+    response body fed to it in chunks. Points missing a timestamp or value
+    are skipped, matching how history responses are consumed elsewhere.
+    """
+
+    def __init__(self):
+        self._parser = JsonStreamParser(("mps", "*", "data", "*"))
+        # Points whose measuring point id has not been seen yet, for
+        # responses that serialize "data" ahead of "mpid"
+        self._pending = []
+        self._pending_scope = None
+        self._scopes = []
+
+    @property
+    def document(self):
+        """Scalar top-level members (e.g. moid, name) parsed so far."""
+        return self._parser.root_scope
+
+    @property
+    def measuring_points(self):
+        """Scalar members (e.g. mpid, name) of each measuring point seen so far."""
+        return {scope.get("mpid"): scope for scope in self._scopes}
+
+    def feed(self, data):
+        return self._points(self._parser.feed(data))
+
+    def close(self):
+        points = self._points(self._parser.close())
+        self._flush(points)
+        return points
+
+    def _flush(self, points):
+        mp_id = self._pending_scope.get("mpid") if self._pending else None
+        points.extend((mp_id, ts, value) for ts, value in self._pending)
+        self._pending = []
+        self._pending_scope = None
+
+    def _points(self, events):
+        points = []
+        for _, scope, point in events:
+            if not self._scopes or scope is not self._scopes[-1]:
+                self._scopes.append(scope)
+            if self._pending and scope is not self._pending_scope:
+                self._flush(points)
+            ts, value = _point_fields(point)
+            if ts is None or value is None:
+                continue
+            if "mpid" in scope:
+                points.append((scope["mpid"], ts, value))
+            else:
+                self._pending_scope = scope
+                self._pending.append((ts, value))
+        return points
+
+
+class HistoryBucket(namedtuple("HistoryBucket", "mp_id start min max mean count last")):
+    """
+    Statistics of one measuring point over the bucket starting at `start`
+    (milliseconds); `last` is the value of the latest point in the bucket.
+    """
+
+    __slots__ = ()
+
+
+class BucketAggregator:
+    """
+    Fold (mp_id, ts, value) points into fixed-size buckets aligned to
+    multiples of `bucket_ms`, keeping only running statistics per bucket.
+    Points outside [start, end) and non-numeric values are ignored.
+    """
+
+    def __init__(self, bucket_ms, start=None, end=None):
+        if bucket_ms <= 0:
+            raise ValueError("bucket size must be positive")
+        self.bucket_ms = bucket_ms
+        self.start = start
+        self.end = end
+        # (mp_id, bucket start) -> [min, max, sum, count, last ts, last value]
+        self._stats = {}
+
+    def add(self, points):
+        stats = self._stats
+        bucket_ms, start, end = self.bucket_ms, self.start, self.end
+        for mp_id, ts, value in points:
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            if (start is not None and ts < start) or (end is not None and ts >= end):
+                continue
+            key = (mp_id, ts - ts % bucket_ms)
+            entry = stats.get(key)
+            if entry is None:
+                stats[key] = [value, value, value, 1, ts, value]
+                continue
+            if value < entry[0]:
+                entry[0] = value
+            if value > entry[1]:
+                entry[1] = value
+            entry[2] += value
+            entry[3] += 1
+            if ts >= entry[4]:
+                entry[4] = ts
+                entry[5] = value
+
+    def buckets(self):
+        """The buckets seen so far, ordered by measuring point and start."""
+        return [
+            HistoryBucket(mp_id, start, low, high, total / count, count, last)
+            for (mp_id, start), (low, high, total, count, _, last) in sorted(
+                self._stats.items(), key=lambda item: (str(item[0][0]), item[0][1])
+            )
+        ]
+
+
+class HistoryFrame:
+    """
+    Columnar history of one monitored object.
+
+    Points are decoded straight into contiguous int64 millisecond timestamp
+    and float64 value buffers per measuring point, exposed as NumPy arrays
+    without copying and handed to pandas or pyarrow with at most one copy.
+    """
+
+    def __init__(self, object_id, name=None):
+        self.object_id = object_id
+        self.name = name
+        self.mp_names = {}
+        self._columns = {}
+
+    def __len__(self):
+        return sum(len(ts) for ts, _ in self._columns.values())
+
+    @classmethod
+    def from_json(cls, object_id, body, loads=None):
+        """
+        Build a frame from a complete gethistorydata response body (bytes or
+        str), decoded in one pass with `loads` (default: the fastest
+        installed JSON backend). Use HistoryStreamParser for bodies that
+        should not be held in memory.
+        """
+        return cls.from_document(object_id, (loads or jsonlib.loads)(body))
+
+    @classmethod
+    def from_document(cls, object_id, document):
+        """Build a frame from a parsed gethistorydata response."""
+        frame = cls(object_id, document.get("name"))
+        columns = frame._columns
+        for mp in document.get("mps") or ():
+            mp_id = mp.get("mpid")
+            ts_column, value_column = columns.get(mp_id) or (array("q"), array("d"))
+            for point in mp.get("data") or ():
+                if type(point) is dict:
+                    ts, value = point.get("d"), point.get("v")
+                else:
+                    ts, value = _point_fields(point)
+                if (
+                    ts is None
+                    or not isinstance(value, (int, float))
+                    or isinstance(value, bool)
+                ):
+                    continue
+                ts_column.append(int(ts))
+                value_column.append(value)
+            if ts_column:
+                columns[mp_id] = (ts_column, value_column)
+                frame.mp_names[mp_id] = mp.get("name")
+        return frame
+
+    def update_names(self, parser):
+        """Take the object and measuring point names seen by a HistoryStreamParser."""
+        self.name = parser.document.get("name")
+        for mp_id, mp in parser.measuring_points.items():
+            self.mp_names[mp_id] = mp.get("name")
+
+    @property
+    def mp_ids(self):
+        return list(self._columns)
+
+    def extend(self, points):
+        """
+        Append (mp_id, ts, value) points. Non-numeric values (e.g. "OPEN"
+        states or nulls) are skipped, as in BucketAggregator.
+        """
+        columns = self._columns
+        last_mp_id = ts_column = value_column = None
+        for mp_id, ts, value in points:
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            if mp_id != last_mp_id:
+                if mp_id not in columns:
+                    columns[mp_id] = (array("q"), array("d"))
+                ts_column, value_column = columns[mp_id]
+                last_mp_id = mp_id
+            ts_column.append(int(ts))
+            value_column.append(value)
+
+    def points(self):
+        """Iterate over the frame as (mp_id, ts, value) tuples."""
+        for mp_id, (ts_column, value_column) in self._columns.items():
+            for ts, value in zip(ts_column, value_column):
+                yield mp_id, ts, value
+
+    def timestamps(self, mp_id):
+        """Millisecond timestamps of a measuring point as an int64 array."""
+        np = optional_import("numpy")
+
+        return np.frombuffer(self._columns[mp_id][0], dtype=np.int64)
+
+    def values(self, mp_id):
+        """Raw values of a measuring point as a float64 array."""
+        np = optional_import("numpy")
+
+        return np.frombuffer(self._columns[mp_id][1], dtype=np.float64)
+
+    def _concat(self):
+        np = optional_import("numpy")
+
+        mp_ids = self.mp_ids
+        timestamps = [self.timestamps(mp_id) for mp_id in mp_ids]
+        values = [self.values(mp_id) for mp_id in mp_ids]
+        codes = np.repeat(
+            np.arange(len(mp_ids), dtype=np.int32), [len(ts) for ts in timestamps]
+        )
+        if len(mp_ids) == 1:
+            return mp_ids, codes, timestamps[0], values[0]
+        return (
+            mp_ids,
+            codes,
+            np.concatenate(timestamps) if timestamps else np.empty(0, np.int64),
+            np.concatenate(values) if values else np.empty(0, np.float64),
+        )
+
+    def _name_codes(self, mp_ids, codes):
+        # mp_name categories must be unique; unnamed points map to -1 (null)
+        np = optional_import("numpy")
+
+        categories = []
+        mapping = []
+        for mp_id in mp_ids:
+            name = self.mp_names.get(mp_id)
+            if name is None:
+                mapping.append(-1)
+                continue
+            if name not in categories:
+                categories.append(name)
+            mapping.append(categories.index(name))
+        return categories, np.asarray(mapping, dtype=np.int32)[codes]
+
+    def to_arrow(self):
+        """
+        Return a pyarrow Table in the layout written by download_sensor_history:
+        sensor_id, sensor_name, mp_id, mp_name, timestamp, value.
+        """
+        pa = optional_import("pyarrow")
+
+        mp_ids, codes, timestamps, values = self._concat()
+        mp_names, name_codes = self._name_codes(mp_ids, codes)
+        count = len(codes)
+        # The string columns also hold ids and names the API sends as numbers
+        name = None if self.name is None else str(self.name)
+        return pa.table(
+            {
+                "sensor_id": pa.repeat(pa.scalar(str(self.object_id)), count),
+                "sensor_name": pa.repeat(pa.scalar(name, pa.string()), count),
+                "mp_id": pa.DictionaryArray.from_arrays(
+                    codes, pa.array([str(mp_id) for mp_id in mp_ids], pa.string())
+                ),
+                "mp_name": pa.DictionaryArray.from_arrays(
+                    pa.array(name_codes, mask=name_codes < 0),
+                    pa.array([str(name) for name in mp_names], pa.string()),
+                ),
+                "timestamp": pa.array(timestamps.view("datetime64[ms]")),
+                "value": pa.array(values),
+            }
+        )
+
+    def to_pandas(self):
+        """Return a pandas DataFrame with the same columns as to_arrow()."""
+        pd = optional_import("pandas")
+
+        mp_ids, codes, timestamps, values = self._concat()
+        mp_names, name_codes = self._name_codes(mp_ids, codes)
+        return pd.DataFrame(
+            {
+                "sensor_id": self.object_id,
+                "sensor_name": self.name,
+                "mp_id": pd.Categorical.from_codes(codes, categories=mp_ids),
+                "mp_name": pd.Categorical.from_codes(name_codes, categories=mp_names),
+                "timestamp": timestamps.view("datetime64[ms]"),
+                "value": values,
+            },
+            index=pd.RangeIndex(len(codes)),
+            copy=False,
+        )
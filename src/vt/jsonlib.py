@@ -0,0 +1,58 @@
+import json
+import os
+
+# Fastest first; "json" (the standard library) is always available
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+def _orjson():
+    import orjson
+
+    return orjson.loads, orjson.JSONDecodeError
+
+
+def _msgspec():
+    import msgspec
+
+    return msgspec.json.decode, msgspec.DecodeError
+
+
+_FACTORIES = {"orjson": _orjson, "msgspec": _msgspec}
+
+
+def get_loads(backend=None):
+    """
+    Return (name, loads) for a JSON backend, or for the fastest installed one
+    if `backend` is None. loads() accepts bytes or str, so response bodies
+    are decoded without first building a str.
+
+    Documents a fast backend rejects (e.g. NaN literals, integers beyond 64
+    bits) are retried with the standard library, so every backend accepts
+    what json.loads does.
+    """
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {backend!r}")
+    for name in BACKENDS if backend is None else (backend,):
+        if name == "json":
+            return name, json.loads
+        try:
+            fast, errors = _FACTORIES[name]()
+        except ImportError:
+            if backend is not None:
+                raise
+            continue
+        return name, _with_fallback(fast, errors)
+
+
+def _with_fallback(fast, errors):
+    def loads(data):
+        try:
+            return fast(data)
+        except errors:
+            return json.loads(data)
+
+    return loads
+
+
+# Process-wide default, overridable with VT_JSON_BACKEND
+backend, loads = get_loads(os.getenv("VT_JSON_BACKEND") or None)
@@ -0,0 +1,299 @@
+import contextvars
+import threading
+import time
+import weakref
+
+import aiohttp
+
+# Record of the request the current task is sending, for the trace callbacks
+_current = contextvars.ContextVar("vt_request_record", default=None)
+
+
+class RequestRecord:
+    """
+    Timings (seconds) and sizes of one request attempt.
+
+    `dns` and `connect` are None when a pooled connection was reused, `ttfb`
+    runs from sending the request to receiving the response headers,
+    `download` from the headers to the end of the body and `decode` covers
+    JSON decoding. `size` is the length of the decompressed body and
+    `wire_size` its length as transferred (compressed); for a streamed body
+    that failed (`error`) or that the consumer stopped reading (`aborted`)
+    they count the bytes received until then.
+    """
+
+    __slots__ = (
+        "_connect_started",
+        "_dns_started",
+        "_headers_received",
+        "_request_started",
+        "_started",
+        "aborted",
+        "attempt",
+        "connect",
+        "decode",
+        "dns",
+        "download",
+        "endpoint",
+        "error",
+        "method",
+        "size",
+        "status",
+        "total",
+        "ttfb",
+        "url",
+        "wire_size",
+    )
+
+    def __init__(self, endpoint, attempt):
+        self.endpoint = endpoint
+        self.attempt = attempt
+        self.method = self.url = self.status = self.error = None
+        self.dns = self.connect = self.ttfb = self.download = None
+        self.decode = None
+        self.total = None
+        self.aborted = False
+        self.size = self.wire_size = 0
+        self._started = time.perf_counter()
+        self._request_started = self._headers_received = None
+        self._dns_started = self._connect_started = None
+
+    def __repr__(self):
+        return (
+            f"RequestRecord({self.endpoint!r}, status={self.status}, "
+            f"total={self.total}, size={self.size})"
+        )
+
+
+class Instrumentation:
+    """
+    Hooks called by an instrumented VersaTrak client; subclass and override
+    the ones you need. They run on the client's event loop for every
+    request, so they should be cheap and must not raise.
+
+    The arguments are plain values and labels, so they map directly onto
+    Prometheus histograms/counters or OpenTelemetry instruments.
+    """
+
+    def on_request(self, record):
+        """A request attempt finished (body read) or failed; see RequestRecord."""
+
+    def on_retry(self, endpoint, attempt, delay, error):
+        """Attempt number `attempt` (0-based) failed with `error`; retrying after `delay` seconds."""
+
+    def on_auth(self, event):
+        """An authentication event: "login", "refresh" or "refresh_failed"."""
+
+
+class StatsCollector(Instrumentation):
+    """In-process Instrumentation aggregating per-endpoint request statistics."""
+
+    _PHASES = ("dns", "connect", "ttfb", "download", "decode", "total")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.auth = {}
+
+    def _stats(self, endpoint):
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = {
+                "requests": 0,
+                "errors": 0,
+                "aborted": 0,
+                "retries": 0,
+                "bytes": 0,
+                "wire_bytes": 0,
+                **{f"{phase}_sum": 0.0 for phase in self._PHASES},
+                **{f"{phase}_count": 0 for phase in self._PHASES},
+                **{f"{phase}_max": 0.0 for phase in self._PHASES},
+            }
+        return stats
+
+    def on_request(self, record):
+        with self._lock:
+            stats = self._stats(record.endpoint)
+            stats["requests"] += 1
+            stats["errors"] += record.error is not None
+            stats["aborted"] += record.aborted
+            stats["bytes"] += record.size
+            stats["wire_bytes"] += record.wire_size
+            for phase in self._PHASES:
+                value = getattr(record, phase)
+                if value is not None:
+                    stats[f"{phase}_sum"] += value
+                    stats[f"{phase}_count"] += 1
+                    stats[f"{phase}_max"] = max(stats[f"{phase}_max"], value)
+
+    def on_retry(self, endpoint, attempt, delay, error):
+        with self._lock:
+            self._stats(endpoint)["retries"] += 1
+
+    def on_auth(self, event):
+        with self._lock:
+            self.auth[event] = self.auth.get(event, 0) + 1
+
+    def summary(self):
+        """
+        {endpoint: {requests, errors, aborted, retries, bytes, wire_bytes,
+        <phase>_mean, <phase>_max}} plus an "auth" entry counting
+        authentication events. `aborted` counts streamed bodies the consumer
+        stopped reading early, `bytes` are decompressed body bytes and
+        `wire_bytes` the bytes transferred for them.
+        """
+        with self._lock:
+            summary = {}
+            for endpoint, stats in self._endpoints.items():
+                entry = {
+                    k: stats[k]
+                    for k in (
+                        "requests",
+                        "errors",
+                        "aborted",
+                        "retries",
+                        "bytes",
+                        "wire_bytes",
+                    )
+                }
+                for phase in self._PHASES:
+                    count = stats[f"{phase}_count"]
+                    entry[f"{phase}_mean"] = (
+                        stats[f"{phase}_sum"] / count if count else None
+                    )
+                    entry[f"{phase}_max"] = stats[f"{phase}_max"] if count else None
+                summary[endpoint] = entry
+            summary["auth"] = dict(self.auth)
+            return summary
+
+    def format_summary(self):
+        """The summary as a text table, timings in milliseconds."""
+        summary = self.summary()
+        auth = summary.pop("auth")
+        header = f"{'endpoint':<28}{'reqs':>6}{'errs':>6}{'abrt':>6}{'retry':>6}"
+        header += f"{'MB':>9}{'wire MB':>9}"
+        header += "".join(f"{phase:>10}" for phase in self._PHASES)
+        lines = [header]
+        for endpoint, entry in sorted(summary.items()):
+            line = (
+                f"{endpoint:<28}{entry['requests']:>6}{entry['errors']:>6}"
+                f"{entry['aborted']:>6}{entry['retries']:>6}{entry['bytes'] / 1e6:>9.2f}"
+                f"{entry['wire_bytes'] / 1e6:>9.2f}"
+            )
+            for phase in self._PHASES:
+                mean = entry[f"{phase}_mean"]
+                line += f"{'-':>10}" if mean is None else f"{mean * 1000:>10.1f}"
+            lines.append(line)
+        if auth:
+            lines.append(
+                "auth: " + ", ".join(f"{k}={v}" for k, v in sorted(auth.items()))
+            )
+        return "\n".join(lines)
+
+
+class Recorder:
+    """
+    Connects a client's requests to its Instrumentation: fills a
+    RequestRecord per attempt from aiohttp trace callbacks and the body
+    reads, and reports it once the body has been read or the request failed.
+    """
+
+    def __init__(self, hooks):
+        self.hooks = hooks
+        # Records of responses whose body has not been read yet
+        self._pending = weakref.WeakKeyDictionary()
+
+    def begin(self, endpoint, attempt):
+        record = RequestRecord(endpoint, attempt)
+        return record, _current.set(record)
+
+    def end(self, record, token, res=None, error=None):
+        _current.reset(token)
+        if error is not None:
+            record.error = error
+            record.status = getattr(error, "status", None)
+            self._report(record)
+            return
+        record.status = res.status
+        self._pending[res] = record
+
+    def finish(self, res, size, decode=None, wire_size=None, error=None, aborted=False):
+        """
+        The body of `res` (`size` bytes decompressed, `wire_size` as
+        received) has been read and decoded, or reading it failed with
+        `error` or was `aborted` by the consumer.
+        """
+        record = self._pending.pop(res, None)
+        if record is None:
+            return
+        record.size = size
+        record.wire_size = size if wire_size is None else wire_size
+        record.decode = decode
+        record.error = error
+        record.aborted = aborted
+        if record._headers_received is not None:
+            now = time.perf_counter()
+            record.download = now - record._headers_received - (decode or 0.0)
+        self._report(record)
+
+    def _report(self, record):
+        record.total = time.perf_counter() - record._started
+        self.hooks.on_request(record)
+
+    def trace_config(self):
+        config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            record = _current.get()
+            if record is not None:
+                record._request_started = time.perf_counter()
+                record.method, record.url = params.method, str(params.url)
+                record.dns = record.connect = None
+
+        async def on_dns_start(session, ctx, params):
+            record = _current.get()
+            if record is not None:
+                record._dns_started = time.perf_counter()
+
+        async def on_dns_end(session, ctx, params):
+            record = _current.get()
+            if record is not None and record._dns_started is not None:
+                record.dns = time.perf_counter() - record._dns_started
+
+        async def on_connection_start(session, ctx, params):
+            record = _current.get()
+            if record is not None:
+                record._connect_started = time.perf_counter()
+
+        async def on_connection_end(session, ctx, params):
+            record = _current.get()
+            if record is not None and record._connect_started is not None:
+                # Connection set-up includes resolving the host
+                elapsed = time.perf_counter() - record._connect_started
+                record.connect = elapsed - (record.dns or 0.0)
+
+        async def on_request_end(session, ctx, params):
+            record = _current.get()
+            if record is not None and record._request_started is not None:
+                record._headers_received = time.perf_counter()
+                record.ttfb = record._headers_received - record._request_started
+
+        config.on_request_start.append(on_request_start)
+        config.on_dns_resolvehost_start.append(on_dns_start)
+        config.on_dns_resolvehost_end.append(on_dns_end)
+        config.on_connection_create_start.append(on_connection_start)
+        config.on_connection_create_end.append(on_connection_end)
+        config.on_request_end.append(on_request_end)
+        return config
+
+
+def endpoint_name(raw):
+    """Low-cardinality endpoint label for an uplink request method."""
+    name = getattr(raw, "__name__", "request")
+    name = name.lstrip("_")
+    name = name.removeprefix("a")
+    return name.removesuffix("_raw")
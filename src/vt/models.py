@@ -0,0 +1,191 @@
+from . import jsonlib
+
+
+class _Model:
+    """
+    Base for the lightweight models wrapping parsed API records.
+
+    Common fields are exposed as attributes read from the record on access;
+    anything else is available through get()/[] without copying the record.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def get(self, key, default=None):
+        return self.raw.get(key, default)
+
+    def __getitem__(self, key):
+        return self.raw[key]
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._label()!r})"
+
+    def _label(self):
+        return self.raw.get("name")
+
+
+class Uom(_Model):
+    """A unit of measure from the uom endpoint."""
+
+    __slots__ = ("id",)
+
+    def __init__(self, uom_id, raw):
+        super().__init__(raw)
+        self.id = uom_id
+
+    @property
+    def unit(self):
+        return self.raw.get("dispUom", "")
+
+    @property
+    def decimals(self):
+        return self.raw.get("nDec", 1)
+
+    @classmethod
+    def index(cls, uom_data):
+        """Map UOM ids to Uom models for a parsed uom payload."""
+        return {uom_id: cls(uom_id, uom) for uom_id, uom in uom_data.items()}
+
+    def _label(self):
+        return self.id
+
+
+class CurrentReading:
+    """The latest raw reading of a measuring point."""
+
+    __slots__ = ("moid", "mpid", "value", "uom_id")
+
+    def __init__(self, moid, mpid, value, uom_id):
+        self.moid = moid
+        self.mpid = mpid
+        self.value = value
+        self.uom_id = uom_id
+
+    def __repr__(self):
+        return f"CurrentReading({self.moid!r}, {self.mpid!r}, {self.value!r}, {self.uom_id!r})"
+
+    def convert(self, converter):
+        return converter.convert(self.value, self.uom_id)
+
+    def format(self, converter):
+        return converter.format(self.value, self.uom_id)
+
+
+class MeasuringPoint(_Model):
+    """A measuring point of a monitored object."""
+
+    __slots__ = ("moid", "mpid")
+
+    def __init__(self, moid, mpid, raw):
+        super().__init__(raw)
+        self.moid = moid
+        self.mpid = mpid
+
+    @property
+    def name(self):
+        mpt = self.raw.get("mpt")
+        return (mpt or {}).get("name") or self.raw.get("name")
+
+    @property
+    def uom_id(self):
+        return self.raw.get("effUomId") or self.raw.get("uomId")
+
+    @property
+    def reading(self):
+        """The CurrentReading of this point, or None if it has no reading."""
+        value = self.raw.get("lastReading")
+        if value is None:
+            return None
+        return CurrentReading(self.moid, self.mpid, value, self.uom_id)
+
+    def _label(self):
+        return self.mpid
+
+
+class MonitoredObject(_Model):
+    """A monitored object; its measuring points are built on first access."""
+
+    __slots__ = ("moid", "_points")
+
+    def __init__(self, moid, raw):
+        super().__init__(raw)
+        self.moid = moid
+        self._points = None
+
+    @property
+    def name(self):
+        return self.raw.get("name")
+
+    @property
+    def measuring_points(self):
+        if self._points is None:
+            moid = self.moid
+            self._points = [
+                MeasuringPoint(moid, mp.get("mpid") or mp.get("id") or i, mp)
+                for i, mp in enumerate(self.raw.get("mps") or [])
+            ]
+        return self._points
+
+    def _label(self):
+        return self.moid
+
+
+class ObjectIndex:
+    """
+    Monitored objects of one currentstatus or getall payload, indexed by
+    moid, with a measuring point index by mpid built once on first lookup.
+    """
+
+    __slots__ = ("objects", "_points")
+
+    def __init__(self, payload):
+        self.objects = {
+            moid: MonitoredObject(moid, obj)
+            for moid, obj in payload.items()
+            if isinstance(obj, dict)
+        }
+        self._points = None
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(jsonlib.loads(data))
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __iter__(self):
+        return iter(self.objects.values())
+
+    def __contains__(self, moid):
+        return moid in self.objects
+
+    def __getitem__(self, moid):
+        return self.objects[moid]
+
+    def get(self, moid, default=None):
+        return self.objects.get(moid, default)
+
+    @property
+    def points(self):
+        """Measuring points of every object by mpid."""
+        if self._points is None:
+            self._points = {
+                mp.mpid: mp
+                for obj in self.objects.values()
+                for mp in obj.measuring_points
+            }
+        return self._points
+
+    def point(self, mpid, default=None):
+        return self.points.get(mpid, default)
+
+    def readings(self):
+        """Iterate over the CurrentReading of every measuring point that has one."""
+        for obj in self.objects.values():
+            for mp in obj.measuring_points:
+                reading = mp.reading
+                if reading is not None:
+                    yield reading
@@ -0,0 +1,92 @@
+import hashlib
+from collections import namedtuple
+
+
+class PollState:
+    """
+    What the last poll of an endpoint returned: the server's validators
+    (ETag / Last-Modified) and a digest of the body for servers that send
+    none.
+    """
+
+    __slots__ = ("etag", "last_modified", "digest")
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+
+    def request_headers(self):
+        """Conditional request headers for the next poll."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update(self, headers, body):
+        """Record a full response; returns False if the body is unchanged."""
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if digest == self.digest:
+            return False
+        self.digest = digest
+        return True
+
+
+class StatusChange(namedtuple("StatusChange", "moid mpid kind previous current")):
+    """
+    One delta between two currentstatus snapshots.
+
+    `kind` is "added", "changed" or "removed"; `previous`/`current` are the
+    measuring point dicts before and after (None when absent). Changes to a
+    monitored object's own fields are reported with mpid None and the
+    object's fields other than "mps".
+    """
+
+    __slots__ = ()
+
+    @property
+    def changed_fields(self):
+        """Names of the fields that differ between previous and current."""
+        previous = self.previous or {}
+        current = self.current or {}
+        return {
+            key
+            for key in previous.keys() | current.keys()
+            if previous.get(key) != current.get(key)
+        }
+
+
+def status_snapshot(status):
+    """
+    Index a parsed currentstatus payload by (moid, mpid).
+
+    Measuring points without an id are keyed by their position.
+    """
+    snapshot = {}
+    for moid, obj in status.items():
+        if not isinstance(obj, dict):
+            continue
+        snapshot[(moid, None)] = {k: v for k, v in obj.items() if k != "mps"}
+        for i, mp in enumerate(obj.get("mps") or []):
+            mpid = mp.get("mpid") or mp.get("id") or i
+            snapshot[(moid, mpid)] = mp
+    return snapshot
+
+
+def diff_snapshots(previous, current):
+    """List the StatusChanges that turn snapshot `previous` into `current`."""
+    changes = []
+    for key, value in current.items():
+        old = previous.get(key)
+        if old is None:
+            changes.append(StatusChange(*key, "added", None, value))
+        elif old != value:
+            changes.append(StatusChange(*key, "changed", old, value))
+    for key, old in previous.items():
+        if key not in current:
+            changes.append(StatusChange(*key, "removed", old, None))
+    return changes
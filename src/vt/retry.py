@@ -0,0 +1,120 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed request.
+
+    Responses with a status in `retry_statuses` and the transient errors in
+    `retry_exceptions` (connection resets, timeouts, truncated bodies) are
+    retried up to `max_attempts` attempts in total, with exponential backoff
+    of `backoff_base * 2 ** attempt` seconds capped at `backoff_max`. With
+    `jitter` the wait is drawn uniformly from [0, backoff] ("full jitter").
+    A Retry-After header, when present, sets the minimum wait, up to
+    `max_retry_after` seconds. RetryPolicy(max_attempts=1) disables retries.
+
+    Buffered reads (the text and parsed getters, agethistory_frame and the
+    scoped queries) retry the request and the body download as one attempt.
+    Streamed reads (astream_history, aaggregate_history) hand out data as it
+    arrives, so a body cut short after the headers is raised rather than
+    retried.
+    """
+
+    def __init__(
+        self,
+        max_attempts=4,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        jitter=True,
+        retry_statuses=(429, 500, 502, 503, 504),
+        retry_exceptions=(
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            asyncio.TimeoutError,
+        ),
+        max_retry_after=300.0,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.max_retry_after = max_retry_after
+
+    def is_retryable(self, exc):
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status in self.retry_statuses
+        return isinstance(exc, self.retry_exceptions)
+
+    def next_delay(self, attempt, exc):
+        """
+        Seconds to wait before retrying after attempt number `attempt`
+        (0-based) failed with `exc`, or None to give up.
+        """
+        if attempt + 1 >= self.max_attempts or not self.is_retryable(exc):
+            return None
+        delay = min(self.backoff_max, self.backoff_base * 2**attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+
+def _retry_after(exc):
+    headers = getattr(exc, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter allowing `rate` requests per second on average
+    with bursts of up to `capacity` requests.
+
+    Safe to share between clients, threads and event loops: callers reserve
+    a token under a lock and sleep outside it until the token is available.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take `tokens` and return how many seconds to wait before using them."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self, tokens=1):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
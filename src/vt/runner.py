@@ -0,0 +1,78 @@
+import asyncio
+import atexit
+import os
+import threading
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running forever in a daemon thread.
+
+    Synchronous callers in any thread submit coroutines with run(); they all
+    execute concurrently on the one loop, so they share its connection pool.
+    The loop is started on first use and restarted in a forked child.
+    """
+
+    def __init__(self, name="vt-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._start()
+            return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name=self.name, daemon=True)
+        thread.start()
+        ready.wait()
+        self._loop, self._thread, self._pid = loop, thread, os.getpid()
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and block until it returns."""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "Synchronous VersaTrak methods cannot be called from the "
+                "background loop; await the async method instead"
+            )
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self):
+        """Stop the loop and wait for its thread to exit."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or self._pid != os.getpid():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+_default_loop = BackgroundLoop()
+atexit.register(_default_loop.stop)
+
+
+def default_loop():
+    """The process-wide BackgroundLoop shared by VersaTrak clients."""
+    return _default_loop
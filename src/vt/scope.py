@@ -0,0 +1,66 @@
+# Fields of a monitored object record naming its department/location, as an
+# id, a name, or a nested {"id", "name"} record
+DEPARTMENT_KEYS = ("deptId", "departmentId", "department", "dept")
+LOCATION_KEYS = ("locId", "locationId", "location", "loc")
+
+
+def _normalize(value):
+    return str(value).lower()
+
+
+def matches(record, keys, wanted):
+    """
+    True if `record` names any of `wanted` (a set of ids/names, compared
+    case-insensitively after normalizing) under one of `keys`.
+    """
+    for key in keys:
+        value = record.get(key)
+        if isinstance(value, dict):
+            candidates = (value.get("id"), value.get("name"))
+        else:
+            candidates = (value,)
+        for candidate in candidates:
+            if candidate is not None and _normalize(candidate) in wanted:
+                return True
+    return False
+
+
+def named_ids(payload, name):
+    """
+    Ids of the records named `name` in a department or location payload,
+    either a list of records or a dict of them keyed by id.
+    """
+    wanted = _normalize(name)
+    items = payload.items() if isinstance(payload, dict) else enumerate(payload)
+    ids = set()
+    for key, record in items:
+        if not isinstance(record, dict) or record.get("name") is None:
+            continue
+        if _normalize(record["name"]) == wanted:
+            ids.add(_normalize(record.get("id", key)))
+    return ids
+
+
+def known_ids(payload, known):
+    """Strings anywhere in a parsed payload (keys or values) that are in `known`."""
+    found = set()
+    stack = [payload]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            found.update(key for key in value if key in known)
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, str) and value in known:
+            found.add(value)
+    return found
+
+
+def scope_members(objects, keys, reference, name):
+    """
+    MOIDs of the objects in an ObjectIndex whose department/location
+    (`keys`) is `name`, given as an id or a name resolved via `reference`.
+    """
+    wanted = {_normalize(name)} | named_ids(reference, name)
+    return frozenset(obj.moid for obj in objects if matches(obj.raw, keys, wanted))
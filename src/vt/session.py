@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+import contextvars
+import weakref
+
+import aiohttp
+from uplink import AiohttpClient
+
+from .compression import accept_encoding
+
+# Set while VersaTrak sends a request whose body it decompresses itself
+_compressed_bodies = contextvars.ContextVar("compressed_bodies", default=False)
+
+
+@contextlib.contextmanager
+def compressed_bodies():
+    """
+    Within the block, requests advertise the configured Accept-Encoding and
+    leave the response body compressed for vt.compression.Decoder.
+    """
+    token = _compressed_bodies.set(True)
+    try:
+        yield
+    finally:
+        _compressed_bodies.reset(token)
+
+
+class SessionConfig:
+    """
+    Connection pool and timeout settings for the aiohttp session a
+    VersaTrak client creates.
+
+    `limit`/`limit_per_host` bound open connections (0 for no limit),
+    `keepalive_timeout` is how long idle connections are kept for reuse,
+    `ttl_dns_cache` how long resolved addresses are cached, and the timeout
+    arguments (seconds, None to disable) map onto aiohttp.ClientTimeout.
+
+    `compression` lists the content codings to accept, most preferred
+    first: True for every one supported (zstd and br when their libraries
+    are installed, gzip, deflate) or False to ask for uncompressed bodies.
+    """
+
+    def __init__(
+        self,
+        limit=100,
+        limit_per_host=0,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+        total_timeout=300,
+        connect_timeout=None,
+        read_timeout=None,
+        compression=True,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.total_timeout = total_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.compression = compression
+
+    def accept_encoding(self):
+        if self.compression is True:
+            return accept_encoding()
+        return accept_encoding(self.compression or ("identity",))
+
+    def connector_kwargs(self):
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+            "ttl_dns_cache": self.ttl_dns_cache,
+        }
+
+    def session_kwargs(self):
+        return {
+            "timeout": aiohttp.ClientTimeout(
+                total=self.total_timeout,
+                connect=self.connect_timeout,
+                sock_read=self.read_timeout,
+            )
+        }
+
+    def create_session(self, trace_configs=None):
+        """Create a session; must be called from a running event loop."""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(**self.connector_kwargs()),
+            trace_configs=trace_configs,
+            **self.session_kwargs(),
+        )
+
+
+class SessionClient(AiohttpClient):
+    """
+    uplink aiohttp adapter that creates its sessions lazily from a
+    SessionConfig and can close them, unlike AiohttpClient which leaves an
+    auto-created session to a best-effort __del__.
+
+    aiohttp sessions are bound to the event loop that created them, so one
+    session is kept per loop; a client used both through the synchronous
+    facade (background loop) and from the caller's own loop gets one each.
+    A session passed in is shared: it is used as-is and never closed here,
+    and `trace_configs` only apply to the sessions created by the client.
+    It stays bound to the loop it was created on, so it cannot serve the
+    synchronous facade's background loop.
+
+    Requests sent within compressed_bodies() advertise the configured
+    Accept-Encoding and leave the body compressed, so VersaTrak can
+    decompress it while it streams into the parsers and account for the
+    bytes on the wire. Other requests (e.g. the public *_raw methods) keep
+    aiohttp's own decompression.
+    """
+
+    def __init__(self, session=None, config=None, trace_configs=None):
+        super().__init__(session=session)
+        # AiohttpClient stores deferred constructor args when given no session
+        self._session = session
+        self._sessions = weakref.WeakKeyDictionary()
+        self.config = config or SessionConfig()
+        self.trace_configs = trace_configs
+        self.owns_session = session is None
+        # The loop a shared session was created on and must be used from
+        self.session_loop = getattr(session, "_loop", None)
+        self.accept_encoding = self.config.accept_encoding()
+
+    async def send(self, request):
+        if not _compressed_bodies.get():
+            return await super().send(request)
+        method, url, extras = request
+        headers = {"Accept-Encoding": self.accept_encoding}
+        headers.update(extras.get("headers") or {})
+        extras = {**extras, "headers": headers, "auto_decompress": False}
+        return await super().send((method, url, extras))
+
+    def usable_on(self, loop):
+        """Whether requests can be sent from `loop`."""
+        return self.owns_session or self.session_loop in (None, loop)
+
+    def check_loop(self, loop):
+        if not self.usable_on(loop):
+            raise RuntimeError(
+                "The shared aiohttp session belongs to another event loop; "
+                "use the async VersaTrak methods from the loop that created it"
+            )
+
+    async def session(self):
+        if not self.owns_session:
+            self.check_loop(asyncio.get_running_loop())
+            return self._session
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = self._sessions[loop] = self.config.create_session(
+                self.trace_configs
+            )
+        return session
+
+    def close_soon(self):
+        """
+        Schedule closing the session of the loop running in this thread, to
+        run once the loop resumes. A synchronous close() blocks that loop
+        (e.g. Jupyter's) until it returns, so it cannot wait on it.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            loop.create_task(session.close())
+
+    async def close(self):
+        """Close the sessions this client created, on whichever loop owns them."""
+        current = asyncio.get_running_loop()
+        sessions = list(self._sessions.items())
+        self._sessions.clear()
+        for loop, session in sessions:
+            if loop is current:
+                await session.close()
+            elif loop.is_running():
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(session.close(), loop)
+                )
+            # A session whose loop has stopped can no longer be closed
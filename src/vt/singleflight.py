@@ -0,0 +1,65 @@
+import asyncio
+import time
+import weakref
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight call
+    whose result (or exception) every caller receives.
+
+    In-flight calls are tracked per event loop, since a task cannot be
+    awaited from another loop. With a `ttl`, a successful result is also
+    returned to calls made within `ttl` seconds after it completed, so
+    bursts of calls collapse into one; failures are never kept.
+    """
+
+    # Expired results are swept once this many are held
+    _SWEEP_SIZE = 256
+
+    def __init__(self, ttl=0.0, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._calls = weakref.WeakKeyDictionary()
+        self._results = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        if self.ttl:
+            entry = self._results.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    return entry[1]
+                self._results.pop(key, None)
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        future = calls.get(key)
+        if future is None:
+            future = calls[key] = asyncio.ensure_future(func(*args, **kwargs))
+
+            def forget(done):
+                if calls.get(key) is done:
+                    del calls[key]
+                if done.cancelled():
+                    return
+                # Mark the exception retrieved even if every caller left
+                if done.exception() is None and self.ttl:
+                    self._remember(key, done.result())
+
+            future.add_done_callback(forget)
+        # One caller being cancelled must not cancel the call for the others
+        return await asyncio.shield(future)
+
+    def _remember(self, key, result):
+        now = self.clock()
+        if len(self._results) >= self._SWEEP_SIZE:
+            for stale in [
+                k for k, (expires, _) in self._results.items() if expires <= now
+            ]:
+                self._results.pop(stale, None)
+        self._results[key] = (now + self.ttl, result)
+
+    def forget(self, key=None):
+        """Drop the kept result for `key`, or all of them."""
+        if key is None:
+            self._results.clear()
+        else:
+            self._results.pop(key, None)
@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from . import jsonlib
+from .models import MonitoredObject, ObjectIndex
+from .utils import optional_import
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process refreshes on its own
+    fcntl = None
+
+
+def snapshot_schema():
+    """Arrow schema of a snapshot: one row per monitored object."""
+    pa = optional_import("pyarrow")
+    return pa.schema(
+        [
+            ("moid", pa.string()),
+            ("name", pa.string()),
+            # The object record as JSON, decoded only when asked for
+            ("raw", pa.binary()),
+            (
+                "mps",
+                pa.list_(
+                    pa.struct(
+                        [
+                            ("mpid", pa.string()),
+                            ("name", pa.string()),
+                            ("last_reading", pa.float64()),
+                            ("uom_id", pa.string()),
+                        ]
+                    )
+                ),
+            ),
+        ]
+    )
+
+
+def snapshot_table(payload):
+    """Build the snapshot table of a parsed currentstatus or getall payload."""
+    pa = optional_import("pyarrow")
+    moids, names, raws, mps = [], [], [], []
+    for moid, raw in payload.items():
+        if not isinstance(raw, dict):
+            continue
+        obj = MonitoredObject(moid, raw)
+        moids.append(moid)
+        names.append(_text(obj.name))
+        raws.append(json.dumps(raw, separators=(",", ":")).encode())
+        points = []
+        for mp in obj.measuring_points:
+            value = mp.raw.get("lastReading")
+            if not isinstance(value, int | float) or isinstance(value, bool):
+                value = None
+            points.append(
+                {
+                    "mpid": str(mp.mpid),
+                    "name": _text(mp.name),
+                    "last_reading": value,
+                    "uom_id": _text(mp.uom_id),
+                }
+            )
+        mps.append(points)
+    return pa.table([moids, names, raws, mps], schema=snapshot_schema())
+
+
+def _text(value):
+    # The string columns also hold ids and names the API sends as numbers
+    return None if value is None else str(value)
+
+
+class Snapshot:
+    """
+    A currentstatus or getall payload as an Arrow table (see
+    snapshot_schema), memory-mapped from a SnapshotCache file.
+
+    Common fields are columns, so reading them parses nothing; object
+    records are decoded individually on get().
+    """
+
+    __slots__ = ("_rows", "fetched_at", "name", "table")
+
+    def __init__(self, name, table, fetched_at):
+        self.name = name
+        self.table = table
+        self.fetched_at = fetched_at
+        self._rows = None
+
+    def __repr__(self):
+        return f"Snapshot({self.name!r}, objects={len(self)}, fetched_at={self.fetched_at})"
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __contains__(self, moid):
+        return moid in self._index()
+
+    @property
+    def moids(self):
+        return self.table.column("moid").to_pylist()
+
+    def _index(self):
+        if self._rows is None:
+            self._rows = {moid: row for row, moid in enumerate(self.moids)}
+        return self._rows
+
+    def get(self, moid, default=None):
+        """The MonitoredObject `moid`, decoding only its record."""
+        row = self._index().get(moid)
+        if row is None:
+            return default
+        return MonitoredObject(moid, jsonlib.loads(self.table["raw"][row].as_py()))
+
+    def object_index(self):
+        """Decode every record into an ObjectIndex."""
+        raws = self.table.column("raw").to_pylist()
+        return ObjectIndex(dict(zip(self.moids, map(jsonlib.loads, raws))))
+
+    def readings(self):
+        """
+        Table of every measuring point: moid, mpid, name, last_reading,
+        uom_id.
+        """
+        pa = optional_import("pyarrow")
+        pc = optional_import("pyarrow.compute")
+        mps = self.table.column("mps").combine_chunks()
+        points = pc.list_flatten(mps)
+        return pa.table(
+            {
+                "moid": pc.take(self.table.column("moid"), pc.list_parent_indices(mps)),
+                **{
+                    field: points.field(field)
+                    for field in ("mpid", "name", "last_reading", "uom_id")
+                },
+            }
+        )
+
+
+def _default_directory():
+    # tmpfs where available, so snapshots never touch the disk
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "vt-snapshots")
+
+
+class SnapshotCache:
+    """
+    Cross-process cache of currentstatus/getall snapshots, shared by the
+    processes of one host through Arrow IPC files in `directory`.
+
+    A snapshot older than `ttl` seconds is refreshed by one process at a
+    time: the one holding the file lock of that snapshot fetches and parses
+    the payload once and publishes the new file atomically, while the
+    others keep serving the previous snapshot (or, if there is none yet,
+    wait for it). Processes memory-map the files, so reading a snapshot
+    copies and parses nothing, and a mapped snapshot stays valid after
+    it has been replaced.
+
+    `scope` separates snapshots of different servers/instances sharing one
+    directory.
+    """
+
+    def __init__(self, directory=None, ttl=30, clock=time.time):
+        self.directory = directory or _default_directory()
+        self.ttl = ttl
+        self._clock = clock
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._mapped = {}
+        self._lock = threading.Lock()
+
+    def path(self, name, scope=""):
+        digest = hashlib.sha256(scope.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{name}-{digest}.arrow")
+
+    def read(self, name, scope=""):
+        """The published snapshot, fresh or not, or None if there is none."""
+        path = self.path(name, scope)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            mapped = self._mapped.get(path)
+            if mapped is not None and mapped[0] == version:
+                return mapped[1]
+        pa = optional_import("pyarrow")
+        try:
+            reader = pa.ipc.open_file(pa.memory_map(path))
+        except FileNotFoundError:
+            return None
+        fetched_at = float(reader.schema.metadata[b"fetched_at"])
+        snapshot = Snapshot(name, reader.read_all(), fetched_at)
+        with self._lock:
+            self._mapped[path] = (version, snapshot)
+        return snapshot
+
+    def fresh(self, snapshot):
+        return snapshot is not None and self._clock() - snapshot.fetched_at < self.ttl
+
+    async def aget(self, name, scope, fetch):
+        """
+        Return a fresh enough snapshot, calling the async `fetch()` for the
+        parsed payload if this process has to refresh it.
+        """
+        snapshot = self.read(name, scope)
+        if self.fresh(snapshot):
+            return snapshot
+        path = self.path(name, scope)
+        lock = _try_lock(path)
+        if lock is None:
+            if snapshot is not None:
+                # Another process is refreshing it
+                return snapshot
+            waiting = asyncio.get_running_loop().run_in_executor(None, _wait_lock, path)
+            try:
+                lock = await asyncio.shield(waiting)
+            except asyncio.CancelledError:
+                # Release the lock once the thread gets it
+                waiting.add_done_callback(_release_when_acquired)
+                raise
+        try:
+            # It may have been published while waiting for the lock
+            snapshot = self.read(name, scope)
+            if self.fresh(snapshot):
+                return snapshot
+            payload = await fetch()
+            fetched_at = self._clock()
+            self.publish(name, scope, snapshot_table(payload), fetched_at)
+        finally:
+            _unlock(lock)
+        return self.read(name, scope)
+
+    def publish(self, name, scope, table, fetched_at=None):
+        """Atomically replace the snapshot file with `table`."""
+        pa = optional_import("pyarrow")
+        fetched_at = self._clock() if fetched_at is None else fetched_at
+        schema = table.schema.with_metadata({b"fetched_at": repr(fetched_at).encode()})
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                writer.write_table(table.replace_schema_metadata(schema.metadata))
+            os.replace(tmp, self.path(name, scope))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def invalidate(self, name=None, scope=""):
+        """Remove the published snapshot of `name`, or every one of `scope`."""
+        if name is not None:
+            paths = [self.path(name, scope)]
+        else:
+            suffix = os.path.basename(self.path("", scope))
+            paths = [
+                os.path.join(self.directory, entry)
+                for entry in os.listdir(self.directory)
+                if entry.endswith(suffix)
+            ]
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def _open_lock(path):
+    return os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+
+
+def _try_lock(path):
+    # A lock file descriptor, or None if another process holds the lock
+    fd = _open_lock(path)
+    if fcntl is None:
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _wait_lock(path):
+    fd = _open_lock(path)
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    return fd
+
+
+def _unlock(fd):
+    # Closing the descriptor releases the lock
+    os.close(fd)
+
+
+def _release_when_acquired(future):
+    if not future.cancelled() and future.exception() is None:
+        _unlock(future.result())
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+
+
+class HistoryStore:
+    """
+    Local sqlite store of history points keyed by (moid, mpid, ts).
+
+    Alongside the points it keeps, per monitored object, the end of the
+    last range fetched successfully ("synced until"), which
+    VersaTrak.async_history_store resumes from so only new data is
+    requested, and per measuring point a watermark: the newest timestamp stored for it,
+    for reporting (a probe that stopped reporting keeps an old watermark).
+    Points that already exist are ignored, so overlapping fetches are safe.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS points ("
+                "moid TEXT, mpid TEXT, ts INTEGER, value REAL, "
+                "PRIMARY KEY (moid, mpid, ts)) WITHOUT ROWID"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS measuring_points ("
+                "moid TEXT, mpid TEXT, name TEXT, watermark INTEGER, "
+                "PRIMARY KEY (moid, mpid))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                "moid TEXT PRIMARY KEY, synced_until INTEGER)"
+            )
+
+    def synced_until(self, moid):
+        """End (ms) of the last range stored for an object, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT synced_until FROM objects WHERE moid = ?", (moid,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def watermark(self, moid, mpid=None):
+        """
+        Newest stored timestamp of a measuring point, or with no `mpid` the
+        oldest watermark across the object's measuring points (None if
+        nothing is stored).
+        """
+        with self._lock:
+            if mpid is None:
+                row = self._db.execute(
+                    "SELECT MIN(watermark) FROM measuring_points WHERE moid = ?",
+                    (moid,),
+                ).fetchone()
+            else:
+                row = self._db.execute(
+                    "SELECT watermark FROM measuring_points "
+                    "WHERE moid = ? AND mpid = ?",
+                    (moid, mpid),
+                ).fetchone()
+        return row[0] if row else None
+
+    def add(self, moid, points, mp_names=None, synced_until=None):
+        """
+        Store (mp_id, ts, value) points of a monitored object in one
+        transaction and advance the watermarks and, if given, the end of the
+        range they were fetched for. Returns the number of new points.
+        """
+        mp_names = mp_names or {}
+        newest = {}
+        rows = []
+        for mp_id, ts, value in points:
+            ts = int(ts)
+            rows.append((moid, mp_id, ts, value))
+            if ts > newest.get(mp_id, ts - 1):
+                newest[mp_id] = ts
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO points VALUES (?, ?, ?, ?)", rows
+            )
+            added = self._db.total_changes - before
+            self._db.executemany(
+                "INSERT INTO measuring_points VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (moid, mpid) DO UPDATE SET "
+                "name = COALESCE(excluded.name, name), "
+                "watermark = MAX(COALESCE(watermark, excluded.watermark), "
+                "excluded.watermark)",
+                [
+                    (moid, mp_id, mp_names.get(mp_id), ts)
+                    for mp_id, ts in newest.items()
+                ],
+            )
+            if synced_until is not None:
+                self._db.execute(
+                    "INSERT INTO objects VALUES (?, ?) "
+                    "ON CONFLICT (moid) DO UPDATE SET "
+                    "synced_until = MAX(synced_until, excluded.synced_until)",
+                    (moid, synced_until),
+                )
+        return added
+
+    def points(self, moid, mpid=None, start=None, end=None):
+        """Stored (mp_id, ts, value) points of an object, by measuring point and time."""
+        query = "SELECT mpid, ts, value FROM points WHERE moid = ?"
+        params = [moid]
+        if mpid is not None:
+            query += " AND mpid = ?"
+            params.append(mpid)
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND ts <= ?"
+            params.append(end)
+        with self._lock:
+            return self._db.execute(query + " ORDER BY mpid, ts", params).fetchall()
+
+    def mp_names(self, moid):
+        with self._lock:
+            return dict(
+                self._db.execute(
+                    "SELECT mpid, name FROM measuring_points WHERE moid = ?",
+                    (moid,),
+                ).fetchall()
+            )
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
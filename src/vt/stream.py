@@ -0,0 +1,200 @@
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+_SCALAR_CHARS = re.compile(r"[-+.\w]*")
+
+_VALUE, _KEY, _COLON, _COMMA = range(4)
+
+
+class _Frame:
+    __slots__ = ("is_object", "on_path", "key", "scope")
+
+    def __init__(self, is_object, on_path):
+        self.is_object = is_object
+        self.on_path = on_path
+        self.key = None if is_object else 0
+        self.scope = {}
+
+
+class JsonStreamParser:
+    """
+    Incremental JSON parser that extracts the values found at one path of a
+    document fed to it in chunks, without materializing the rest of it.
+
+    `path` is a sequence of object member names and "*" wildcards, where "*"
+    matches any array item or object member; ("mps", "*", "data", "*")
+    selects every point of every measuring point in a gethistorydata body.
+
+    feed() and close() return the completed matches as (keys, scope, value)
+    tuples: `keys` are the concrete member names/indices of the match,
+    `value` is the decoded value and `scope` is a dict of the scalar members
+    of the innermost enclosing object seen so far. The same scope dict is
+    updated in place as later members arrive.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = tuple(path)
+        self._text = codecs.getincrementaldecoder(encoding)()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._offset = 0
+        self._stack = []
+        self._state = _VALUE
+        self._done = False
+        # Scalar members of the top-level object, filled in as they arrive
+        self.root_scope = {}
+
+    def feed(self, data):
+        """Parse the next chunk of the document (bytes or str)."""
+        if isinstance(data, bytes):
+            data = self._text.decode(data)
+        self._buf += data
+        events = []
+        self._parse(events, final=False)
+        return events
+
+    def close(self):
+        """Parse the remaining input, failing if the document is incomplete."""
+        self._buf += self._text.decode(b"", final=True)
+        events = []
+        self._parse(events, final=True)
+        if not self._done or self._buf.strip():
+            raise ValueError(
+                f"Incomplete JSON document at offset {self._offset + len(self._buf)}"
+            )
+        return events
+
+    def _error(self, message, pos):
+        return ValueError(f"{message} at offset {self._offset + pos}")
+
+    def _pop(self):
+        self._stack.pop()
+        if self._stack:
+            self._state = _COMMA
+        else:
+            self._done = True
+
+    def _parse(self, events, final):
+        buf, pos, stack, path = self._buf, 0, self._stack, self.path
+        end = len(buf)
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == end:
+                break
+            if self._done:
+                raise self._error("Extra data after JSON document", pos)
+            char = buf[pos]
+            state = self._state
+
+            if state == _COMMA:
+                frame = stack[-1]
+                if char == ",":
+                    pos += 1
+                    if frame.is_object:
+                        self._state = _KEY
+                    else:
+                        frame.key += 1
+                        self._state = _VALUE
+                elif char == ("}" if frame.is_object else "]"):
+                    pos += 1
+                    self._pop()
+                else:
+                    raise self._error(f"Unexpected {char!r}", pos)
+                continue
+
+            if state == _KEY:
+                if char == "}":
+                    pos += 1
+                    self._pop()
+                    continue
+                match = _STRING.match(buf, pos) if char == '"' else None
+                if match is None:
+                    if char == '"' and not final:
+                        break
+                    raise self._error("Expected object key", pos)
+                stack[-1].key = json.loads(match.group())
+                pos = match.end()
+                self._state = _COLON
+                continue
+
+            if state == _COLON:
+                if char != ":":
+                    raise self._error("Expected ':'", pos)
+                pos += 1
+                self._state = _VALUE
+                continue
+
+            # Expecting a value; an empty array closes here instead
+            parent = stack[-1] if stack else None
+            if char == "]" and parent is not None and not parent.is_object:
+                pos += 1
+                self._pop()
+                continue
+            depth = len(stack)
+            if parent is None:
+                on_path = True
+            else:
+                on_path = (
+                    parent.on_path
+                    and depth <= len(path)
+                    and path[depth - 1] in ("*", parent.key)
+                )
+
+            if on_path and depth == len(path):
+                try:
+                    value, stop = self._decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise self._error("Malformed JSON value", pos) from None
+                    break
+                if stop == end and not final and _is_number(value):
+                    # The number may continue in the next chunk
+                    break
+                pos = stop
+                scope = _nearest_scope(stack)
+                events.append((tuple(f.key for f in stack), scope, value))
+            elif char in "{[":
+                pos += 1
+                stack.append(_Frame(char == "{", on_path))
+                if parent is None:
+                    stack[0].scope = self.root_scope
+                self._state = _KEY if char == "{" else _VALUE
+                continue
+            else:
+                if char == '"':
+                    match = _STRING.match(buf, pos)
+                    if match is None and not final:
+                        break
+                else:
+                    if not final and _SCALAR_CHARS.match(buf, pos).end() == end:
+                        # The literal may continue in the next chunk
+                        break
+                    match = _SCALAR.match(buf, pos)
+                if match is None:
+                    raise self._error("Malformed JSON value", pos)
+                pos = match.end()
+                if parent is not None and parent.on_path and parent.is_object:
+                    parent.scope[parent.key] = json.loads(match.group())
+
+            if stack:
+                self._state = _COMMA
+            else:
+                self._done = True
+
+        self._buf = buf[pos:]
+        self._offset += pos
+
+
+def _is_number(value):
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _nearest_scope(stack):
+    for frame in reversed(stack):
+        if frame.is_object:
+            return frame.scope
+    return {}
@@ -1,37 +1,72 @@
+import importlib
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+
+def optional_import(name):
+    """
+    Import one of the optional dataframe dependencies (numpy, pandas,
+    pyarrow), with an install hint if it is missing. They are only needed
+    by the frame, export and vectorized conversion paths, so the client
+    itself imports without them.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise ImportError(
+            f"{name} is required for this feature; install it with "
+            f"`pip install 'vt[frames]'`"
+        ) from e
+
+
 class UomConverter:
     """
     Helper class to convert raw VersaTrak sensor readings to human-readable units.
     """
 
-    def __init__(self, uom_data):
+    def __init__(self, uom_data, format_cache_size=4096):
         """
         Initialize with UOM metadata.
         uom_data can be a dictionary mapping UOM IDs to their metadata.
+        Formatted readings are memoized in an LRU cache of format_cache_size
+        entries (None for unbounded, 0 to disable).
         """
         self.uom_map = uom_data
+        # Precompiled (s1, o1, s2, o2) per UOM so conversions skip the lookups.
+        # Keyed by the id as a string, since the API sends UOM ids as numbers
+        # in readings but as strings in the uom payload's keys
+        self._coefficients = {
+            str(uom_id): (
+                uom.get("dispS1", 1.0),
+                uom.get("dispO1", 0.0),
+                uom.get("dispS2", 1.0),
+                uom.get("dispO2", 0.0),
+            )
+            for uom_id, uom in uom_data.items()
+        }
+        self._formats = {
+            str(uom_id): f"{{:.{uom.get('nDec', 1)}f}} {uom.get('dispUom', '')}"
+            for uom_id, uom in uom_data.items()
+        }
+        self._table = None
+        self._format = lru_cache(maxsize=format_cache_size)(self._format_uncached)
 
     def convert(self, value, uom_id):
         """
         Convert a raw value to the units specified by uom_id.
         Returns the converted float value.
         """
-        if uom_id not in self.uom_map:
+        coefficients = self._coefficients.get(str(uom_id))
+        if coefficients is None:
             logger.warning(
                 f"UOM ID {uom_id} not found in metadata. Returning raw value."
             )
             return value
 
-        uom = self.uom_map[uom_id]
-
-        s1 = uom.get("dispS1", 1.0)
-        o1 = uom.get("dispO1", 0.0)
-        s2 = uom.get("dispS2", 1.0)
-        o2 = uom.get("dispO2", 0.0)
+        s1, o1, s2, o2 = coefficients
 
         # Formula: (v * s1 + o1) * s2 + o2
         converted = (value * s1 + o1) * s2 + o2
@@ -41,33 +76,111 @@ class UomConverter:
         """
         Convert and format a raw value as a string with units and proper decimal places.
         """
-        if uom_id not in self.uom_map:
+        uom_id = str(uom_id)
+        if uom_id not in self._formats:
+            # Unknown UOM: the raw value is shown as is, and 1, 1.0 and True
+            # would share one cache entry
             return f"{value}"
+        try:
+            return self._format(value, uom_id)
+        except TypeError:
+            # Unhashable value; format it without the cache
+            return self._format_uncached(value, uom_id)
 
-        uom = self.uom_map[uom_id]
-        converted = self.convert(value, uom_id)
-
-        decimals = uom.get("nDec", 1)
-        units = uom.get("dispUom", "")
-
-        return f"{converted:.{decimals}f} {units}".strip()
+    def _format_uncached(self, value, uom_id):
+        return self._formats[uom_id].format(self.convert(value, uom_id)).strip()
 
     def convert_series(self, series, uom_id):
         """
         Convert a pandas Series of raw values to the units specified by uom_id.
         """
-        if uom_id not in self.uom_map:
+        coefficients = self._coefficients.get(str(uom_id))
+        if coefficients is None:
             logger.warning(
                 f"UOM ID {uom_id} not found in metadata. Returning raw series."
             )
             return series
 
-        uom = self.uom_map[uom_id]
-
-        s1 = uom.get("dispS1", 1.0)
-        o1 = uom.get("dispO1", 0.0)
-        s2 = uom.get("dispS2", 1.0)
-        o2 = uom.get("dispO2", 0.0)
+        s1, o1, s2, o2 = coefficients
 
         # Formula: (v * s1 + o1) * s2 + o2
         return (series * s1 + o1) * s2 + o2
+
+    def convert_array(self, values, uom_ids):
+        """
+        Convert raw values whose units vary per element in one vectorized pass.
+
+        uom_ids holds one UOM ID per value (e.g. a DataFrame column). Values
+        with unknown UOM IDs are returned unchanged. Returns a float64 NumPy
+        array, or a Series aligned with values if values is a pandas Series.
+        """
+        np = optional_import("numpy")
+
+        raw = np.asarray(values, dtype=np.float64)
+        unique_ids, inverse = _factorize(uom_ids)
+        if inverse.shape != raw.shape:
+            raise ValueError("values and uom_ids must have the same shape")
+
+        table_ids, index, coefficients = self._coefficient_table()
+        rows = np.empty(len(unique_ids), dtype=np.intp)
+        for i, uom_id in enumerate(unique_ids.tolist()):
+            row = index.get(str(uom_id))
+            if row is None:
+                logger.warning(
+                    f"UOM ID {uom_id} not found in metadata. Returning raw values."
+                )
+                row = len(table_ids)
+            rows[i] = row
+        s1, o1, s2, o2 = coefficients[:, rows[inverse]]
+
+        # Formula: (v * s1 + o1) * s2 + o2
+        converted = (raw * s1 + o1) * s2 + o2
+        if hasattr(values, "index") and hasattr(values, "name"):
+            return type(values)(converted, index=values.index, name=values.name)
+        return converted
+
+    def _coefficient_table(self):
+        # 4 x (n + 1) coefficient matrix; the last column is the identity
+        # conversion used for unknown UOM IDs
+        if self._table is None:
+            np = optional_import("numpy")
+
+            ids = list(self._coefficients)
+            coefficients = np.array(
+                [*self._coefficients.values(), (1.0, 0.0, 1.0, 0.0)],
+                dtype=np.float64,
+            ).T.copy()
+            index = {uom_id: row for row, uom_id in enumerate(ids)}
+            self._table = (ids, index, coefficients)
+        return self._table
+
+
+def _factorize(uom_ids):
+    # The distinct UOM IDs and, per element, the index of its ID among them.
+    # pandas columns are factorized as they are (a categorical already is),
+    # since converting them to an object array first costs more than the
+    # conversion; hash-based pandas.factorize also beats the sort np.unique
+    # does on string ids
+    np = optional_import("numpy")
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    if pd is not None and isinstance(uom_ids, (pd.Series, pd.Index)):
+        if isinstance(uom_ids.dtype, pd.CategoricalDtype):
+            categorical = uom_ids.array
+            # Missing values have code -1; factorize those below
+            if (categorical.codes >= 0).all():
+                return np.asarray(categorical.categories), categorical.codes
+        codes, uniques = pd.factorize(uom_ids, use_na_sentinel=False)
+        return np.asarray(uniques), codes
+
+    ids = np.asarray(uom_ids)
+    if pd is not None:
+        codes, uniques = pd.factorize(ids.ravel(), use_na_sentinel=False)
+        return uniques, codes.reshape(ids.shape)
+    if ids.dtype == object:
+        ids = ids.astype(str)
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    return unique_ids, inverse.reshape(ids.shape)
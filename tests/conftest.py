@@ -0,0 +1,44 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from vt.runner import BackgroundLoop
+
+
+@pytest_asyncio.fixture
+async def make_server():
+    """Start an aiohttp app on a free local port and return its base URL."""
+    runners = []
+
+    async def start(app):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/"
+
+    yield start
+    for runner in runners:
+        await runner.cleanup()
+
+
+@pytest.fixture
+def make_threaded_server():
+    """Like make_server, but serving from a separate thread for sync clients."""
+    loop = BackgroundLoop("test-server")
+    runners = []
+
+    async def start(app):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/"
+
+    yield lambda app: loop.run(start(app))
+    for runner in runners:
+        loop.run(runner.cleanup())
+    loop.stop()
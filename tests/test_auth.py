@@ -0,0 +1,90 @@
+import asyncio
+import base64
+import json
+import time
+import pytest
+from aiohttp import web
+from vt.api import VersaTrak
+from vt.auth import jwt_expiry
+
+
+def make_jwt(exp, name="user"):
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none'})}.{encode({'sub': name, 'exp': exp})}.sig"
+
+
+def test_jwt_expiry():
+    assert jwt_expiry(make_jwt(1700000000)) == 1700000000
+    assert jwt_expiry("not-a-jwt") is None
+    assert jwt_expiry(None) is None
+
+
+def auth_app(calls, valid_token, rejected=None):
+    async def logon(request):
+        calls.append("logon")
+        await asyncio.sleep(0.01)
+        return web.json_response({"jwt": valid_token, "refreshToken": "r2"})
+
+    async def refresh(request):
+        calls.append("refresh")
+        await asyncio.sleep(0.01)
+        return web.json_response({"authToken": valid_token, "refreshToken": "r3"})
+
+    async def user(request):
+        if request.headers.get("Authorization") != f"Bearer {valid_token}":
+            if rejected is not None:
+                rejected.append(request.match_info["user_id"])
+            return web.Response(status=401)
+        return web.Response(text="user")
+
+    app = web.Application()
+    app.router.add_post("/usersession/action/logon", logon)
+    app.router.add_post("/usersession/action/refreshAuthToken", refresh)
+    app.router.add_get("/user/{user_id}", user)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_concurrent_401s_trigger_single_login(make_server):
+    calls = []
+    rejected = []
+    vt = VersaTrak(
+        base_url=await make_server(auth_app(calls, "fresh", rejected)),
+        username="user",
+        password="secret",
+        instance="i",
+        token="expired",
+    )
+
+    # Distinct requests; identical concurrent ones would be coalesced
+    results = await asyncio.gather(*(vt.aget_user(i) for i in range(20)))
+
+    assert results == ["user"] * 20
+    assert len(rejected) == 20
+    assert calls == ["logon"]
+    assert vt.token == "fresh"
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_token_refreshed_ahead_of_expiry(make_server):
+    calls = []
+    rejected = []
+    valid = make_jwt(time.time() + 3600)
+    vt = VersaTrak(
+        base_url=await make_server(auth_app(calls, valid, rejected)),
+        token=make_jwt(time.time() + 10),
+        refresh_token="r1",
+        refresh_margin=60,
+    )
+
+    results = await asyncio.gather(*(vt.aget_user(i) for i in range(10)))
+
+    assert results == ["user"] * 10
+    # Refreshed before any request went out with the expiring token
+    assert rejected == []
+    assert calls == ["refresh"]
+    assert vt.refresh_token == "r3"
+    await vt.aclose(logoff=False)
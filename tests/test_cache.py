@@ -0,0 +1,82 @@
+import pytest
+from aiohttp import web
+from vt.api import VersaTrak
+from vt.cache import MetadataCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_and_per_endpoint_ttls():
+    clock = FakeClock()
+    cache = MetadataCache(ttl=10, ttls={"uom": 100}, clock=clock)
+    cache.set("uom", "s", "uoms")
+    cache.set("policy", "s", "policies")
+
+    clock.now += 50
+    assert cache.get("uom", "s") == "uoms"
+    assert cache.get("policy", "s") is None
+
+    clock.now += 51
+    assert cache.get("uom", "s") is None
+
+
+def test_lru_eviction_and_invalidate():
+    cache = MetadataCache(maxsize=2)
+    cache.set("a", "s", 1)
+    cache.set("b", "s", 2)
+    cache.get("a", "s")
+    cache.set("c", "s", 3)
+
+    assert cache.get("b", "s") is None
+    assert cache.get("a", "s") == 1
+
+    cache.invalidate("a")
+    assert cache.get("a", "s") is None
+    assert cache.get("c", "s") == 3
+    cache.invalidate()
+    assert cache.get("c", "s") is None
+
+
+def test_disk_persistence(tmp_path):
+    path = tmp_path / "metadata.sqlite"
+    cache = MetadataCache(path=path)
+    cache.set("uom", "server-a", '{"x": 1}')
+    cache.close()
+
+    reopened = MetadataCache(path=path)
+    assert reopened.get("uom", "server-a") == '{"x": 1}'
+    assert reopened.get("uom", "server-b") is None
+    reopened.invalidate("uom")
+    reopened.close()
+    assert MetadataCache(path=path).get("uom", "server-a") is None
+
+
+@pytest.mark.asyncio
+async def test_client_caches_reference_endpoints(make_server):
+    hits = 0
+
+    async def uom(request):
+        nonlocal hits
+        hits += 1
+        return web.json_response({"u1": {"dispUom": "%"}})
+
+    app = web.Application()
+    app.router.add_get("/uom", uom)
+    vt = VersaTrak(
+        base_url=await make_server(app), token="test-token", cache=MetadataCache()
+    )
+
+    assert await vt.auom() == await vt.auom()
+    assert (await vt.aget_uoms())["u1"]["dispUom"] == "%"
+    assert hits == 1
+
+    vt.invalidate_cache("uom")
+    await vt.auom()
+    assert hits == 2
+    await vt.aclose(logoff=False)
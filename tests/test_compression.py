@@ -0,0 +1,163 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from aiohttp import ClientPayloadError, web
+
+from vt.api import VersaTrak
+from vt import compression
+from vt.compression import Decoder
+from vt.metrics import StatsCollector
+from vt.session import SessionConfig
+
+BODY = json.dumps(
+    {
+        "moid": "mo-1",
+        "mps": [{"mpid": "a", "data": [{"d": i, "v": 1.5} for i in range(2000)]}],
+    }
+).encode()
+
+
+def decode_in_chunks(encoding, blob, size=7):
+    decoder = Decoder(encoding)
+    chunks = [decoder.decompress(blob[i : i + size]) for i in range(0, len(blob), size)]
+    return b"".join(chunks) + decoder.flush()
+
+
+@pytest.mark.parametrize(
+    "encoding, blob",
+    [
+        ("gzip", gzip.compress(BODY[:1000]) + gzip.compress(BODY[1000:])),
+        ("deflate", zlib.compress(BODY)),
+        ("deflate", zlib.compress(BODY)[2:-4]),  # raw deflate
+    ],
+)
+def test_decoder(encoding, blob):
+    assert decode_in_chunks(encoding, blob) == BODY
+
+
+def test_decoder_errors():
+    with pytest.raises(ClientPayloadError):
+        Decoder("compress")
+    with pytest.raises(ClientPayloadError):
+        decode_in_chunks("gzip", gzip.compress(BODY)[:-10])
+    with pytest.raises(ClientPayloadError):
+        decode_in_chunks("gzip", b"not gzip at all")
+
+
+def test_truncated_optional_codec(monkeypatch):
+    # Stands in for zstd/br, whose libraries may not be installed
+    def codec():
+        state = {"finished": False}
+
+        def decompress(data):
+            state["finished"] = data.endswith(b"$")
+            return data.rstrip(b"$")
+
+        return decompress, lambda: state["finished"]
+
+    monkeypatch.setitem(compression._OPTIONAL, "fake", codec)
+    assert decode_in_chunks("fake", BODY + b"$") == BODY
+    with pytest.raises(ClientPayloadError, match="Truncated fake"):
+        decode_in_chunks("fake", BODY)
+
+
+@pytest.mark.asyncio
+async def test_compressed_responses(make_server):
+    accepted = []
+
+    def compressed(request, body):
+        accepted.append(request.headers.get("Accept-Encoding"))
+        return web.Response(
+            body=gzip.compress(body),
+            headers={"Content-Encoding": "gzip"},
+            content_type="application/json",
+        )
+
+    async def currentstatus(request):
+        return compressed(request, b'{"mo-1": {"name": "Freezer", "mps": []}}')
+
+    async def history(request):
+        return compressed(request, BODY)
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    stats = StatsCollector()
+    vt = VersaTrak(
+        base_url=await make_server(app), token="test-token", instrumentation=stats
+    )
+
+    assert json.loads(await vt.acurrentstatus())["mo-1"]["name"] == "Freezer"
+    assert (await vt.aget_current_status())["mo-1"].name == "Freezer"
+    points = [p async for p in vt.astream_history("mo-1", read_size=256)]
+    assert len(points) == 2000
+
+    assert set(accepted) == {vt._http.accept_encoding}
+    assert "gzip" in accepted[0] and "deflate" in accepted[0]
+    summary = stats.summary()
+    assert summary["currentstatus"]["bytes"] == 2 * 40
+    history_stats = summary["get_history"]
+    assert history_stats["bytes"] == len(BODY)
+    assert history_stats["wire_bytes"] == len(gzip.compress(BODY))
+    assert history_stats["wire_bytes"] < history_stats["bytes"] / 5
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_raw_methods_keep_aiohttp_decompression(make_server):
+    async def currentstatus(request):
+        return web.Response(
+            body=gzip.compress(BODY),
+            headers={"Content-Encoding": "gzip"},
+            content_type="application/json",
+        )
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    res = await vt.acurrentstatus_raw()
+    assert await res.text() == BODY.decode()
+    # The client's own pipeline still decodes it itself
+    assert (await vt.acurrentstatus()).encode() == BODY
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_compression_disabled(make_server):
+    async def sysinfo(request):
+        return web.Response(text=request.headers.get("Accept-Encoding"))
+
+    app = web.Application()
+    app.router.add_get("/system/action/sysinfo", sysinfo)
+    vt = VersaTrak(
+        base_url=await make_server(app),
+        token="test-token",
+        session_config=SessionConfig(compression=False),
+    )
+    assert await vt.asysinfo() == "identity"
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_not_modified_with_content_encoding(make_server):
+    body = b'{"mo-1": {"name": "Freezer", "mps": []}}'
+
+    async def currentstatus(request):
+        headers = {"ETag": '"v1"', "Content-Encoding": "gzip"}
+        if request.headers.get("If-None-Match") == '"v1"':
+            # Empty, yet still labelled gzip
+            return web.Response(status=304, headers=headers)
+        return web.Response(
+            body=gzip.compress(body), headers=headers, content_type="application/json"
+        )
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    assert (await vt.apoll_currentstatus()).encode() == body
+    assert await vt.apoll_currentstatus() is None
+    await vt.aclose(logoff=False)
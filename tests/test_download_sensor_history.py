@@ -0,0 +1,168 @@
+import asyncio
+import importlib.util
+import json
+import pathlib
+from collections import Counter
+
+import pyarrow.dataset as ds
+import pytest
+from aiohttp import web
+
+SCRIPT = pathlib.Path(__file__).parent.parent / "download_sensor_history.py"
+SENSORS = [f"mo-{i}" for i in range(6)]
+POINTS = 4
+
+
+@pytest.fixture
+def script():
+    spec = importlib.util.spec_from_file_location("download_sensor_history", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def server(make_threaded_server, monkeypatch):
+    hits = Counter()
+
+    async def instances(request):
+        return web.json_response({"instances": [{"id": "1"}]})
+
+    async def logon(request):
+        return web.json_response({"jwt": "token", "refreshToken": "refresh"})
+
+    async def logoff(request):
+        return web.Response(text="")
+
+    async def getall(request):
+        return web.json_response({moid: {"name": moid, "mps": []} for moid in SENSORS})
+
+    async def history(request):
+        moid = request.match_info["moid"]
+        hits[moid] += 1
+        data = [{"d": 1_700_000_000_000 + i * 60_000, "v": i} for i in range(POINTS)]
+        return web.json_response(
+            {"moid": moid, "name": moid, "mps": [{"mpid": "a", "data": data}]}
+        )
+
+    app = web.Application()
+    app.router.add_get("/usersession/action/instanceList", instances)
+    app.router.add_post("/usersession/action/logon", logon)
+    app.router.add_post("/usersession/action/logoff", logoff)
+    app.router.add_get("/monitoredobject/action/getall", getall)
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    monkeypatch.setenv("VT_API_URL", make_threaded_server(app))
+    monkeypatch.setenv("VT_USERNAME", "user")
+    monkeypatch.setenv("VT_PASSWORD", "secret")
+    monkeypatch.delenv("VT_INSTANCE_ID", raising=False)
+    return hits
+
+
+def run(script, *argv):
+    asyncio.run(script.download_history(script.parse_args(list(argv))))
+
+
+def sensor_rows(path):
+    table = ds.dataset(path, format="parquet", partitioning="hive").to_table()
+    return Counter(table.column("sensor_id").to_pylist())
+
+
+def test_read_sensor_list(script, tmp_path):
+    listing = tmp_path / "sensors.txt"
+    listing.write_text("mo-1\n\n# a comment\nmo-2  # freezer\n")
+    assert script.read_sensor_list(listing) == ["mo-1", "mo-2"]
+
+
+def test_checkpoint_round_trip(script, tmp_path):
+    checkpoint = str(tmp_path / "_checkpoint")
+    assert script.load_checkpoint(checkpoint) == set()
+    script.save_checkpoint(checkpoint, {"mo-2", "mo-1"})
+    assert script.load_checkpoint(checkpoint) == {"mo-1", "mo-2"}
+    assert not (tmp_path / "_checkpoint.tmp").exists()
+
+
+def test_discard_uncommitted(script, tmp_path):
+    published = tmp_path / "part-a.parquet"
+    published.write_bytes(b"rows")
+    batch = tmp_path / "_checkpoint.batch"
+
+    # The checkpoint recorded the batch: its files stay
+    batch.write_text(json.dumps({"sensors": ["mo-1"], "files": [str(published)]}))
+    script.discard_uncommitted(str(batch), {"mo-1"})
+    assert published.exists() and not batch.exists()
+
+    # It did not: the files go, missing ones included
+    batch.write_text(
+        json.dumps({"sensors": ["mo-1", "mo-2"], "files": [str(published), "missing"]})
+    )
+    script.discard_uncommitted(str(batch), {"mo-1"})
+    assert not published.exists() and not batch.exists()
+
+
+def test_download_and_resume(script, server, tmp_path, capsys):
+    dataset = str(tmp_path / "history")
+    listing = tmp_path / "sensors.txt"
+    listing.write_text("mo-1\nmo-2\n")
+
+    run(script, "mo-0", "mo-1", "--file", str(listing), "--dataset", dataset)
+
+    assert server == Counter({"mo-0": 1, "mo-1": 1, "mo-2": 1})
+    assert sensor_rows(dataset) == {"mo-0": POINTS, "mo-1": POINTS, "mo-2": POINTS}
+
+    run(script, "--all", "--dataset", dataset)
+    assert "Resuming: 3 of 6" in capsys.readouterr().out
+    run(script, "--all", "--dataset", dataset)
+    assert "Nothing to download." in capsys.readouterr().out
+
+    assert server == Counter(dict.fromkeys(SENSORS, 1))
+    assert sensor_rows(dataset) == dict.fromkeys(SENSORS, POINTS)
+
+
+def test_crash_before_checkpoint(script, server, tmp_path, monkeypatch):
+    dataset = str(tmp_path / "history")
+    save_checkpoint = script.save_checkpoint
+    saves = []
+
+    def crash_on_second_save(path, completed):
+        saves.append(set(completed))
+        if len(saves) == 2:
+            raise RuntimeError("crash")
+        save_checkpoint(path, completed)
+
+    monkeypatch.setattr(script, "save_checkpoint", crash_on_second_save)
+    # A checkpoint after every second sensor
+    argv = ["--all", "--dataset", dataset, "--checkpoint-rows", str(2 * POINTS)]
+    with pytest.raises(RuntimeError, match="crash"):
+        run(script, *argv)
+
+    committed = saves[0]
+    crashed = saves[1] - committed
+    assert len(committed) == len(crashed) == 2
+    # The crashed batch's files were published, but its sensors not recorded
+    assert sensor_rows(dataset) == dict.fromkeys(committed | crashed, POINTS)
+    assert (tmp_path / "history" / "_checkpoint.batch").exists()
+
+    monkeypatch.setattr(script, "save_checkpoint", save_checkpoint)
+    before = Counter(server)
+    run(script, *argv)
+
+    # Only the sensors not checkpointed are downloaded again, once each
+    assert sensor_rows(dataset) == dict.fromkeys(SENSORS, POINTS)
+    assert server - before == Counter(dict.fromkeys(set(SENSORS) - committed, 1))
+    assert script.load_checkpoint(str(tmp_path / "history" / "_checkpoint")) == set(
+        SENSORS
+    )
+    assert not (tmp_path / "history" / "_checkpoint.batch").exists()
+
+
+def test_restart(script, server, tmp_path, capsys):
+    dataset = str(tmp_path / "history")
+    run(script, "mo-0", "mo-1", "--dataset", dataset)
+    run(script, "mo-0", "mo-1", "--dataset", dataset, "--restart")
+
+    assert "Resuming" not in capsys.readouterr().out
+    assert server == Counter({"mo-0": 2, "mo-1": 2})
+    assert script.load_checkpoint(str(tmp_path / "history" / "_checkpoint")) == {
+        "mo-0",
+        "mo-1",
+    }
@@ -0,0 +1,83 @@
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from vt.export import HistoryDatasetWriter, remove_incomplete
+from vt.history import HistoryFrame
+
+DAY_MS = 86_400_000
+
+
+def make_frame(object_id):
+    frame = HistoryFrame(object_id, name=f"Freezer {object_id}")
+    frame.extend(
+        [("a", DAY_MS - 1000, 1.5), ("a", DAY_MS + 1000, 2.5), ("b", 5, -80.25)]
+    )
+    frame.mp_names.update({"a": "Temp", "b": "Door"})
+    return frame
+
+
+def test_history_dataset_writer_partitions(tmp_path):
+    with HistoryDatasetWriter(
+        tmp_path, partition_by=("date", "sensor_id"), row_group_size=2
+    ) as writer:
+        writer.write(make_frame("mo-1"))
+        writer.write(make_frame("mo-2"))
+        writer.write(HistoryFrame("empty"))
+
+    assert len(writer.files) == 4
+    assert (tmp_path / "date=1970-01-01" / "sensor_id=mo-1").is_dir()
+    assert (tmp_path / "date=1970-01-02" / "sensor_id=mo-2").is_dir()
+
+    schema = pq.read_schema(writer.files[0])
+    assert schema.names == ["sensor_name", "mp_id", "mp_name", "timestamp", "value"]
+    assert str(schema.field("value").type) == "float"
+    assert str(schema.field("timestamp").type) == "timestamp[ms]"
+    assert (
+        str(schema.field("mp_name").type)
+        == "dictionary<values=string, indices=int32, ordered=0>"
+    )
+
+    dataset = ds.dataset(tmp_path, format="parquet", partitioning="hive")
+    table = dataset.to_table(filter=ds.field("sensor_id") == "mo-1").sort_by(
+        "timestamp"
+    )
+    assert table.num_rows == 3
+    assert table.column("value").to_pylist() == [-80.25, 1.5, 2.5]
+    assert table.column("mp_name").to_pylist() == ["Door", "Temp", "Temp"]
+
+
+def test_history_dataset_writer_closes_least_recent_file(tmp_path):
+    with HistoryDatasetWriter(
+        tmp_path, partition_by=("sensor_id",), row_group_size=1, max_open_files=1
+    ) as writer:
+        writer.write(make_frame("mo-1"))
+        writer.write(make_frame("mo-2"))
+        assert len(writer._writers) == 1
+
+    assert ds.dataset(tmp_path, format="parquet").count_rows() == 6
+
+
+def test_history_dataset_writer_publishes_files_on_close(tmp_path):
+    writer = HistoryDatasetWriter(tmp_path, row_group_size=1)
+    writer.write(make_frame("mo-1"))
+    assert writer._writers
+    # Nothing is visible to readers before close()
+    assert ds.dataset(tmp_path, format="parquet").count_rows() == 0
+
+    writer.close()
+    dataset = ds.dataset(tmp_path, format="parquet", partitioning="hive")
+    assert dataset.count_rows() == 3
+    assert set(dataset.to_table().column("sensor_id").to_pylist()) == {"mo-1"}
+
+    # Reused after close(), rows go to new files
+    writer.write(make_frame("mo-2"))
+    writer.close()
+    assert len(writer.files) == 4
+    assert ds.dataset(tmp_path, format="parquet").count_rows() == 6
+
+    # An interrupted writer only leaves hidden files, which are removed
+    interrupted = HistoryDatasetWriter(tmp_path, row_group_size=1)
+    interrupted.write(make_frame("mo-3"))
+    assert list(tmp_path.rglob(".part-*.parquet.tmp"))
+    remove_incomplete(tmp_path)
+    assert not list(tmp_path.rglob(".part-*.parquet.tmp"))
+    assert ds.dataset(tmp_path, format="parquet").count_rows() == 6
@@ -0,0 +1,383 @@
+import asyncio
+import datetime
+import json
+import time
+import pytest
+from vt.api import VersaTrak
+from vt.cache import BucketCache
+from vt.history import (
+    BucketAggregator,
+    HistoryBucket,
+    HistoryFrame,
+    HistoryStreamParser,
+    merge_history,
+    parse_period,
+    split_time_range,
+)
+
+
+@pytest.fixture
+def vt():
+    # A token marks the client as logged on so no network calls are made
+    return VersaTrak(base_url="http://localhost/", token="test-token")
+
+
+@pytest.mark.asyncio
+async def test_aget_history_many_bounded_concurrency(vt, monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def fake_history(object_id, *args):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f'{{"moid": "{object_id}"}}'
+
+    monkeypatch.setattr(vt, "agethistorydata", fake_history)
+
+    ids = [f"mo-{i}" for i in range(20)]
+    results = [r async for r in vt.aget_history_many(ids, concurrency=3)]
+
+    assert sorted(r.object_id for r in results) == sorted(ids)
+    assert all(r.ok for r in results)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_aget_history_many_reports_partial_failures(vt, monkeypatch):
+    async def fake_history(object_id, *args):
+        if object_id == "broken":
+            raise RuntimeError("boom")
+        if object_id == "slow":
+            await asyncio.sleep(1)
+        return "{}"
+
+    monkeypatch.setattr(vt, "agethistorydata", fake_history)
+
+    results = {
+        r.object_id: r
+        async for r in vt.aget_history_many(["ok", "broken", "slow"], timeout=0.05)
+    }
+
+    assert results["ok"].ok and results["ok"].data == "{}"
+    assert isinstance(results["broken"].error, RuntimeError)
+    assert isinstance(results["slow"].error, asyncio.TimeoutError)
+
+
+@pytest.mark.asyncio
+async def test_aget_history_many_bytes(vt, monkeypatch):
+    async def fake_body(object_id, *args):
+        return b"{}"
+
+    monkeypatch.setattr(vt, "_ahistory_body", fake_body)
+
+    results = [r async for r in vt.aget_history_many(["mo-1"], decode=False)]
+
+    assert results[0].data == b"{}"
+
+
+def test_parse_period():
+    assert parse_period("24h") == parse_period("1d") == 86_400_000
+    assert parse_period("2w") == 14 * 86_400_000
+    assert parse_period(5000) == 5000
+    with pytest.raises(ValueError):
+        parse_period("7x")
+
+
+def test_split_time_range():
+    assert split_time_range(0, 25, 10) == [(0, 10), (10, 20), (20, 25)]
+    assert split_time_range(5, 5, 10) == []
+
+
+def test_merge_history_orders_and_dedupes():
+    first = {
+        "moid": "mo-1",
+        "name": "Freezer",
+        "mps": [{"mpid": "a", "name": "Temp", "data": [{"d": 3, "v": 1.0}]}],
+    }
+    second = {
+        "moid": "mo-1",
+        "name": "Freezer",
+        "mps": [
+            {
+                "mpid": "a",
+                "name": "Temp",
+                "data": [{"d": 1, "v": 0.5}, {"d": 3, "v": 2.0}],
+            },
+            {"mpid": "b", "name": "Door", "data": [{"d": 2, "v": 0}]},
+        ],
+    }
+
+    merged = merge_history([first, second])
+
+    assert merged["name"] == "Freezer"
+    mps = {mp["mpid"]: mp for mp in merged["mps"]}
+    assert mps["a"]["data"] == [{"d": 1, "v": 0.5}, {"d": 3, "v": 2.0}]
+    assert mps["b"]["data"] == [{"d": 2, "v": 0}]
+
+
+@pytest.mark.asyncio
+async def test_agethistorydata_chunked(make_server):
+    from aiohttp import web
+
+    windows = []
+
+    async def history(request):
+        form = await request.post()
+        start_date, end_date = int(form["tsStartDate"]), int(form["tsEndDate"])
+        windows.append((start_date, end_date))
+        assert form["adjustToMostRecent"] == "False"
+        data = [{"d": ts, "v": ts / 10} for ts in (start_date, end_date)]
+        moid = request.match_info["moid"]
+        return web.json_response({"moid": moid, "mps": [{"mpid": "a", "data": data}]})
+
+    app = web.Application()
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    merged = await vt.agethistorydata_chunked(
+        "mo-1", start_date=1000, end_date=1100, chunk_size=30
+    )
+
+    assert sorted(windows) == [(1000, 1030), (1030, 1060), (1060, 1090), (1090, 1100)]
+    assert [p["d"] for p in merged["mps"][0]["data"]] == [1000, 1030, 1060, 1090, 1100]
+
+    with pytest.raises(ValueError):
+        await vt.agethistorydata_chunked("mo-1", 1000, 1100, concurrency=0)
+    assert len(windows) == 4
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_astream_history(make_server):
+    from aiohttp import web
+
+    data = [{"d": ts, "v": ts * 0.5} for ts in range(1000)]
+    body = json.dumps({"moid": "mo-1", "mps": [{"mpid": "a", "data": data}]})
+
+    async def history(request):
+        assert (await request.post())["period"] == "7d"
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        for i in range(0, len(body), 1000):
+            await resp.write(body[i : i + 1000].encode())
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    points = [p async for p in vt.astream_history("mo-1", period="7d")]
+    assert points == [("a", p["d"], p["v"]) for p in data]
+
+    batches = [b async for b in vt.astream_history("mo-1", period="7d", batch_size=300)]
+    assert [len(b) for b in batches] == [300, 300, 300, 100]
+    await vt.aclose(logoff=False)
+
+
+def test_history_frame_columns():
+    frame = HistoryFrame("mo-1", name="Freezer")
+    frame.extend([("a", 1, 1.5), ("a", 2, 2), ("b", 1, 0), ("a", 3, 3.5)])
+    frame.mp_names.update({"a": "Temp", "b": None})
+
+    assert len(frame) == 4
+    assert frame.mp_ids == ["a", "b"]
+    assert frame.timestamps("a").dtype == "int64"
+    assert frame.timestamps("a").tolist() == [1, 2, 3]
+    assert frame.values("a").tolist() == [1.5, 2.0, 3.5]
+
+    df = frame.to_pandas()
+    assert list(df.columns) == [
+        "sensor_id",
+        "sensor_name",
+        "mp_id",
+        "mp_name",
+        "timestamp",
+        "value",
+    ]
+    assert df["timestamp"].dtype == "datetime64[ms]"
+    assert df["mp_id"].tolist() == ["a", "a", "a", "b"]
+    assert df["mp_name"].isna().tolist() == [False, False, False, True]
+    assert (df["sensor_name"] == "Freezer").all()
+
+    table = frame.to_arrow()
+    assert table.num_rows == 4
+    assert str(table.schema.field("timestamp").type) == "timestamp[ms]"
+    assert table.column("value").to_pylist() == [1.5, 2.0, 3.5, 0.0]
+
+
+def test_history_frame_skips_non_numeric_values():
+    frame = HistoryFrame("mo-1")
+    frame.extend([("a", 1, 1.5), ("a", 2, "OPEN"), ("a", 3, None), ("b", 4, True)])
+    frame.extend([("a", 5, 2)])
+
+    assert len(frame) == 2
+    assert list(frame.points()) == [("a", 1, 1.5), ("a", 5, 2.0)]
+
+
+def test_history_frame_from_json_matches_stream_parser():
+    body = json.dumps(
+        {
+            "moid": "mo-1",
+            "name": "Freezer",
+            "mps": [
+                {"mpid": "a", "name": "Temp", "data": [{"d": 1, "v": -80.5}, [2, 3]]},
+                {"data": [{"d": 3, "v": "OPEN"}, {"d": 4, "v": 1}], "mpid": "b"},
+                {"mpid": "c", "name": "Empty", "data": []},
+                {"mpid": "d", "data": [{"d": 5}, {"v": 6}, {"d": 7, "v": None}]},
+            ],
+        }
+    ).encode()
+    parser = HistoryStreamParser()
+    streamed = HistoryFrame("mo-1")
+    streamed.extend(parser.feed(body) + parser.close())
+
+    frame = HistoryFrame.from_json("mo-1", body)
+    assert frame.name == "Freezer"
+    assert frame.mp_names == {"a": "Temp", "b": None}
+    assert list(frame.points()) == list(streamed.points())
+    assert list(frame.points()) == [
+        ("a", 1, -80.5),
+        ("a", 2, 3.0),
+        ("b", 4, 1.0),
+    ]
+
+
+def test_history_frame_empty():
+    frame = HistoryFrame("mo-1")
+    assert len(frame) == 0
+    assert frame.to_pandas().empty
+    assert frame.to_arrow().num_rows == 0
+
+
+def test_history_frame_numeric_ids():
+    frame = HistoryFrame.from_document(
+        7, {"name": 12, "mps": [{"mpid": 9, "name": 42, "data": [{"d": 1, "v": 2.0}]}]}
+    )
+    assert frame.to_arrow().to_pylist() == [
+        {
+            "sensor_id": "7",
+            "sensor_name": "12",
+            "mp_id": "9",
+            "mp_name": "42",
+            "timestamp": datetime.datetime(1970, 1, 1, 0, 0, 0, 1000),
+            "value": 2.0,
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_agethistory_frame(make_server):
+    from aiohttp import web
+
+    body = {
+        "moid": "mo-1",
+        "name": "Freezer",
+        "mps": [
+            {"mpid": "a", "name": "Temp", "data": [{"d": 1, "v": -80}]},
+            {"mpid": "b", "name": "Door", "data": [{"d": 2, "v": 1}]},
+        ],
+    }
+
+    async def history(request):
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    frame = await vt.agethistory_frame("mo-1")
+    assert frame.name == "Freezer"
+    assert frame.mp_names == {"a": "Temp", "b": "Door"}
+    assert frame.values("a").tolist() == [-80.0]
+    assert frame.timestamps("b").tolist() == [2]
+    await vt.aclose(logoff=False)
+
+
+def test_bucket_aggregator():
+    aggregator = BucketAggregator(1000, start=0, end=3000)
+    aggregator.add([("a", 100, 1.0), ("a", 900, 3.0), ("a", 500, 5.0)])
+    aggregator.add(
+        [("a", 1500, 2), ("b", 10, "open"), ("a", 3000, 9.0), ("b", 20, 4.0)]
+    )
+
+    assert aggregator.buckets() == [
+        HistoryBucket("a", 0, 1.0, 5.0, 3.0, 3, 3.0),
+        HistoryBucket("a", 1000, 2, 2, 2.0, 1, 2),
+        HistoryBucket("b", 0, 4.0, 4.0, 4.0, 1, 4.0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_aaggregate_history_caches_complete_buckets(make_server):
+    from aiohttp import web
+
+    hour = 3600 * 1000
+    starts = []
+
+    async def history(request):
+        form = await request.post()
+        start, end = int(form["tsStartDate"]), int(form["tsEndDate"])
+        starts.append(start)
+        data = [{"d": ts, "v": ts / hour} for ts in range(start, end, 30 * 60 * 1000)]
+        body = {"moid": "mo-1", "mps": [{"mpid": "a", "data": data}]}
+        return web.Response(text=json.dumps(body))
+
+    app = web.Application()
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    vt = VersaTrak(
+        base_url=await make_server(app), token="test-token", bucket_cache=BucketCache()
+    )
+
+    buckets = await vt.aaggregate_history(
+        "mo-1", "1h", start_date=hour + 5, end_date=4 * hour
+    )
+    assert [b.start for b in buckets] == [hour, 2 * hour, 3 * hour]
+    assert buckets[0] == HistoryBucket("a", hour, 1.0, 1.5, 1.25, 2, 1.5)
+    assert starts == [hour]
+
+    again = await vt.aaggregate_history(
+        "mo-1", "1h", start_date=hour, end_date=5 * hour
+    )
+    assert again[:3] == buckets
+    assert [b.start for b in again] == [hour, 2 * hour, 3 * hour, 4 * hour]
+    assert starts == [hour, 4 * hour]
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_aaggregate_history_does_not_cache_settling_buckets(make_server):
+    from aiohttp import web
+
+    minute = 60 * 1000
+    now = int(time.time() * 1000)
+    now -= now % minute
+    old, recent = now - 10 * minute, now - 2 * minute
+    points = [{"d": old + 5, "v": 1.0}, {"d": recent + 5, "v": 2.0}]
+    starts = []
+
+    async def history(request):
+        form = await request.post()
+        start, end = int(form["tsStartDate"]), int(form["tsEndDate"])
+        starts.append(start)
+        data = [p for p in points if start <= p["d"] < end]
+        body = {"moid": "mo-1", "mps": [{"mpid": "a", "data": data}]}
+        return web.Response(text=json.dumps(body))
+
+    app = web.Application()
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    vt = VersaTrak(
+        base_url=await make_server(app), token="test-token", bucket_cache=BucketCache()
+    )
+
+    first = await vt.aaggregate_history("mo-1", "1m", start_date=old)
+    assert [(b.start, b.count) for b in first] == [(old, 1), (recent, 1)]
+
+    # A point recorded late for a bucket that closed less than `settle` ago
+    points.append({"d": recent + 10, "v": 4.0})
+    again = await vt.aaggregate_history("mo-1", "1m", start_date=old)
+    assert [(b.start, b.count) for b in again] == [(old, 1), (recent, 2)]
+    assert old < starts[1] <= recent
+    await vt.aclose(logoff=False)
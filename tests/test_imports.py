@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import vt
+from vt.utils import optional_import
+
+HEAVY = ("numpy", "pandas", "pyarrow")
+
+
+def imported_modules(statement):
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return set(out.stdout.split())
+
+
+@pytest.mark.parametrize(
+    "statement", ["import vt.api", "from vt import VersaTrak, HistoryFrame"]
+)
+def test_client_import_skips_dataframe_libraries(statement):
+    modules = imported_modules(statement)
+    assert "vt.api" in modules
+    assert not modules.intersection(HEAVY)
+
+
+def test_package_import_is_lazy():
+    modules = imported_modules("import vt")
+    assert not {"vt.api", "aiohttp", "uplink"} & modules
+
+
+def test_lazy_exports():
+    from vt.api import VersaTrak
+
+    assert vt.VersaTrak is VersaTrak
+    assert "ObjectIndex" in dir(vt)
+    with pytest.raises(AttributeError):
+        getattr(vt, "NotAThing")
+
+
+def test_optional_import_hint():
+    with pytest.raises(ImportError, match=r"vt\[frames\]"):
+        optional_import("vt_missing_dependency")
@@ -0,0 +1,74 @@
+import pytest
+from vt import jsonlib
+
+
+@pytest.mark.parametrize("backend", jsonlib.BACKENDS)
+def test_backends_decode_bytes_and_str(backend):
+    if backend != "json":
+        pytest.importorskip(backend)
+    name, loads = jsonlib.get_loads(backend)
+
+    assert name == backend
+    assert loads(b'{"a": [1, 2.5, "\\u00b0C"]}') == {"a": [1, 2.5, "°C"]}
+    assert loads('{"a": null}') == {"a": None}
+    # Documents a fast backend rejects fall back to the standard library
+    assert loads(b'{"v": NaN, "n": 123456789012345678901234567890}')["n"] == (
+        123456789012345678901234567890
+    )
+    with pytest.raises(ValueError):
+        loads(b"{not json")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        jsonlib.get_loads("simplejson")
+
+
+def test_default_backend_is_fastest_installed():
+    expected = "json"
+    for name in ("msgspec", "orjson"):
+        try:
+            __import__(name)
+            expected = name
+        except ImportError:
+            pass
+    assert jsonlib.get_loads()[0] == expected
+
+
+@pytest.mark.asyncio
+async def test_parsed_getters_decode_from_bytes(make_server):
+    from aiohttp import web
+
+    from vt.api import VersaTrak
+    from vt.cache import MetadataCache
+
+    async def uom(request):
+        return web.json_response({"u1": {"dispUom": "°C"}})
+
+    async def currentstatus(request):
+        return web.json_response({"mo-1": {"mps": []}})
+
+    app = web.Application()
+    app.router.add_get("/uom", uom)
+    app.router.add_get("/currentstatus", currentstatus)
+    decoded = []
+
+    def loads(body):
+        decoded.append(type(body))
+        return jsonlib.loads(body)
+
+    vt = VersaTrak(
+        base_url=await make_server(app),
+        token="test-token",
+        json_loads=loads,
+        cache=MetadataCache(),
+    )
+    assert (await vt.aget_uoms())["u1"]["dispUom"] == "°C"
+    changes = vt.watch_current_status(interval=0)
+    assert (await anext(changes)).moid == "mo-1"
+    await changes.aclose()
+    assert decoded == [bytes, bytes]
+
+    # The text getters still return str, from the same cached body
+    assert await vt.auom() == '{"u1": {"dispUom": "\\u00b0C"}}'
+    await vt.aclose(logoff=False)
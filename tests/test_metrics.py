@@ -0,0 +1,124 @@
+import contextlib
+import gzip
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from vt.api import VersaTrak
+from vt.metrics import Instrumentation, StatsCollector, endpoint_name
+from vt.retry import RetryPolicy
+
+
+def test_endpoint_name():
+    assert endpoint_name(VersaTrak._aget_history_raw) == "get_history"
+    assert endpoint_name(VersaTrak.acurrentstatus_raw) == "currentstatus"
+
+
+@pytest.mark.asyncio
+async def test_instrumentation_records_requests(make_server):
+    statuses = [503, 200, 200]
+
+    async def logon(request):
+        return web.json_response({"jwt": "fresh-token"})
+
+    async def sysinfo(request):
+        return web.Response(status=statuses.pop(0), text="ok")
+
+    async def currentstatus(request):
+        return web.json_response({"mo-1": {"name": "Freezer", "mps": []}})
+
+    app = web.Application()
+    app.router.add_post("/usersession/action/logon", logon)
+    app.router.add_get("/system/action/sysinfo", sysinfo)
+    app.router.add_get("/currentstatus", currentstatus)
+
+    class Recording(Instrumentation):
+        def __init__(self):
+            self.records = []
+
+        def on_request(self, record):
+            self.records.append(record)
+
+    stats = StatsCollector()
+    vt = VersaTrak(
+        base_url=await make_server(app),
+        retry_policy=RetryPolicy(backoff_base=0.001),
+        instrumentation=stats,
+    )
+    # Set after construction so the first request logs in
+    vt.username, vt.password, vt.instance = "user", "secret", "inst"
+
+    assert await vt.asysinfo() == "ok"
+    assert len(await vt.aget_current_status()) == 1
+
+    summary = stats.summary()
+    assert summary["auth"] == {"login": 1}
+    assert summary["sysinfo"]["requests"] == 2
+    assert summary["sysinfo"]["errors"] == 1
+    assert summary["sysinfo"]["retries"] == 1
+    assert summary["sysinfo"]["bytes"] == 2
+    assert summary["sysinfo"]["ttfb_mean"] > 0
+    assert summary["currentstatus"]["decode_mean"] is not None
+    assert "currentstatus" in stats.format_summary()
+
+    recording = Recording()
+    vt.instrumentation = vt._recorder.hooks = recording
+    await vt.asysinfo()
+    (record,) = recording.records
+    assert (record.endpoint, record.status, record.method) == ("sysinfo", 200, "GET")
+    assert record.total >= record.ttfb > 0
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_instrumentation_records_streams_and_auth(make_server):
+    body = json.dumps(
+        {"moid": "mo-1", "mps": [{"mpid": "a", "data": [{"d": 1, "v": 2.0}] * 5000}]}
+    ).encode()
+
+    async def logon(request):
+        return web.json_response({"jwt": "fresh-token"})
+
+    async def logoff(request):
+        return web.Response(text="")
+
+    async def history(request):
+        if request.match_info["moid"] == "mo-1":
+            return web.Response(body=body)
+        # Cut short: the gzip stream never ends
+        return web.Response(
+            body=gzip.compress(body)[:-20], headers={"Content-Encoding": "gzip"}
+        )
+
+    app = web.Application()
+    app.router.add_post("/usersession/action/logon", logon)
+    app.router.add_post("/usersession/action/logoff", logoff)
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    stats = StatsCollector()
+    vt = VersaTrak(
+        base_url=await make_server(app),
+        retry_policy=RetryPolicy(max_attempts=1),
+        instrumentation=stats,
+    )
+    vt.username, vt.password, vt.instance = "user", "secret", "inst"
+
+    # The consumer stops after the first point
+    async with contextlib.aclosing(vt.astream_history("mo-1", read_size=256)) as points:
+        async for _ in points:
+            break
+    summary = stats.summary()["get_history"]
+    assert (summary["requests"], summary["aborted"], summary["errors"]) == (1, 1, 0)
+    assert 0 < summary["bytes"] < len(body)
+
+    with pytest.raises(aiohttp.ClientPayloadError):
+        async for _ in vt.astream_history("mo-2"):
+            pass
+    summary = stats.summary()["get_history"]
+    assert (summary["requests"], summary["aborted"], summary["errors"]) == (2, 1, 1)
+
+    await vt.aclose()
+    summary = stats.summary()
+    assert summary["logon"]["requests"] == summary["logoff"]["requests"] == 1
+    assert summary["logon"]["ttfb_mean"] > 0
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from aiohttp import web
+
+from vt.api import VersaTrak
+from vt.models import ObjectIndex, Uom
+from vt.utils import UomConverter
+
+STATUS = {
+    "mo-1": {
+        "name": "Freezer",
+        "mps": [
+            {
+                "mpid": "a",
+                "lastReading": 100,
+                "effUomId": "u1",
+                "mpt": {"name": "Temp"},
+            },
+            {"mpid": "b", "uomId": "u2", "name": "Door"},
+        ],
+    },
+    "mo-2": {"name": "Fridge", "mps": []},
+    "version": 3,
+}
+UOMS = {"u1": {"dispUom": "°C", "nDec": 1, "dispS1": 0.1}}
+
+
+def test_object_index():
+    index = ObjectIndex.from_json(json.dumps(STATUS))
+
+    assert len(index) == 2
+    assert "mo-1" in index and "version" not in index
+    freezer = index["mo-1"]
+    assert freezer.name == "Freezer"
+    assert [mp.name for mp in freezer.measuring_points] == ["Temp", "Door"]
+    assert index.point("b").uom_id == "u2"
+    assert index.point("b").reading is None
+    assert index.point("a").moid == "mo-1"
+    assert index.get("missing") is None
+
+
+def test_readings_and_uoms():
+    index = ObjectIndex(STATUS)
+    (reading,) = index.readings()
+    assert (reading.moid, reading.mpid, reading.value, reading.uom_id) == (
+        "mo-1",
+        "a",
+        100,
+        "u1",
+    )
+    assert reading.format(UomConverter(UOMS)) == "10.0 °C"
+
+    uoms = Uom.index(UOMS)
+    assert uoms["u1"].unit == "°C"
+    assert uoms["u1"].decimals == 1
+    assert uoms["u1"]["dispS1"] == 0.1
+
+
+@pytest.mark.asyncio
+async def test_uom_index(make_server):
+    async def uom(request):
+        return web.json_response(UOMS)
+
+    app = web.Application()
+    app.router.add_get("/uom", uom)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    uoms = await vt.aget_uom_index()
+    assert isinstance(uoms["u1"], Uom)
+    assert (uoms["u1"].id, uoms["u1"].unit) == ("u1", "°C")
+    await vt.aclose(logoff=False)
@@ -0,0 +1,103 @@
+import pytest
+from aiohttp import web
+from vt.api import VersaTrak
+from vt.polling import diff_snapshots, status_snapshot
+
+
+@pytest.mark.asyncio
+async def test_apoll_uses_etag(make_server):
+    seen = []
+    payload = {"body": '{"mo-1": {}}'}
+
+    async def currentstatus(request):
+        seen.append(request.headers.get("If-None-Match"))
+        etag = f'"{hash(payload["body"])}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(text=payload["body"], headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    assert await vt.apoll_currentstatus() == payload["body"]
+    assert await vt.apoll_currentstatus() is None
+    payload["body"] = '{"mo-2": {}}'
+    assert await vt.apoll_currentstatus() == payload["body"]
+    assert seen[0] is None and seen[1] is not None
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_apoll_hashes_body_without_validators(make_server):
+    payload = {"body": '{"mo-1": {}}'}
+
+    async def getall(request):
+        return web.Response(text=payload["body"])
+
+    app = web.Application()
+    app.router.add_get("/monitoredobject/action/getall", getall)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    assert await vt.apoll_monitoredobjects() == payload["body"]
+    assert await vt.apoll_monitoredobjects() is None
+    payload["body"] = '{"mo-1": {"name": "x"}}'
+    assert await vt.apoll_monitoredobjects() == payload["body"]
+
+    vt.reset_polls()
+    assert await vt.apoll_monitoredobjects() == payload["body"]
+    await vt.aclose(logoff=False)
+
+
+def test_diff_snapshots():
+    previous = status_snapshot(
+        {
+            "mo-1": {
+                "name": "Freezer",
+                "mps": [{"mpid": "a", "lastReading": 1}, {"mpid": "b", "alarm": 0}],
+            }
+        }
+    )
+    current = status_snapshot(
+        {
+            "mo-1": {
+                "name": "Freezer",
+                "mps": [{"mpid": "a", "lastReading": 2}, {"mpid": "c"}],
+            },
+            "mo-2": {"name": "Fridge", "mps": []},
+        }
+    )
+
+    changes = {(c.moid, c.mpid): c for c in diff_snapshots(previous, current)}
+
+    assert changes[("mo-1", "a")].kind == "changed"
+    assert changes[("mo-1", "a")].changed_fields == {"lastReading"}
+    assert changes[("mo-1", "b")].kind == "removed"
+    assert changes[("mo-1", "c")].kind == "added"
+    assert changes[("mo-2", None)].current == {"name": "Fridge"}
+    assert ("mo-1", None) not in changes
+
+
+@pytest.mark.asyncio
+async def test_watch_current_status(make_server):
+    bodies = [
+        {"mo-1": {"mps": [{"mpid": "a", "lastReading": 1}]}},
+        {"mo-1": {"mps": [{"mpid": "a", "lastReading": 1}]}},
+        {"mo-1": {"mps": [{"mpid": "a", "lastReading": 5}]}},
+    ]
+
+    async def currentstatus(request):
+        body = bodies.pop(0) if len(bodies) > 1 else bodies[0]
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    watch = vt.watch_current_status(interval=0, emit_initial=False)
+    change = await watch.__anext__()
+    await watch.aclose()
+
+    assert (change.moid, change.mpid, change.kind) == ("mo-1", "a", "changed")
+    assert change.current["lastReading"] == 5
+    await vt.aclose(logoff=False)
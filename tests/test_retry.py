@@ -0,0 +1,109 @@
+import aiohttp
+import pytest
+from aiohttp import web
+from vt.api import VersaTrak
+from vt.retry import RetryPolicy, TokenBucket
+
+
+def response_error(status, headers=None):
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers or {})
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(max_attempts=4, backoff_base=1, jitter=False)
+
+    assert policy.next_delay(0, response_error(503)) == 1
+    assert policy.next_delay(2, response_error(503)) == 4
+    assert policy.next_delay(3, response_error(503)) is None
+    assert policy.next_delay(0, response_error(404)) is None
+    assert policy.next_delay(0, aiohttp.ServerDisconnectedError()) == 1
+    assert policy.next_delay(0, ValueError()) is None
+
+
+def test_retry_policy_honors_retry_after():
+    policy = RetryPolicy(backoff_base=0.1, max_retry_after=60)
+
+    assert policy.next_delay(0, response_error(429, {"Retry-After": "7"})) == 7
+    assert policy.next_delay(0, response_error(429, {"Retry-After": "600"})) == 60
+
+
+def test_token_bucket():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    now[0] = 10
+    assert bucket.reserve() == 0
+
+
+@pytest.mark.asyncio
+async def test_client_retries_transient_errors(make_server):
+    statuses = [503, 429, 200]
+
+    async def sysinfo(request):
+        status = statuses.pop(0)
+        headers = {"Retry-After": "0"} if status == 429 else {}
+        return web.Response(status=status, text="ok", headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/system/action/sysinfo", sysinfo)
+    vt = VersaTrak(
+        base_url=await make_server(app),
+        token="test-token",
+        retry_policy=RetryPolicy(backoff_base=0.01),
+        rate_limiter=TokenBucket(rate=1000),
+    )
+
+    assert await vt.asysinfo() == "ok"
+    assert statuses == []
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_client_does_not_retry_client_errors(make_server):
+    calls = []
+
+    async def sysinfo(request):
+        calls.append(1)
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/system/action/sysinfo", sysinfo)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await vt.asysinfo()
+    assert len(calls) == 1
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_client_retries_truncated_bodies(make_server):
+    calls = []
+
+    async def currentstatus(request):
+        calls.append(1)
+        body = b'{"mo-1": {"name": "Freezer", "mps": []}}'
+        if len(calls) == 1:
+            # Promise the whole body but drop the connection halfway
+            res = web.StreamResponse(headers={"Content-Length": str(len(body))})
+            await res.prepare(request)
+            await res.write(body[:10])
+            request.transport.close()
+            return res
+        return web.Response(body=body, content_type="application/json")
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    vt = VersaTrak(
+        base_url=await make_server(app),
+        token="test-token",
+        retry_policy=RetryPolicy(backoff_base=0.01),
+    )
+
+    assert (await vt.aget_current_status())["mo-1"].name == "Freezer"
+    assert len(calls) == 2
+    await vt.aclose(logoff=False)
@@ -0,0 +1,72 @@
+import pytest
+from aiohttp import web
+
+from vt.api import VersaTrak
+from vt.models import ObjectIndex
+from vt.scope import LOCATION_KEYS, known_ids, named_ids, scope_members
+
+OBJECTS = {
+    "mo-1": {"name": "Freezer 1", "deptId": "d-1", "location": {"id": "l-1"}},
+    "mo-2": {"name": "Freezer 2", "department": "Pathology", "locId": "l-2"},
+    "mo-3": {"name": "Incubator", "deptId": "D-2", "location": {"name": "Lab B"}},
+}
+DEPARTMENTS = [{"id": "d-1", "name": "Pathology"}, {"id": "d-2", "name": "Biology"}]
+LOCATIONS = {"l-1": {"name": "Lab A"}, "l-2": {"name": "Lab B"}}
+
+
+def test_scope_members():
+    objects = ObjectIndex(OBJECTS)
+
+    assert named_ids(DEPARTMENTS, "pathology") == {"d-1"}
+    assert named_ids(LOCATIONS, "Lab B") == {"l-2"}
+    assert scope_members(objects, LOCATION_KEYS, LOCATIONS, "lab b") == {
+        "mo-2",
+        "mo-3",
+    }
+    assert scope_members(objects, LOCATION_KEYS, LOCATIONS, "l-1") == {"mo-1"}
+    assert scope_members(objects, LOCATION_KEYS, LOCATIONS, "Nowhere") == set()
+
+
+def test_known_ids():
+    watchlist = {"items": [{"moid": "mo-2", "note": "mo-9"}, "mo-3"], "mo-1": {}}
+    assert known_ids(watchlist, {"mo-1", "mo-2", "mo-3"}) == {"mo-1", "mo-2", "mo-3"}
+    assert known_ids([], {"mo-1"}) == set()
+
+
+@pytest.mark.asyncio
+async def test_scoped_status(make_server):
+    hits = {}
+
+    def handler(name, payload):
+        async def handle(request):
+            hits[name] = hits.get(name, 0) + 1
+            return web.json_response(payload)
+
+        return handle
+
+    status = {moid: {"name": obj["name"], "mps": []} for moid, obj in OBJECTS.items()}
+    app = web.Application()
+    app.router.add_get("/monitoredobject/action/getall", handler("getall", OBJECTS))
+    app.router.add_get("/department", handler("department", DEPARTMENTS))
+    app.router.add_get("/location", handler("location", LOCATIONS))
+    app.router.add_get("/user/action/watchlist", handler("watchlist", ["mo-1"]))
+    app.router.add_get("/currentstatus", handler("currentstatus", status))
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    index = await vt.aget_scoped_status(department="Pathology")
+    assert sorted(index.objects) == ["mo-1", "mo-2"]
+    assert index["mo-2"].name == "Freezer 2"
+
+    # Mappings are resolved once and combined
+    assert await vt.aresolve_scope(department="pathology", location="Lab A") == {"mo-1"}
+    assert await vt.aresolve_scope(department="Pathology", watchlist=True) == {"mo-1"}
+    objects = await vt.aget_scoped_objects(location="Lab B")
+    assert objects["mo-3"].get("deptId") == "D-2"
+    assert hits["getall"] == 2
+    assert hits["department"] == hits["location"] == hits["watchlist"] == 1
+
+    assert len(await vt.aget_scoped_status(department="Chemistry")) == 0
+    assert hits["currentstatus"] == 1
+    with pytest.raises(ValueError):
+        await vt.aresolve_scope()
+    await vt.aclose(logoff=False)
@@ -0,0 +1,156 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from vt.api import VersaTrak
+from vt.session import SessionConfig
+
+
+def sysinfo_app(calls):
+    async def sysinfo(request):
+        return web.Response(text="ok")
+
+    async def logoff(request):
+        calls.append("logoff")
+        return web.Response(text="")
+
+    app = web.Application()
+    app.router.add_get("/system/action/sysinfo", sysinfo)
+    app.router.add_post("/usersession/action/logoff", logoff)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_async_context_manager_closes_session(make_server):
+    calls = []
+    base_url = await make_server(sysinfo_app(calls))
+    config = SessionConfig(limit_per_host=4, ttl_dns_cache=60, total_timeout=5)
+
+    async with VersaTrak(
+        base_url=base_url, token="test-token", session_config=config
+    ) as vt:
+        assert await vt.asysinfo() == "ok"
+        session = await vt._http.session()
+        assert session.connector.limit_per_host == 4
+        assert session.timeout.total == 5
+
+    assert session.closed
+    assert calls == ["logoff"]
+
+
+@pytest.mark.asyncio
+async def test_shared_session_is_not_closed(make_server):
+    base_url = await make_server(sysinfo_app([]))
+    async with aiohttp.ClientSession() as shared:
+        first = VersaTrak(base_url=base_url, token="a", session=shared)
+        second = VersaTrak(base_url=base_url, token="b", session=shared)
+
+        assert await first.asysinfo() == await second.asysinfo() == "ok"
+        await first.aclose(logoff=False)
+        await second.aclose(logoff=False)
+
+        assert not shared.closed
+
+
+def test_sync_calls_share_background_loop(make_threaded_server):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    active = 0
+    peak = 0
+    loops = set()
+
+    async def user(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/user/{user_id}", user)
+    vt = VersaTrak(base_url=make_threaded_server(app), token="test-token")
+
+    def call(user_id):
+        loops.add(threading.get_ident())
+        # Distinct requests; identical concurrent ones would be coalesced
+        return vt.get_user(user_id)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(call, range(8))) == ["ok"] * 8
+
+    assert len(loops) > 1
+    assert peak > 1
+    vt.close(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_sync_wrapper_inside_running_loop(make_threaded_server):
+    base_url = make_threaded_server(sysinfo_app([]))
+    vt = VersaTrak(base_url=base_url, token="test-token")
+
+    # Sync and async use of one client get a session per event loop
+    assert vt.sysinfo() == "ok"
+    assert await vt.asysinfo() == "ok"
+    await vt.aclose(logoff=False)
+    assert not vt._http._sessions
+
+
+def test_sync_close_inside_running_loop(make_threaded_server):
+    import threading
+
+    base_url = make_threaded_server(sysinfo_app([]))
+    sessions = []
+
+    async def notebook():
+        vt = VersaTrak(base_url=base_url, token="test-token")
+        assert await vt.asysinfo() == "ok"
+        assert vt.sysinfo() == "ok"
+        sessions.extend(vt._http._sessions.values())
+        # Closes the background loop's session and schedules this loop's
+        vt.close(logoff=False)
+        await asyncio.sleep(0.1)
+
+    # In a thread, so a deadlock fails the test instead of hanging it
+    thread = threading.Thread(target=asyncio.run, args=(notebook(),), daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert len(sessions) == 2 and all(session.closed for session in sessions)
+
+
+@pytest.mark.asyncio
+async def test_shared_session_with_credentials(make_server):
+    calls = []
+
+    async def logon(request):
+        calls.append("logon")
+        return web.json_response({"jwt": "token", "refreshToken": "refresh"})
+
+    app = sysinfo_app(calls)
+    app.router.add_post("/usersession/action/logon", logon)
+    base_url = await make_server(app)
+
+    async with aiohttp.ClientSession() as shared:
+        vt = VersaTrak(
+            base_url=base_url,
+            instance="1",
+            username="user",
+            password="secret",
+            session=shared,
+        )
+        # The constructor cannot log in on the background loop
+        assert not vt.is_logged_on
+        assert calls == []
+
+        with pytest.raises(RuntimeError, match="another event loop"):
+            vt.sysinfo()
+
+        assert await vt.alogin()
+        assert await vt.asysinfo() == "ok"
+        await vt.aclose()
+
+        assert calls == ["logon", "logoff"]
+        assert not shared.closed
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from vt.api import VersaTrak
+from vt.retry import RetryPolicy
+from vt.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_ttl_keeps_results_not_failures():
+    now = [0.0]
+    flight = SingleFlight(ttl=5, clock=lambda: now[0])
+    calls = []
+
+    async def work(fail=False):
+        calls.append(fail)
+        if fail:
+            raise ValueError("boom")
+        return len(calls)
+
+    assert await flight.do("a", work) == 1
+    assert await flight.do("a", work) == 1
+    now[0] = 5
+    assert await flight.do("a", work) == 2
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await flight.do("b", work, fail=True)
+    assert calls.count(True) == 2
+
+    flight.forget()
+    assert await flight.do("a", work) == 5
+
+
+@pytest.mark.asyncio
+async def test_client_coalesces_identical_requests(make_server):
+    hits = {"currentstatus": 0, "uom": 0}
+
+    async def currentstatus(request):
+        hits["currentstatus"] += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({"mo-1": {"name": "Freezer", "mps": []}})
+
+    async def uom(request):
+        hits["uom"] += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({"u1": {"dispUom": "C", "nDec": 1}})
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    app.router.add_get("/uom", uom)
+    vt = VersaTrak(
+        base_url=await make_server(app),
+        token="test-token",
+        retry_policy=RetryPolicy(max_attempts=1),
+    )
+
+    texts = await asyncio.gather(*(vt.acurrentstatus() for _ in range(5)))
+    indexes = await asyncio.gather(*(vt.aget_current_status() for _ in range(5)))
+    converters = await asyncio.gather(*(vt.aget_uom_converter() for _ in range(5)))
+
+    assert len(set(texts)) == 1
+    assert all(index is indexes[0] for index in indexes)
+    assert all(converter is converters[0] for converter in converters)
+    assert hits == {"currentstatus": 2, "uom": 1}
+
+    # Without a coalesce window, later calls fetch again
+    await vt.aget_current_status()
+    assert hits["currentstatus"] == 3
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_coalesce_window(make_server):
+    hits = 0
+
+    async def currentstatus(request):
+        nonlocal hits
+        hits += 1
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    vt = VersaTrak(
+        base_url=await make_server(app), token="test-token", coalesce_window=60
+    )
+
+    first = await vt.aget_current_status()
+    assert await vt.aget_current_status() is first
+    vt.invalidate_cache()
+    assert await vt.aget_current_status() is not first
+    assert hits == 2
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_mixed_burst_shares_one_request(make_server):
+    hits = 0
+
+    async def currentstatus(request):
+        nonlocal hits
+        hits += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({"mo-1": {"name": "Freezer", "mps": []}})
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+
+    text, index, snapshot = await asyncio.gather(
+        vt.acurrentstatus(), vt.aget_current_status(), vt.aget_status_snapshot()
+    )
+
+    assert "Freezer" in text
+    assert index["mo-1"].name == "Freezer"
+    assert snapshot.moids == ["mo-1"]
+    assert hits == 1
+    await vt.aclose(logoff=False)
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from vt.api import VersaTrak
+from vt.snapshot import SnapshotCache, _try_lock, _unlock, snapshot_table
+
+STATUS = {
+    "mo-1": {
+        "name": "Freezer",
+        "mps": [
+            {"mpid": "a", "mpt": {"name": "Temp"}, "lastReading": -80.5, "uomId": "c"},
+            {"mpid": "b", "name": "Door", "lastReading": "open"},
+        ],
+    },
+    "mo-2": {"name": "Incubator", "mps": []},
+    "count": 2,
+}
+
+
+def test_snapshot_views(tmp_path):
+    cache = SnapshotCache(tmp_path)
+    cache.publish("currentstatus", "", snapshot_table(STATUS), fetched_at=5.0)
+    snapshot = cache.read("currentstatus")
+
+    assert (len(snapshot), snapshot.fetched_at) == (2, 5.0)
+    assert snapshot.moids == ["mo-1", "mo-2"] and "mo-2" in snapshot
+    assert snapshot.get("mo-1").measuring_points[0].reading.value == -80.5
+    assert snapshot.get("mo-3") is None
+    assert snapshot.object_index()["mo-2"].name == "Incubator"
+    assert snapshot.readings().to_pylist() == [
+        {
+            "moid": "mo-1",
+            "mpid": "a",
+            "name": "Temp",
+            "last_reading": -80.5,
+            "uom_id": "c",
+        },
+        {
+            "moid": "mo-1",
+            "mpid": "b",
+            "name": "Door",
+            "last_reading": None,
+            "uom_id": None,
+        },
+    ]
+    # Unchanged files are not mapped again
+    assert cache.read("currentstatus") is snapshot
+
+    cache.invalidate()
+    assert cache.read("currentstatus") is None
+
+
+def test_snapshot_numeric_ids():
+    # effUomId and some names arrive as numbers
+    table = snapshot_table(
+        {"7": {"name": 1234, "mps": [{"mpid": 9, "name": 42, "effUomId": 3}]}}
+    )
+    assert table.column("name").to_pylist() == ["1234"]
+    assert table.column("mps").to_pylist() == [
+        [{"mpid": "9", "name": "42", "last_reading": None, "uom_id": "3"}]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_single_refresher(tmp_path):
+    now = [100.0]
+    fetches = []
+
+    async def fetch():
+        fetches.append(now[0])
+        return {"mo-1": {"name": f"Freezer {len(fetches)}"}}
+
+    first = SnapshotCache(tmp_path, ttl=30, clock=lambda: now[0])
+    second = SnapshotCache(tmp_path, ttl=30, clock=lambda: now[0])
+
+    snapshot = await first.aget("currentstatus", "scope", fetch)
+    assert await second.aget("currentstatus", "scope", fetch) is not snapshot
+    assert len(fetches) == 1
+
+    # While another process holds the refresh lock, the stale one is served
+    now[0] = 200.0
+    lock = _try_lock(first.path("currentstatus", "scope"))
+    stale = await second.aget("currentstatus", "scope", fetch)
+    assert stale.get("mo-1").name == "Freezer 1"
+    assert len(fetches) == 1
+    _unlock(lock)
+
+    fresh = await second.aget("currentstatus", "scope", fetch)
+    assert fresh.get("mo-1").name == "Freezer 2"
+    # A mapped snapshot outlives its replacement
+    assert stale.get("mo-1").name == "Freezer 1"
+
+
+@pytest.mark.asyncio
+async def test_waits_for_first_snapshot(tmp_path):
+    cache = SnapshotCache(tmp_path)
+    path = cache.path("monitoredobjects")
+    lock = _try_lock(path)
+
+    async def fetch():
+        raise AssertionError("should use the published snapshot")
+
+    async def publish():
+        await asyncio.sleep(0.05)
+        cache.publish("monitoredobjects", "", snapshot_table(STATUS))
+        _unlock(lock)
+
+    snapshot, _ = await asyncio.gather(
+        cache.aget("monitoredobjects", "", fetch), publish()
+    )
+    assert len(snapshot) == 2
+
+
+@pytest.mark.asyncio
+async def test_clients_share_snapshot(tmp_path, make_server):
+    hits = 0
+
+    async def currentstatus(request):
+        nonlocal hits
+        hits += 1
+        return web.json_response(STATUS)
+
+    app = web.Application()
+    app.router.add_get("/currentstatus", currentstatus)
+    base_url = await make_server(app)
+    clients = [
+        VersaTrak(base_url=base_url, token="t", snapshot_cache=SnapshotCache(tmp_path))
+        for _ in range(3)
+    ]
+
+    snapshots = [await vt.aget_status_snapshot() for vt in clients]
+    assert hits == 1
+    assert all(s.moids == ["mo-1", "mo-2"] for s in snapshots)
+
+    # Without a cache, each call fetches its own snapshot
+    vt = VersaTrak(base_url=base_url, token="t")
+    assert len(await vt.aget_status_snapshot()) == 2
+    assert hits == 2
+    for client in [*clients, vt]:
+        await client.aclose(logoff=False)
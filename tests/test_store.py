@@ -0,0 +1,98 @@
+import json
+import time
+import pytest
+from aiohttp import web
+from vt.api import VersaTrak
+from vt.store import HistoryStore
+
+
+def test_history_store_watermarks():
+    store = HistoryStore(":memory:")
+    assert store.watermark("mo-1") is None
+
+    added = store.add(
+        "mo-1", [("a", 1, 1.0), ("a", 3, 3.0), ("b", 2, 2.0)], {"a": "Temp"}
+    )
+    assert added == 3
+    assert store.watermark("mo-1", "a") == 3
+    assert store.watermark("mo-1") == 2
+
+    # Overlapping points are ignored and watermarks never move backwards
+    assert store.add("mo-1", [("a", 3, 3.0), ("a", 2, 2.0), ("b", 5, 5.0)]) == 2
+    assert store.watermark("mo-1", "a") == 3
+    assert store.watermark("mo-1") == 3
+    assert store.points("mo-1", "a") == [("a", 1, 1.0), ("a", 2, 2.0), ("a", 3, 3.0)]
+    assert store.mp_names("mo-1") == {"a": "Temp", "b": None}
+
+    assert store.synced_until("mo-1") is None
+    store.add("mo-1", [], synced_until=10)
+    store.add("mo-1", [], synced_until=8)
+    assert store.synced_until("mo-1") == 10
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_async_history_store_fetches_after_watermark(make_server, tmp_path):
+    requests = []
+    now = int(time.time() * 1000)
+
+    async def history(request):
+        form = await request.post()
+        start = int(form["tsStartDate"])
+        requests.append(start)
+        data = [{"d": ts, "v": 1.0} for ts in (now - 2000, now - 1000) if ts >= start]
+        body = {"moid": "mo-1", "mps": [{"mpid": "a", "name": "Temp", "data": data}]}
+        return web.Response(text=json.dumps(body))
+
+    app = web.Application()
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+    store = HistoryStore(str(tmp_path / "history.db"))
+
+    (result,) = await vt.async_history_store(store, ["mo-1"], initial_period="1h")
+    assert result.ok and result.data == 2
+    assert abs(requests[0] - (now - 3600 * 1000)) < 60 * 1000
+
+    (result,) = await vt.async_history_store(store, ["mo-1"], overlap=0)
+    assert result.ok and result.data == 0
+    assert 0 <= requests[1] - now < 60 * 1000
+    assert store.mp_names("mo-1") == {"a": "Temp"}
+    store.close()
+    await vt.aclose(logoff=False)
+
+
+@pytest.mark.asyncio
+async def test_async_history_store_resumes_past_stale_measuring_point(
+    make_server, tmp_path
+):
+    requests = []
+    now = int(time.time() * 1000)
+
+    async def history(request):
+        form = await request.post()
+        requests.append(int(form["tsStartDate"]))
+        # Probe "b" went offline a day ago; "a" keeps reporting
+        mps = [
+            {"mpid": "a", "data": [{"d": now - 1000, "v": 1.0}]},
+            {"mpid": "b", "data": []},
+        ]
+        return web.Response(text=json.dumps({"moid": "mo-1", "mps": mps}))
+
+    app = web.Application()
+    app.router.add_post("/monitoredObject/action/gethistorydata/{moid}", history)
+    vt = VersaTrak(base_url=await make_server(app), token="test-token")
+    store = HistoryStore(str(tmp_path / "history.db"))
+    stale = now - 24 * 3600 * 1000
+    store.add("mo-1", [("b", stale, 2.0)], synced_until=now - 3600 * 1000)
+
+    (result,) = await vt.async_history_store(store, ["mo-1"], overlap="5m")
+    assert result.ok and result.data == 1
+    assert requests[0] == now - 3600 * 1000 - 5 * 60 * 1000
+
+    # The next sync starts from the last one, not from the stale watermark
+    (result,) = await vt.async_history_store(store, ["mo-1"], overlap="5m")
+    assert abs(requests[1] - (now - 5 * 60 * 1000)) < 60 * 1000
+    assert store.watermark("mo-1", "b") == stale
+    assert store.watermark("mo-1") == stale
+    store.close()
+    await vt.aclose(logoff=False)
@@ -0,0 +1,61 @@
+import json
+import pytest
+from vt.history import HistoryStreamParser
+from vt.stream import JsonStreamParser
+
+HISTORY = {
+    "moid": "mo-1",
+    "name": "Freezer é",
+    "mps": [
+        {
+            "mpid": "a",
+            "name": "Temp",
+            "data": [{"d": 1, "v": -80.25}, {"d": 2, "v": 1e3}, {"d": 3, "v": None}],
+        },
+        {"mpid": "b", "flags": [True, False, None], "data": []},
+        {"data": [{"d": 5, "v": 1}, [6, 2]], "name": "Door", "mpid": "c"},
+    ],
+}
+
+
+def feed_in_chunks(parser, data, size):
+    events = []
+    for i in range(0, len(data), size):
+        events.extend(parser.feed(data[i : i + size]))
+    events.extend(parser.close())
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 4096])
+def test_history_stream_parser_chunk_boundaries(size):
+    body = json.dumps(HISTORY, ensure_ascii=False).encode()
+    points = feed_in_chunks(HistoryStreamParser(), body, size)
+    assert points == [
+        ("a", 1, -80.25),
+        ("a", 2, 1000.0),
+        ("c", 5, 1),
+        ("c", 6, 2),
+    ]
+
+
+def test_json_stream_parser_object_wildcard():
+    doc = json.dumps({"mo-1": {"name": "A"}, "mo-2": {"name": "B"}, "n": 2})
+    events = feed_in_chunks(JsonStreamParser(("*", "name")), doc, 3)
+    assert [(keys, value) for keys, _, value in events] == [
+        (("mo-1", "name"), "A"),
+        (("mo-2", "name"), "B"),
+    ]
+
+
+def test_json_stream_parser_scope():
+    parser = JsonStreamParser(("items", "*"))
+    events = feed_in_chunks(parser, '{"id": "x", "items": [12345, 6]}', 4)
+    assert [value for _, _, value in events] == [12345, 6]
+    assert events[0][1] == {"id": "x"}
+
+
+def test_json_stream_parser_incomplete():
+    parser = JsonStreamParser(("mps", "*"))
+    parser.feed(b'{"mps": [1, 2')
+    with pytest.raises(ValueError):
+        parser.close()
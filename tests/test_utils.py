@@ -93,3 +93,70 @@ def test_unknown_uom(converter):
 
     series = pd.Series([1.0, 2.0])
     pd.testing.assert_series_equal(converter.convert_series(series, "unknown"), series)
+
+
+def test_format_unknown_uom(converter):
+    # Equal raw values of different types keep their own representation
+    assert [converter.format(v, "unknown") for v in (1, 1.0, True)] == [
+        "1",
+        "1.0",
+        "True",
+    ]
+
+
+def test_convert_array_unknown_uom(converter):
+    values = [123.45, 1.0, 2.0]
+    assert converter.convert_array(values, ["unknown"] * 3).tolist() == values
+
+    series = pd.Series(values, index=[3, 4, 5])
+    pd.testing.assert_series_equal(
+        converter.convert_array(series, pd.Series(["unknown"] * 3)), series
+    )
+
+
+def test_convert_array_mixed_uoms(converter):
+    values = [32.0, 205103.13, 32.0, 5.0]
+    uom_ids = ["celsius", "o2_pct", "kelvin", "unknown"]
+    converted = converter.convert_array(values, uom_ids)
+
+    expected = [converter.convert(v, u) for v, u in zip(values, uom_ids)]
+    assert converted.tolist() == expected
+
+
+def test_convert_array_series(converter):
+    df = pd.DataFrame(
+        {"value": [32.0, 212.0, 32.0], "uom": ["celsius", "celsius", "kelvin"]},
+        index=[10, 11, 12],
+    )
+    converted = converter.convert_array(df["value"], df["uom"])
+
+    assert isinstance(converted, pd.Series)
+    assert converted.index.tolist() == [10, 11, 12]
+    assert converted.tolist() == pytest.approx([0.0, 100.0, 273.15])
+
+
+def test_convert_array_categorical(converter):
+    uom_ids = pd.Series(["kelvin", "celsius", None, "kelvin"], dtype="category")
+    converted = converter.convert_array([32.0, 212.0, 5.0, 212.0], uom_ids)
+
+    assert converted.tolist() == pytest.approx([273.15, 100.0, 5.0, 373.15])
+
+
+def test_int_uom_ids():
+    # Readings carry numeric UOM ids; JSON object keys are always strings
+    converter = UomConverter({"3": {"dispS1": 0.1, "nDec": 1, "dispUom": "%"}})
+    assert converter.convert(100, 3) == converter.convert(100, "3") == 10.0
+    assert converter.format(100, 3) == "10.0 %"
+    assert converter.convert_array([100], [3]).tolist() == [10.0]
+    assert converter.convert_series(pd.Series([100]), 3).tolist() == [10.0]
+
+    # And the other way round
+    converter = UomConverter({3: {"dispS1": 0.1}})
+    assert converter.convert(100, "3") == 10.0
+    assert converter.convert_array([100], ["3"]).tolist() == [10.0]
+
+
+def test_format_is_memoized(converter):
+    assert converter.format(32.0, "celsius") == "0.0 °C"
+    assert converter.format(32.0, "celsius") == "0.0 °C"
+    assert converter._format.cache_info().hits == 1